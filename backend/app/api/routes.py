@@ -1,18 +1,41 @@
 # backend/app/api/routes.py
+import openai
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 
-from app.services import transcript_service
-from app.models import doctor_persona
-from app.services.persona_engine import DoctorState, update_state, create_system_prompt
-from app.models.doctor_persona import PERSONAS
+from app.services import evaluation, jobs, transcript_service
+from app.services.http_client import OPENAI_HTTP
+from app.services.reply_stream import JsonStringFieldStream, sse
+from app.services.storage import STORAGE
+from app.services.persona_engine import (
+    DoctorState, StateTokenError, update_state, encode_state, decode_state,
+    get_prompt_builder, close_prompt_builder,
+)
+from app.models.doctor_persona import PERSONA_REGISTRY
+import json
 import os
-import httpx
+import uuid
 from datetime import datetime
 
 router = APIRouter()
 
+# Seconds per attempt for a doctor reply (overrides the shared client's short default)
+OPENAI_TURN_TIMEOUT = float(os.environ.get("OPENAI_TURN_TIMEOUT", "60"))
+# Honour the unsigned legacy `state` dict on /conversation/turn (off: clients could edit it)
+ACCEPT_UNSIGNED_STATE = os.environ.get("ACCEPT_UNSIGNED_STATE", "false").lower() in ("1", "true", "yes")
+
+
+def _checked_session_id(session_id: Optional[str], status_code: int) -> Optional[str]:
+    """Client-supplied session ids name files: refuse unsafe ones before touching storage."""
+    if session_id is None:
+        return None
+    try:
+        return transcript_service.check_session_id(session_id)
+    except transcript_service.InvalidSessionIdError as exc:
+        raise HTTPException(status_code=status_code, detail=str(exc) if status_code == 400 else "Session not found")
+
 
 class Message(BaseModel):
     role: str  # "rep" or "doctor"
@@ -38,44 +61,69 @@ async def save_transcript(payload: TranscriptIn):
     """
     Persist the transcript (simple file storage). Returns session_id.
     """
-    sid = transcript_service.save_transcript(payload.dict())
+    _checked_session_id(payload.session_id, 400)
+    sid = await STORAGE.save_transcript(payload.dict())
     return {"session_id": sid}
 
 
 @router.post("/evaluate")
 async def evaluate(payload: EvaluateIn):
     """
-    Placeholder endpoint: for now just saves transcript and returns a stub.
-    We'll wire the evaluation logic (LLM + compliance) in the next step.
+    Save the transcript and queue a background evaluation.
+    Poll GET /evaluate/{job_id}; the result is also stored next to the transcript.
     """
     # Save transcript (ensures we have a session id and stored file)
-    sid = transcript_service.save_transcript(payload.dict())
+    _checked_session_id(payload.session_id, 400)
+    data = payload.dict()
+    sid = await STORAGE.save_transcript(data)
+
+    try:
+        job = jobs.EVALUATION_QUEUE.submit(
+            "combined",
+            data["messages"],
+            payload.persona_id or "",
+            payload.must_say,
+            payload.must_not_say,
+            session_id=sid,
+        )
+    except jobs.QueueFullError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
 
-    # Minimal response — evaluation service will replace this logic later
     return {
         "session_id": sid,
-        "status": "queued",
-        "message": "Transcript saved. Evaluation will be provided by evaluation-service (coming next)."
+        "job_id": job.job_id,
+        "status": job.status,
     }
 
 
+@router.get("/evaluate/{job_id}")
+async def evaluation_status(job_id: str):
+    """Status of a queued evaluation; includes the result once done."""
+    job = jobs.EVALUATION_QUEUE.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Evaluation job not found")
+    return job.to_dict()
+
+
 @router.get("/personas")
 async def list_personas():
     """
-    Return available doctor personas (static). See app/models/doctor_persona.py
+    Return available doctor personas (loaded from app/models/personas/*.yaml).
     """
-    return {"personas": doctor_persona.PERSONAS}
+    return {"personas": [p.to_dict() for p in PERSONA_REGISTRY.all()]}
 
 
 # ===== Conversation lifecycle (REST) =====
 
 class StartConversationIn(BaseModel):
     persona_id: str
+    must_say: Optional[List[str]] = []
+    must_not_say: Optional[List[str]] = []
 
 
 @router.post("/conversation/start")
 async def start_conversation(payload: StartConversationIn):
-    persona = next((p for p in PERSONAS if p["id"] == payload.persona_id), None)
+    persona = PERSONA_REGISTRY.get(payload.persona_id)
     if not persona:
         raise HTTPException(status_code=404, detail="Persona not found")
 
@@ -90,31 +138,75 @@ async def start_conversation(payload: StartConversationIn):
         current_skepticism_level=baseline,
     )
 
-    session_id = transcript_service.save_transcript({
+    session_id = str(uuid.uuid4())  # the state token is bound to it
+    await STORAGE.save_transcript({
+        "session_id": session_id,
         "messages": [],
         "persona_id": payload.persona_id,
         "started_at": datetime.utcnow().isoformat() + "Z",
-        "state": state.__dict__,
+        "state": state.to_dict(),
+        "state_token": encode_state(state, session_id),
+        "must_say": payload.must_say,
+        "must_not_say": payload.must_not_say,
     })
 
-    return {"session_id": session_id, "state": state.__dict__, "persona": persona}
+    # evaluate turns as they arrive so /conversation/end is instant
+    evaluation.open_evaluator(session_id, payload.persona_id, payload.must_say, payload.must_not_say)
+
+    return {
+        "session_id": session_id,
+        "state": state.to_dict(),
+        "state_token": encode_state(state, session_id),
+        "persona": persona.to_dict(),
+    }
 
 
 class TurnIn(BaseModel):
     session_id: str
     persona_id: str
     rep_message: Message
-    state: dict  # serialized DoctorState from client or last response
-
-
-@router.post("/conversation/turn")
-async def process_turn(payload: TurnIn):
-    persona = next((p for p in PERSONAS if p["id"] == payload.persona_id), None)
+    state_token: Optional[str] = None  # opaque token from the last response (preferred)
+    state: Optional[dict] = None  # legacy readable state dict; ignored unless ACCEPT_UNSIGNED_STATE
+
+
+class _Turn:
+    """Everything a turn needs between building the prompt and persisting the reply."""
+    __slots__ = ("session_id", "baseline", "state", "transcript", "prompt_builder", "system_prompt")
+
+    def __init__(self, session_id, baseline, state, transcript, prompt_builder, system_prompt):
+        self.session_id = session_id
+        self.baseline = baseline
+        self.state = state
+        self.transcript = transcript
+        self.prompt_builder = prompt_builder
+        self.system_prompt = system_prompt
+
+    def completion_args(self) -> dict:
+        return {
+            "model": os.environ.get("OPENAI_TEXT_MODEL", "gpt-4o-mini"),
+            "temperature": 0.7,
+            "timeout": OPENAI_TURN_TIMEOUT,
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": "Respond in strict JSON as instructed."},
+            ],
+        }
+
+    def parse(self, content: str) -> dict:
+        try:
+            return json.loads(content or "{}")
+        except Exception:
+            return {"doctorReply": "Please clarify.", "relevancy": 0, "nextConversationStage": self.state.stage, "nextMood": self.state.mood, "signals": []}
+
+
+async def _begin_turn(payload: TurnIn) -> _Turn:
+    persona = PERSONA_REGISTRY.get(payload.persona_id)
     if not persona:
         raise HTTPException(status_code=404, detail="Persona not found")
 
     # Load transcript file to append
-    record = transcript_service.load_transcript(payload.session_id)
+    _checked_session_id(payload.session_id, 404)
+    record = await STORAGE.load_transcript(payload.session_id)
     if record is None:
         raise HTTPException(status_code=404, detail="Session not found")
 
@@ -125,45 +217,30 @@ async def process_turn(payload: TurnIn):
         rep_msg["timestamp"] = datetime.utcnow().isoformat() + "Z"
     transcript.append({"role": "rep", "content": rep_msg["content"], "timestamp": rep_msg["timestamp"]})
 
-    # Build prompt and call OpenAI Responses API (text) for JSON tool-free output
-    from openai import OpenAI
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-
-    # reconstruct state
-    state = DoctorState(**{
-        "mood": payload.state.get("mood", "Neutral"),
-        "time_pressure_level": payload.state.get("time_pressure_level", 1),
-        "stage": payload.state.get("stage", "Introduction"),
-        "seconds_elapsed": payload.state.get("seconds_elapsed", 0),
-        "trust": payload.state.get("trust", 50),
-        "current_skepticism_level": payload.state.get("current_skepticism_level", persona.get("skepticism_level", "Medium")),
-    })
+    # reconstruct state: client token, else legacy dict (if enabled), else what we stored last turn
+    baseline = persona.get("skepticism_level", "Medium")
+    try:
+        if payload.state_token:
+            state = decode_state(payload.state_token, payload.session_id)
+        elif payload.state is not None and ACCEPT_UNSIGNED_STATE:
+            state = DoctorState.from_dict(payload.state, baseline)
+        elif record["payload"].get("state_token"):
+            state = decode_state(record["payload"]["state_token"], payload.session_id)
+        else:
+            state = DoctorState(current_skepticism_level=baseline)
+    except (StateTokenError, TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid state: {exc}")
 
     remaining = max(0, int(persona["availableTimeSeconds"]) - int(state.seconds_elapsed))
-    system_prompt = create_system_prompt(
-        persona=persona,
-        state=state,
-        remaining_time=remaining,
-        conversation_transcript=transcript,
-        last_rep_message=rep_msg["content"],
-    )
+    # each transcript line is rendered once per session; old turns fold into a summary
+    prompt_builder = get_prompt_builder(payload.session_id, persona)
+    prompt_builder.sync(transcript[:-1])  # stored turns only; this rep message is added once the turn is stored
+    system_prompt = prompt_builder.render(state, remaining, rep_msg["content"], pending=transcript[-1:])
+    return _Turn(payload.session_id, baseline, state, transcript, prompt_builder, system_prompt)
 
-    completion = client.chat.completions.create(
-        model=os.environ.get("OPENAI_TEXT_MODEL", "gpt-4o-mini"),
-        temperature=0.7,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": "Respond in strict JSON as instructed."},
-        ],
-    )
-
-    content = completion.choices[0].message.content or "{}"
-    try:
-        import json
-        llm_json = json.loads(content)
-    except Exception:
-        llm_json = {"doctorReply": "Please clarify.", "relevancy": 0, "nextConversationStage": state.stage, "nextMood": state.mood, "signals": []}
 
+async def _finish_turn(turn: _Turn, llm_json: dict) -> dict:
+    transcript = turn.transcript
     # append doctor reply
     transcript.append({
         "role": "doctor",
@@ -173,19 +250,31 @@ async def process_turn(payload: TurnIn):
 
     # update state
     new_state = update_state(
-        state,
+        turn.state,
         llm_result=llm_json,
         time_delta=30,
-        baseline_skepticism=persona.get("skepticism_level", "Medium"),
+        baseline_skepticism=turn.baseline,
     )
 
-    # persist back
-    record["payload"]["messages"] = transcript
-    record["payload"]["state"] = new_state.__dict__
-    transcript_service.save_transcript(record["payload"])  # re-save same session id
+    # persist back: append this turn to the session log (no full rewrite)
+    new_token = encode_state(new_state, turn.session_id)
+    await STORAGE.append_turn(
+        turn.session_id,
+        transcript[-2:],
+        state=new_state.to_dict(),
+        state_token=new_token,
+    )
+    turn.prompt_builder.add(transcript[-2])
+    turn.prompt_builder.add(transcript[-1])
+    # like the prompt builder, the live evaluator only sees turns that were stored
+    evaluator = evaluation.get_evaluator(turn.session_id)
+    if evaluator:
+        evaluator.add_turn(transcript[-2])
+        evaluator.add_turn(transcript[-1])
 
     return {
-        "state": new_state.__dict__,
+        "state": new_state.to_dict(),
+        "state_token": new_token,
         "doctor_reply": llm_json.get("doctorReply"),
         "signals": llm_json.get("signals", []),
         "relevancy": llm_json.get("relevancy", 0),
@@ -194,9 +283,57 @@ async def process_turn(payload: TurnIn):
         "trust": new_state.trust,
         "time_pressure": new_state.time_pressure_level,
         "transcript": transcript,
+        "prompt_stats": turn.prompt_builder.last_stats,
     }
 
 
+@router.post("/conversation/turn")
+async def process_turn(payload: TurnIn):
+    turn = await _begin_turn(payload)
+    # process-wide AsyncOpenAI client: the event loop keeps serving while the model answers
+    try:
+        completion = await OPENAI_HTTP.openai.chat.completions.create(**turn.completion_args())
+    except openai.APIError as exc:
+        raise HTTPException(status_code=502, detail=f"Doctor reply failed: {type(exc).__name__}: {exc}")
+    return await _finish_turn(turn, turn.parse(completion.choices[0].message.content))
+
+
+@router.post("/conversation/turn/stream")
+async def process_turn_stream(payload: TurnIn):
+    """
+    Same turn as /conversation/turn as server-sent events: "reply" events carry
+    the doctor's reply text as it is generated ({"delta": "..."}), then one
+    "turn" event carries the full /conversation/turn response once the model's
+    JSON is complete. An upstream failure before the first byte is a 502;
+    failures after the stream has started arrive as an "error" event.
+    """
+    turn = await _begin_turn(payload)
+    try:
+        stream = await OPENAI_HTTP.openai.chat.completions.create(**turn.completion_args(), stream=True)
+    except openai.APIError as exc:
+        raise HTTPException(status_code=502, detail=f"Doctor reply failed: {type(exc).__name__}: {exc}")
+
+    async def events():
+        reply = JsonStringFieldStream("doctorReply")
+        content = []
+        try:
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    content.append(delta)
+                    text = reply.feed(delta)
+                    if text:
+                        yield sse("reply", {"delta": text})
+            yield sse("turn", await _finish_turn(turn, turn.parse("".join(content))))
+        except Exception as exc:
+            yield sse("error", {"detail": f"{type(exc).__name__}: {exc}"})
+        finally:
+            await stream.close()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 class EndConversationIn(BaseModel):
     session_id: str
     persona_id: str
@@ -204,19 +341,41 @@ class EndConversationIn(BaseModel):
 
 @router.post("/conversation/end")
 async def end_conversation(payload: EndConversationIn):
-    # For now, just load transcript and return simple evaluation stub
-    from app.services.evaluation import evaluate_conversation
-    record = transcript_service.load_transcript(payload.session_id)
-    if record is None:
-        raise HTTPException(status_code=404, detail="Session not found")
-
-    # Map to simple transcript shape expected by evaluator
-    simple = [
-        {"role": ("user" if m["role"] == "rep" else "doctor"), "content": m["content"]}
-        for m in record["payload"].get("messages", [])
-    ]
-    result = evaluate_conversation(simple, payload.persona_id)
-    return {"session_id": payload.session_id, "evaluation": result}
+    _checked_session_id(payload.session_id, 404)
+    close_prompt_builder(payload.session_id)
+    await STORAGE.compact(payload.session_id)
+    evaluator = evaluation.close_evaluator(payload.session_id)
+    if evaluator is not None:
+        # turns were evaluated as they arrived; finalizing does not re-read the transcript
+        result = evaluator.finalize()
+    else:
+        # no live evaluator (e.g. worker restarted): evaluate the stored transcript in one pass
+        record = await STORAGE.load_transcript(payload.session_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        stored = record["payload"]
+        # on the evaluation workers, so a burst of session ends never stalls the event loop
+        try:
+            result = await jobs.EVALUATION_QUEUE.run(
+                "combined",
+                stored.get("messages", []),
+                payload.persona_id,
+                stored.get("must_say"),
+                stored.get("must_not_say"),
+                session_id=payload.session_id,
+            )
+        except jobs.QueueFullError as exc:
+            raise HTTPException(status_code=503, detail=str(exc))
+    return {"session_id": payload.session_id, "evaluation": result["classic"], "structured": result["structured"]}
+
+
+@router.get("/conversation/{session_id}/evaluation")
+async def conversation_evaluation_snapshot(session_id: str):
+    """Live evaluation of an ongoing conversation (classic + structured views)."""
+    evaluator = evaluation.get_evaluator(session_id)
+    if evaluator is None:
+        raise HTTPException(status_code=404, detail="No live evaluation for this session")
+    return {"session_id": session_id, **evaluator.snapshot()}
 
 
 # ===== Tone decision API (heuristic controller) =====
@@ -1,21 +1,48 @@
 # backend/app/main.py
+import asyncio
 import os
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
+import json
 from dotenv import load_dotenv
-from app.models.doctor_persona import PERSONAS
-import httpx 
-from app.services.evaluation import evaluate_conversation, evaluate_conversation_structured
-from pydantic import BaseModel
-from typing import Optional
 
-load_dotenv()  # reads .env
+load_dotenv()  # reads .env; before the app imports below, which read their settings at import time
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.middleware.cors import CORSMiddleware
+from app.api import routes
+from app.models.doctor_persona import PERSONA_REGISTRY
+from app.services.jobs import EVALUATION_QUEUE, QueueFullError
+from app.services import evaluation, transcript_service, turn_analysis
+from app.services.http_client import OPENAI_HTTP
+from app.services.retention import RETENTION_SWEEPER
+from app.services.search_index import SearchQueryError
+from app.services.storage import STORAGE
+from app.services.token_pool import OPENAI_REALTIME_MODEL, OPENAI_REALTIME_VOICE, SESSION_TOKENS, SessionMintError
+from app.services.tone import decide_tone, tone_trajectory, coerce_tone_state, open_tone_session, close_tone_session
+from pydantic import BaseModel
+from typing import List, Optional
 
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     raise RuntimeError("OPENAI_API_KEY missing. Copy .env.example -> .env and set key.")
 
-app = FastAPI(title="MedRep Coach - Backend")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    STORAGE.start()
+    RETENTION_SWEEPER.start()
+    OPENAI_HTTP.start()
+    SESSION_TOKENS.start()
+    yield
+    await SESSION_TOKENS.close()
+    await OPENAI_HTTP.close()
+    await RETENTION_SWEEPER.close()
+    await STORAGE.close()  # write-behind buffer reaches the disk before exit
+    # queued evaluations finish and their results are persisted (blocking join, so off the loop)
+    await asyncio.get_running_loop().run_in_executor(None, EVALUATION_QUEUE.shutdown)
+
+
+app = FastAPI(title="MedRep Coach - Backend", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,66 +60,151 @@ class VoiceEvaluationRequest(BaseModel):
     must_say: Optional[list[str]] = []
     must_not_say: Optional[list[str]] = []
 
+async def _run_evaluation(kind: str, req: VoiceEvaluationRequest):
+    # CPU work runs on the evaluation workers, never on the event loop
+    try:
+        return await EVALUATION_QUEUE.run(kind, req.transcript, req.persona_id, req.must_say, req.must_not_say)
+    except QueueFullError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+
+
 @app.post("/api/voice/evaluate")
 async def evaluate_voice_session(req: VoiceEvaluationRequest):
     """Evaluate a voice session with comprehensive feedback."""
-    result = evaluate_conversation(req.transcript, req.persona_id, req.must_say, req.must_not_say)
-    return result
+    return await _run_evaluation("classic", req)
 
 
 @app.post("/api/voice/evaluate2")
 async def evaluate_voice_session_v2(req: VoiceEvaluationRequest):
     """Structured evaluator returning summary, scores, highlights, actions, violations."""
-    result = evaluate_conversation_structured(req.transcript, req.persona_id, req.must_say, req.must_not_say)
-    return result
+    return await _run_evaluation("structured", req)
+
+
+@app.post("/api/voice/evaluate-combined")
+async def evaluate_voice_session_combined(req: VoiceEvaluationRequest):
+    """Both evaluations ({"classic": ..., "structured": ...}) from one shared analysis pass."""
+    return await _run_evaluation("combined", req)
+
+
+@app.post("/api/voice/evaluate-llm")
+async def evaluate_voice_session_llm(req: VoiceEvaluationRequest):
+    """Classic evaluation with LLM-written per-turn critique (heuristic fallback past the deadline)."""
+    result = await _run_evaluation("classic", req)
+    persona = PERSONA_REGISTRY.get(req.persona_id)
+    if "error" in result or not persona:
+        return result
+    analysis = await turn_analysis.analyze_turns(req.transcript, persona)
+    # cached results are shared, so build a new dict rather than mutating it
+    return {
+        **result,
+        "turnLevelAnalysis": [turn_analysis.feedback_row(tf) for tf in analysis["turns"]],
+        "turnAnalysis": {"llm": analysis["llm"], "fallback": analysis["fallback"], "errors": analysis["errors"]},
+    }
+
+
+@app.get("/api/voice/evaluate/stats")
+async def evaluation_stats():
+    """Evaluation queue depth, result-cache hit/miss/eviction counters and live per-session evaluators."""
+    return {**EVALUATION_QUEUE.stats(), "live_evaluators": evaluation.EVALUATORS.stats()}
 
 @app.get("/api/personas")
-async def list_personas():
-    """Return the full list of doctor personas."""
-    return PERSONAS
+async def list_personas(field: Optional[str] = None, value: Optional[str] = None):
+    """
+    Return the doctor personas, optionally only those whose indexed `field`
+    (e.g. specialty, skepticism_level, or "tag") equals `value`.
+    """
+    if field and value is not None:
+        return [p.to_dict() for p in PERSONA_REGISTRY.by_tag(field, value)]
+    return [p.to_dict() for p in PERSONA_REGISTRY.all()]
+
+
+@app.get("/api/personas-registry")
+async def persona_registry_stats():
+    """Registry version stamp, persona count and last reload error (if any)."""
+    return PERSONA_REGISTRY.stats()
 
 
 @app.get("/api/personas/{persona_id}")
 async def get_persona(persona_id: str):
     """Return a single doctor persona by ID."""
-    for p in PERSONAS:
-        if p["id"] == persona_id:
-            return p
+    persona = PERSONA_REGISTRY.get(persona_id)
+    if persona:
+        return persona.to_dict()
     raise HTTPException(status_code=404, detail="Persona not found")
 
+@app.get("/api/sessions")
+async def find_sessions(persona_id: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+                        min_score: Optional[float] = None, max_score: Optional[float] = None, limit: int = 100):
+    """Stored sessions filtered by persona, start time (ISO, [since, until)) and evaluation score."""
+    db = transcript_service.database()
+    if db is None:
+        raise HTTPException(status_code=501, detail="Session queries need TRANSCRIPT_BACKEND=sqlite")
+    return await STORAGE.run(db.find_sessions, persona_id, since, until, min_score, max_score, min(limit, 1000))
+
+
+@app.get("/api/sessions/per-day")
+async def sessions_per_day(since: Optional[str] = None, until: Optional[str] = None):
+    """Session counts and average score per persona per day."""
+    db = transcript_service.database()
+    if db is None:
+        raise HTTPException(status_code=501, detail="Session queries need TRANSCRIPT_BACKEND=sqlite")
+    return await STORAGE.run(db.sessions_per_persona_per_day, since, until)
+
+
+@app.get("/api/search")
+async def search_transcripts(q: List[str] = Query(...), role: Optional[str] = None, since: Optional[str] = None,
+                             until: Optional[str] = None, persona_id: Optional[str] = None,
+                             group: str = "turns", limit: int = 100):
+    """
+    Turns (or sessions, with group=sessions) containing any of the phrases in q,
+    e.g. /api/search?q=revolutionary&q=no+side+effects&role=rep&since=2026-10-01
+    """
+    index = transcript_service.search_index()
+    if index is None:
+        raise HTTPException(status_code=501, detail="Search is disabled (TRANSCRIPT_SEARCH=off)")
+    query = index.sessions if group == "sessions" else index.search
+    try:
+        return await STORAGE.run(query, q, role, since, until, persona_id, min(limit, 1000))
+    except SearchQueryError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.get("/api/storage/stats")
+async def storage_stats():
+    """Write-behind queue depth, coalesced saves, flush latency, hot-session cache, retention, archive and search."""
+    stats = STORAGE.stats()
+    stats["retention"] = RETENTION_SWEEPER.stats()
+    stats["archive"] = await STORAGE.run(transcript_service.archive().stats)
+    if transcript_service.search_index() is not None:
+        stats["search"] = await STORAGE.run(transcript_service.search_index().stats)
+    if transcript_service.database() is None:
+        stats["manifest"] = await STORAGE.run(transcript_service.manifest().stats)
+    return stats
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
 
 
 @app.get("/session-token")
-async def session_token():
+async def session_token(voice: Optional[str] = None, model: Optional[str] = None):
     """
     Create a short-lived Realtime session with OpenAI. The returned JSON
     contains ephemeral session / client_secret data the frontend will use.
     This server endpoint MUST be protected by your server-side OPENAI_API_KEY.
+    Served from the pre-minted pool when it is enabled (see token_pool.py).
     """
-    url = "https://api.openai.com/v1/realtime/sessions"
-    headers = {
-        "Authorization": f"Bearer {OPENAI_API_KEY}",
-        "Content-Type": "application/json",
-    }
-    # minimal payload - adjust model or voice settings as needed
-    payload = {
-        "model": "gpt-4o-realtime-preview",
-        "voice": os.environ.get("OPENAI_REALTIME_VOICE", "verse"),
-    }
-    async with httpx.AsyncClient(timeout=10.0, verify=False) as client:
-        resp = await client.post(url, headers=headers, json=payload)
-
-    # async with httpx.AsyncClient(timeout=10.0) as client:
-    #     resp = await client.post(url, headers=headers, json=payload)
+    try:
+        # Return the session JSON (contains ephemeral token/params). Frontend will read what's needed.
+        return await SESSION_TOKENS.get(model or OPENAI_REALTIME_MODEL, voice or OPENAI_REALTIME_VOICE)
+    except SessionMintError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc))
 
-    if resp.status_code >= 400:
-        raise HTTPException(status_code=500, detail=f"OpenAI session creation failed: {resp.text}")
 
-    # Return the session JSON (contains ephemeral token/params). Frontend will read what's needed.
-    return resp.json()
+@app.get("/api/session-tokens/stats")
+async def session_token_stats():
+    """Pool hit rate, time-to-token percentiles and ready sessions per configuration."""
+    return SESSION_TOKENS.stats()
 
 
 # ===== Tone decision API (voice-only helper) =====
@@ -138,118 +250,72 @@ async def tone_decide(payload: ToneDecideIn):
     Enhanced tone decision for realistic busy doctor behavior.
     Returns mood, timePressure, skepticism, action, pauseReply, and cutNow flag.
     """
-    # Extract state
-    mood = payload.current_state.mood
-    time_pressure = payload.current_state.timePressure
-    skepticism = payload.current_state.skepticism
-    patience = payload.current_state.patience
-    engagement = payload.current_state.engagement
-    hype_count = payload.current_state.hypeCount
-    evidence_count = payload.current_state.evidenceCount
-    monologue_count = payload.current_state.monologueCount
-    
-    # Analyze MR's last message
-    mr_lower = (payload.last_mr or "").lower()
-    
-    # Hard stop triggers (cutNow = True)
-    cut_now = False
-    if hype_count >= 3:  # 3+ hype phrases
-        cut_now = True
-    elif monologue_count >= 2 and time_pressure >= 4:  # 2+ long monologues under pressure
-        cut_now = True
-    elif patience <= 1 and any(word in mr_lower for word in ["best", "revolutionary", "amazing"]):
-        cut_now = True
-    
-    # Evidence recognition (immediate engagement boost) - flexible medical criteria
-    evidence_patterns = [
-        # Statistical evidence
-        "n=", "p=", "p-value", "confidence interval", "ci", "hazard ratio", "hr", "odds ratio", "or",
-        # Clinical endpoints
-        "primary endpoint", "secondary endpoint", "efficacy", "response rate", "remission rate", 
-        "progression-free survival", "pfs", "overall survival", "os", "disease-free survival", "dfs",
-        # Trial design
-        "randomized", "rct", "double-blind", "placebo-controlled", "phase", "multicenter",
-        # Safety data
-        "adverse events", "ae", "serious adverse events", "sae", "toxicity", "safety profile",
-        # Biomarkers
-        "biomarker", "genetic", "mutation", "expression", "receptor", "pathway",
-        # Real-world evidence
-        "real-world", "registry", "observational", "post-marketing", "surveillance",
-        # Guidelines/standards
-        "guidelines", "consensus", "recommendation", "standard of care", "treatment algorithm"
-    ]
-    
-    if any(pattern in mr_lower for pattern in evidence_patterns):
-        evidence_count += 1
-        mood = "Engaged"
-        time_pressure = max(1, time_pressure - 2)  # Reduce pressure significantly
-        skepticism = max(1, skepticism - 1)
-        engagement = min(10, engagement + 2)
-        action = "Good. Now tell me about the clinical significance and practical implications."
-        pause_reply = False
-    else:
-        # Hype detection (patience drain)
-        if any(word in mr_lower for word in ["best", "revolutionary", "amazing", "unbelievable", "game-changing"]):
-            hype_count += 1
-            patience = max(0, patience - 2)
-            mood = "Dismissive"
-            time_pressure = min(5, time_pressure + 1)
-            skepticism = min(5, skepticism + 1)
-            engagement = max(1, engagement - 1)
-            action = "I need specifics, not marketing. What's the actual data?"
-            pause_reply = False
-        
-        # Monologue detection (time pressure increase)
-        elif len((payload.last_mr or "").split()) > 25:  # Long message
-            monologue_count += 1
-            patience = max(0, patience - 1)
-            mood = "Dismissive"
-            time_pressure = min(5, time_pressure + 1)
-            action = "I need the key points, not a presentation. Bottom line?"
-            pause_reply = False
-        
-        # Repetition detection
-        elif any(phrase in mr_lower for phrase in ["as i said", "like i mentioned", "again", "repeating"]):
-            patience = max(0, patience - 1)
-            mood = "Dismissive"
-            time_pressure = min(5, time_pressure + 1)
-            action = "I heard you the first time. What else do you have?"
-            pause_reply = False
-        
-        # Default busy behavior
-        else:
-            if time_pressure >= 4:
-                mood = "Dismissive"
-                action = "I have patients waiting. What's the key point?"
-                pause_reply = True
-            else:
-                mood = "Neutral"
-                action = "Continue, but be concise."
-                pause_reply = False
-    
-    # Generate ending phrases for cutNow
-    if cut_now:
-        ending_phrases = [
-            "I'm ending this call. Send me the data sheet.",
-            "I don't have time for this. Email me the trial results.",
-            "I have patients waiting. This conversation is over.",
-            "Send me the evidence, not the sales pitch. Goodbye."
-        ]
-        action = ending_phrases[hype_count % len(ending_phrases)]
-        mood = "Dismissive"
-        time_pressure = 5
-        patience = 0
-    
-    return ToneDecisionOut(
-        mood=mood,
-        timePressure=time_pressure,
-        skepticism=skepticism,
-        action=action,
-        pauseReply=pause_reply,
-        cutNow=cut_now,
-        patience=patience,
-        engagement=engagement,
-        hypeCount=hype_count,
-        evidenceCount=evidence_count,
-        monologueCount=monologue_count
-    )
+    return ToneDecisionOut(**decide_tone(payload.current_state.dict(), payload.last_doctor, payload.last_mr))
+
+
+class ToneTrajectoryIn(BaseModel):
+    transcript: list[dict]
+    initial_state: Optional[ToneStateIn] = None
+
+
+@app.post("/api/tone-trajectory")
+async def tone_trajectory_endpoint(payload: ToneTrajectoryIn):
+    """
+    Replay a full transcript through the tone rules in one server-side pass.
+    Returns one state point per doctor turn (same fields as /api/tone-decide plus turn_index).
+    """
+    initial = payload.initial_state.dict() if payload.initial_state else {}
+    try:
+        trajectory = tone_trajectory(payload.transcript, initial)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return {"initial_state": coerce_tone_state(initial), "trajectory": trajectory}
+
+
+@app.websocket("/ws/tone/{session_id}")
+async def tone_channel(websocket: WebSocket, session_id: str):
+    """
+    Persistent tone-control channel. The server holds the doctor's tone state;
+    the client streams utterance events and receives compact decision deltas.
+
+    Client -> server:
+      {"type": "init", "state": {...}}                  optional seed (partial ok)
+      {"type": "rep", "text": "..."}                    MR utterance
+      {"type": "doctor", "text": "...", "set": {...}}   doctor utterance -> decision;
+                                                        `set` carries local tone tweaks
+    Server -> client:
+      {"type": "state", "state": {...}}                 full state after init
+      {"type": "decision", "seq": n, "action": "...", "state": {changed fields},
+       "pauseReply": true, "cutNow": true}              flags only when set
+      {"type": "error", "detail": "..."}
+    """
+    await websocket.accept()
+    session = open_tone_session(session_id)
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            try:
+                event = json.loads(raw)
+                kind = event.get("type")
+                if kind == "init":
+                    session.update(event.get("state") or {})
+                    await websocket.send_json({"type": "state", "state": session.state})
+                elif kind == "rep":
+                    session.add_rep(str(event.get("text") or ""))
+                elif kind == "doctor":
+                    if event.get("set"):
+                        session.update(event["set"])
+                    await websocket.send_json(session.add_doctor(str(event.get("text") or "")))
+                else:
+                    await websocket.send_json({"type": "error", "detail": f"Unknown event type: {kind!r}"})
+            except (ValueError, TypeError, AttributeError) as exc:
+                await websocket.send_json({"type": "error", "detail": str(exc)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        close_tone_session(session)
+
+
+# Conversation lifecycle, transcripts and background evaluation (app/api/routes.py).
+# Included last so the /api/personas and /api/tone-decide handlers above keep precedence.
+app.include_router(routes.router, prefix="/api")
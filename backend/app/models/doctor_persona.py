@@ -1,173 +1,246 @@
 # backend/app/models/doctor_persona.py
 
-# Full set of 8 doctor personas
-PERSONAS = [
-    {
-        "id": "doc_001",
-        "description": "Dr. Arvind Mehta — Analytical, publication-driven, skeptical of commercial pitches",
-        "communication_style": "Precise and formal",
-        "decision_factors": ["Meta-analyses", "Real-world evidence", "Guideline inclusion"],
-        "skepticism_level": "High",
-        "behavioral_triggers": {
-            "positive": ["References to peer-reviewed journals", "Comparative outcome data"],
-            "negative": ["Unverified claims", "Overuse of adjectives like 'best' or 'revolutionary'"]
-        },
-        "knowledge_level": "Thought Leader",
-        "consultation_style": "Data-driven",
-        "typical_objections": [
-            "What’s the p-value and confidence interval?",
-            "Is it published in a top-tier journal?",
-            "How does it compare to the current gold standard?"
-        ],
-        "preferred_evidence": ["Meta-analysis", "Randomized Controlled Trials (RCTs)"],
-        "gender": "Male",
-        "availableTimeSeconds": 180
-    },
-    {
-        "id": "doc_002",
-        "description": "Dr. Shalini Rao — Practical and busy, prefers direct communication",
-        "communication_style": "Curt but professional",
-        "decision_factors": ["Ease of use", "Insurance coverage", "Patient compliance"],
-        "skepticism_level": "Medium",
-        "behavioral_triggers": {
-            "positive": ["Clear patient benefits", "Quick summaries"],
-            "negative": ["Overly technical explanations", "Ambiguous outcomes"]
-        },
-        "knowledge_level": "Generalist",
-        "consultation_style": "Fast-paced",
-        "typical_objections": [
-            "Just give me the bottom line.",
-            "Is it covered by insurance?",
-            "How easy is it for patients to take?"
-        ],
-        "preferred_evidence": ["Real-world usage data", "Case studies"],
-        "gender": "Female",
-        "availableTimeSeconds": 120
-    },
-    {
-        "id": "doc_003",
-        "description": "Dr. Anuja Nair — Patient-first, emotionally intuitive, avoids overly complex treatments",
-        "communication_style": "Warm and inquisitive",
-        "decision_factors": ["Child safety", "Parental compliance", "Side effect profile"],
-        "skepticism_level": "Low",
-        "behavioral_triggers": {
-            "positive": ["Stories about improved quality of life", "Child-friendly formulations"],
-            "negative": ["Complex dosing schedules", "Poor taste in oral meds"]
-        },
-        "knowledge_level": "Specialist",
-        "consultation_style": "Empathetic",
-        "typical_objections": [
-            "Is this safe for long-term use in children?",
-            "Are there any behavioral side effects?",
-            "How easy is it for parents to administer?"
-        ],
-        "preferred_evidence": ["Safety data", "Pediatric trial results"],
-        "gender": "Female",
-        "availableTimeSeconds": 150
-    },
-    {
-        "id": "doc_004",
-        "description": "Dr. Rajesh Pillai — Experience-led, believes in intuition, not fond of pharma buzzwords",
-        "communication_style": "Blunt and experience-oriented",
-        "decision_factors": ["Hands-on results", "Practicality", "Ease in surgical settings"],
-        "skepticism_level": "Medium",
-        "behavioral_triggers": {
-            "positive": ["Clinical anecdotes", "Support from surgical peers"],
-            "negative": ["Theoretical mechanisms", "Marketing-heavy presentations"]
-        },
-        "knowledge_level": "Specialist",
-        "consultation_style": "Intuitive",
-        "typical_objections": [
-            "I’ve seen better results with my current method.",
-            "Don’t quote studies—tell me what you’ve seen in real practice.",
-            "Does this make my job easier?"
-        ],
-        "preferred_evidence": ["Anecdotal reports", "Post-market clinical usage"],
-        "gender": "Male",
-        "availableTimeSeconds": 200
-    },
-    {
-        "id": "doc_005",
-        "description": "Dr. Manoj Verma — Pragmatic, distrustful of big pharma, relies on experience and local practice",
-        "communication_style": "Casual and straightforward",
-        "decision_factors": ["Cost-effectiveness", "Patient adherence", "Local availability"],
-        "skepticism_level": "High",
-        "behavioral_triggers": {
-            "positive": ["Affordable options", "Proven track record locally"],
-            "negative": ["Expensive treatments", "Complex protocols"]
-        },
-        "knowledge_level": "Generalist",
-        "consultation_style": "Intuitive",
-        "typical_objections": [
-            "My patients can’t afford this.",
-            "We don’t have the facilities to monitor closely.",
-            "Is there a simpler option?"
-        ],
-        "preferred_evidence": ["Practical case reports", "Cost-benefit analyses"],
-        "gender": "Male",
-        "availableTimeSeconds": 160
-    },
-    {
-        "id": "doc_006",
-        "description": "Dr. Ritu Sharma — Enthusiastic, eager to learn, open to new technologies and innovations",
-        "communication_style": "Energetic and inquisitive",
-        "decision_factors": ["Innovative mechanisms", "Learning opportunities", "Clinical trials"],
-        "skepticism_level": "Low",
-        "behavioral_triggers": {
-            "positive": ["New tech", "Cutting-edge research"],
-            "negative": ["Outdated methods", "Lack of scientific backing"]
-        },
-        "knowledge_level": "Generalist",
-        "consultation_style": "Detailed",
-        "typical_objections": [
-            "How does this work mechanistically?",
-            "Are there ongoing trials?",
-            "What training is required?"
-        ],
-        "preferred_evidence": ["Clinical trial data", "Innovative case studies"],
-        "gender": "Female",
-        "availableTimeSeconds": 140
-    },
-    {
-        "id": "doc_007",
-        "description": "Dr. Sameer Kulkarni — Open to new treatments, trusts pharma reps with good data, collaborative",
-        "communication_style": "Friendly and conversational",
-        "decision_factors": ["Peer recommendations", "Safety profiles", "Patient feedback"],
-        "skepticism_level": "Medium",
-        "behavioral_triggers": {
-            "positive": ["Reputable pharma backing", "Positive patient stories"],
-            "negative": ["Lack of follow-up", "Over-promising claims"]
-        },
-        "knowledge_level": "Specialist",
-        "consultation_style": "Empathetic",
-        "typical_objections": [
-            "Have other doctors had success?",
-            "What’s the patient satisfaction?",
-            "Are there any long-term risks?"
-        ],
-        "preferred_evidence": ["Post-market surveillance", "Physician testimonials"],
-        "gender": "Male",
-        "availableTimeSeconds": 170
-    },
-    {
-        "id": "doc_008",
-        "description": "Dr. Neelima Iyer — Experienced, cautious about adopting new treatments, values time-tested protocols",
-        "communication_style": "Formal and reserved",
-        "decision_factors": ["Established guidelines", "Long-term outcomes", "Risk minimization"],
-        "skepticism_level": "High",
-        "behavioral_triggers": {
-            "positive": ["Longitudinal studies", "Consensus guidelines"],
-            "negative": ["Novelty without evidence", "Short-term pilot studies"]
-        },
-        "knowledge_level": "Thought Leader",
-        "consultation_style": "Detailed",
-        "typical_objections": [
-            "Is this supported by the latest guidelines?",
-            "What about risks in elderly patients?",
-            "How does this compare long-term?"
-        ],
-        "preferred_evidence": ["Guideline endorsements", "Long-term cohort studies"],
-        "gender": "Female",
-        "availableTimeSeconds": 190
-    },
-]
+import hashlib
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import yaml
+
+# ===================== Configuration =====================
+
+# Every *.yaml / *.yml file here is loaded (a list of personas or {"personas": [...]})
+PERSONA_DIR = os.environ.get("PERSONA_DIR", os.path.join(os.path.dirname(__file__), "personas"))
+# How often (seconds) lookups check the directory for changes; 0 disables hot reload
+PERSONA_RELOAD_INTERVAL = float(os.environ.get("PERSONA_RELOAD_INTERVAL", "2.0"))
+
+REQUIRED_FIELDS = (
+    "id", "description", "communication_style", "decision_factors", "skepticism_level",
+    "behavioral_triggers", "knowledge_level", "consultation_style", "typical_objections",
+    "preferred_evidence", "availableTimeSeconds",
+)
+OPTIONAL_FIELDS = ("gender", "specialty", "therapeutic_area", "tags")
+
+# Fields indexed for PersonaRegistry.by_tag(field, value); free-form labels go in "tags"
+INDEXED_FIELDS = ("specialty", "therapeutic_area", "skepticism_level", "knowledge_level", "consultation_style", "gender")
+
+
+class PersonaLoadError(ValueError):
+    """Raised when persona files cannot be parsed or validated."""
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+# ===================== Persona =====================
+
+class Persona:
+    """
+    Immutable doctor persona. Supports read-only mapping access (persona["id"],
+    persona.get("gender")) so prompt and evaluation code can treat it like the
+    dicts it replaces; to_dict() gives a JSON-ready copy.
+    """
+
+    __slots__ = REQUIRED_FIELDS + OPTIONAL_FIELDS + ("extra", "version", "_keys")
+
+    def __init__(self, data: Mapping[str, Any]):
+        missing = [f for f in REQUIRED_FIELDS if f not in data]
+        if missing:
+            raise PersonaLoadError(f"Persona {data.get('id', '?')!r} is missing {', '.join(missing)}")
+        set_ = object.__setattr__
+        for name in REQUIRED_FIELDS + OPTIONAL_FIELDS:
+            set_(self, name, _freeze(data.get(name)))
+        set_(self, "extra", _freeze({k: v for k, v in data.items() if k not in self.__slots__}))
+        set_(self, "_keys", tuple(data.keys()))
+        canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+        set_(self, "version", hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12])
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Persona is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("Persona is immutable")
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._keys:
+            raise KeyError(key)
+        return self.extra[key] if key in self.extra else getattr(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self._keys else default
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._keys
+
+    def tag_values(self) -> Iterator[Tuple[str, str]]:
+        """(field, value) pairs this persona is indexed under."""
+        for name in INDEXED_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                yield name, str(value).lower()
+        for tag in self.tags or ():
+            yield "tag", str(tag).lower()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: _thaw(self[key]) for key in self._keys}
+
+    def __repr__(self) -> str:
+        return f"Persona({self.id!r}, version={self.version!r})"
+
+
+# ===================== Registry =====================
+
+class _Snapshot:
+    """One consistent, never-mutated view of every loaded persona."""
+
+    __slots__ = ("version", "signature", "loaded_at", "personas", "by_id", "by_tag")
+
+    def __init__(self, version: int, signature: tuple, personas: Tuple[Persona, ...]):
+        self.version = version
+        self.signature = signature
+        self.loaded_at = time.time()
+        self.personas = personas
+        self.by_id: Mapping[str, Persona] = MappingProxyType({p.id: p for p in personas})
+        by_tag: Dict[Tuple[str, str], List[Persona]] = {}
+        for persona in personas:
+            for key in persona.tag_values():
+                by_tag.setdefault(key, []).append(persona)
+        self.by_tag: Mapping[Tuple[str, str], Tuple[Persona, ...]] = MappingProxyType(
+            {key: tuple(group) for key, group in by_tag.items()}
+        )
+
+
+class PersonaRegistry:
+    """
+    Personas loaded from YAML, with O(1) lookup by id and by indexed field/tag.
+
+    Reloads swap in a complete new snapshot in one assignment, so readers never
+    see a half-loaded set; a reload that fails validation keeps the previous
+    snapshot. Lookups check the directory for changes at most every
+    `reload_interval` seconds (file name, size and mtime; no parsing).
+    """
+
+    def __init__(self, directory: str = PERSONA_DIR, reload_interval: float = PERSONA_RELOAD_INTERVAL):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        self._snapshot = _Snapshot(0, (), ())
+        self.reload()
+
+    def _files(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.endswith((".yaml", ".yml"))
+        )
+
+    def _signature(self) -> tuple:
+        signature = []
+        for path in self._files():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue  # removed between listdir and stat
+            signature.append((os.path.basename(path), st.st_size, st.st_mtime_ns))
+        return tuple(signature)
+
+    def _load(self) -> Tuple[Persona, ...]:
+        personas: List[Persona] = []
+        seen: Dict[str, str] = {}
+        for path in self._files():
+            try:
+                with open(path, "r", encoding="utf-8") as fh:
+                    doc = yaml.safe_load(fh) or []
+            except (OSError, yaml.YAMLError) as exc:
+                raise PersonaLoadError(f"{os.path.basename(path)}: {exc}")
+            entries = doc.get("personas", []) if isinstance(doc, dict) else doc
+            if not isinstance(entries, list):
+                raise PersonaLoadError(f"{os.path.basename(path)}: expected a list of personas")
+            for entry in entries:
+                if not isinstance(entry, dict):
+                    raise PersonaLoadError(f"{os.path.basename(path)}: persona entries must be mappings")
+                persona = Persona(entry)
+                if persona.id in seen:
+                    raise PersonaLoadError(f"Duplicate persona id {persona.id!r} in {os.path.basename(path)} and {seen[persona.id]}")
+                seen[persona.id] = os.path.basename(path)
+                personas.append(persona)
+        return tuple(personas)
+
+    def reload(self, force: bool = False) -> bool:
+        """Re-read the directory if it changed. Returns True if a new snapshot was installed."""
+        with self._lock:
+            signature = self._signature()
+            if not force and self._snapshot.version and signature == self._snapshot.signature:
+                return False
+            try:
+                personas = self._load()
+            except PersonaLoadError as exc:
+                self.last_error = str(exc)
+                raise
+            self._snapshot = _Snapshot(self._snapshot.version + 1, signature, personas)
+            self.last_error = None
+            return True
+
+    def _current(self) -> _Snapshot:
+        if self.reload_interval > 0 and time.monotonic() - self._checked_at >= self.reload_interval:
+            self._checked_at = time.monotonic()
+            try:
+                self.reload()
+            except PersonaLoadError:
+                pass  # keep serving the last good snapshot; see last_error
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self._current().version
+
+    def get(self, persona_id: str) -> Optional[Persona]:
+        return self._current().by_id.get(persona_id)
+
+    def by_tag(self, field: str, value: Any) -> Tuple[Persona, ...]:
+        """Personas whose indexed `field` (or free-form "tag") equals `value`, case-insensitively."""
+        return self._current().by_tag.get((field, str(value).lower()), ())
+
+    def all(self) -> Tuple[Persona, ...]:
+        return self._current().personas
+
+    def __len__(self) -> int:
+        return len(self._current().personas)
+
+    def __iter__(self) -> Iterator[Persona]:
+        return iter(self._current().personas)
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._current()
+        return {
+            "version": snapshot.version,
+            "loaded_at": snapshot.loaded_at,
+            "personas": len(snapshot.personas),
+            "files": len(snapshot.signature),
+            "last_error": self.last_error,
+        }
+
+
+PERSONA_REGISTRY = PersonaRegistry()
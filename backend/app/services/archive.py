@@ -0,0 +1,227 @@
+# backend/app/services/archive.py
+"""
+Compressed archive for closed sessions.
+
+Sessions are packed into immutable segment files, one per created-at day per
+archiving run ({archive_dir}/2026-05-01-3fa2c1d0.seg). Each record is the
+session JSON (plus its evaluation) compressed on its own with zlib, so one
+session is read with a single seek and a single decompression.
+
+Segment layout:
+    MAGIC                                   8 bytes
+    record blobs                            zlib(JSON), back to back
+    index: count x (key, offset, length, raw_length)   sorted by key
+    footer: (MAGIC, index_offset, count, index_crc32)
+
+key is blake2b(session_id, 16 bytes). Readers mmap the file and binary-search
+the index in place, so neither lookups nor full scans load a whole bundle into
+memory.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import uuid
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b"MRSEG01\n"
+_ENTRY = struct.Struct(">16sQII")   # key, offset, length, raw_length
+_FOOTER = struct.Struct(">8sQII")   # magic, index_offset, count, index crc32
+ARCHIVE_COMPRESSION_LEVEL = int(os.environ.get("ARCHIVE_COMPRESSION_LEVEL", "6"))
+
+
+class ArchiveFormatError(ValueError):
+    """Raised when a segment file is truncated or not a segment."""
+
+
+def session_key(session_id: str) -> bytes:
+    return hashlib.blake2b(session_id.encode("utf-8"), digest_size=16).digest()
+
+
+# ===================== Writing =====================
+
+def write_segment(path: str, records: Iterable[Dict[str, Any]], level: int = ARCHIVE_COMPRESSION_LEVEL) -> int:
+    """Write records ({"session_id", ...}) to a new segment at `path`. Returns the record count."""
+    entries: List[Tuple[bytes, int, int, int]] = []
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(MAGIC)
+        for record in records:
+            raw = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            blob = zlib.compress(raw, level)
+            entries.append((session_key(record["session_id"]), fh.tell(), len(blob), len(raw)))
+            fh.write(blob)
+        entries.sort()
+        index = b"".join(_ENTRY.pack(*entry) for entry in entries)
+        index_offset = fh.tell()
+        fh.write(index)
+        fh.write(_FOOTER.pack(MAGIC, index_offset, len(entries), zlib.crc32(index)))
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)  # a segment is either complete or absent
+    return len(entries)
+
+
+# ===================== Reading =====================
+
+class Segment:
+    """One memory-mapped segment file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        with open(path, "rb") as fh:
+            size = os.fstat(fh.fileno()).st_size
+            if size < len(MAGIC) + _FOOTER.size:
+                raise ArchiveFormatError(f"{self.name}: truncated")
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.index_offset, self.count, crc = _FOOTER.unpack_from(self._map, size - _FOOTER.size)
+        if magic != MAGIC or self._map[:len(MAGIC)] != MAGIC:
+            raise ArchiveFormatError(f"{self.name}: not an archive segment")
+        if self.index_offset + self.count * _ENTRY.size != size - _FOOTER.size:
+            raise ArchiveFormatError(f"{self.name}: bad index bounds")
+        self.crc = crc
+
+    def _entry(self, i: int) -> Tuple[bytes, int, int, int]:
+        return _ENTRY.unpack_from(self._map, self.index_offset + i * _ENTRY.size)
+
+    def find(self, session_id: str) -> Optional[Dict[str, Any]]:
+        key = session_key(session_id)
+        data, base, size = self._map, self.index_offset, _ENTRY.size
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            position = base + mid * size
+            if data[position:position + 16] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        # keys can repeat if a session was archived twice into one segment; take any match
+        while lo < self.count:
+            entry_key, offset, length, _ = self._entry(lo)
+            if entry_key != key:
+                return None
+            record = self._decode(offset, length)
+            if record.get("session_id") == session_id:
+                return record
+            lo += 1
+        return None
+
+    def _decode(self, offset: int, length: int) -> Dict[str, Any]:
+        return json.loads(zlib.decompress(self._map[offset:offset + length]))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Records in file order (sequential reads through the mapping)."""
+        for _, offset, length, _ in sorted((self._entry(i) for i in range(self.count)), key=lambda e: e[1]):
+            yield self._decode(offset, length)
+
+    def sizes(self) -> Tuple[int, int]:
+        """(compressed, raw) bytes of all records."""
+        compressed = raw = 0
+        for i in range(self.count):
+            _, _, length, raw_length = self._entry(i)
+            compressed += length
+            raw += raw_length
+        return compressed, raw
+
+    def verify(self) -> bool:
+        return zlib.crc32(self._map[self.index_offset:self.index_offset + self.count * _ENTRY.size]) == self.crc
+
+    def close(self) -> None:
+        self._map.close()
+
+
+class SessionArchive:
+    """
+    All segments in one directory. Lookups try the newest segments first; the
+    set of open segments is refreshed when the directory changes.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._segments: Dict[str, Segment] = {}
+        self._order: List[Segment] = []
+        self._signature: Optional[int] = None
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.found = 0
+
+    def _refresh(self) -> List[Segment]:
+        try:
+            signature = os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return []
+        with self._lock:
+            if signature != self._signature:
+                names = sorted(n for n in os.listdir(self.directory) if n.endswith(".seg"))
+                segments = {}
+                for name in names:
+                    segment = self._segments.get(name)
+                    if segment is None:
+                        try:
+                            segment = Segment(os.path.join(self.directory, name))
+                        except (OSError, ArchiveFormatError):
+                            continue
+                    segments[name] = segment
+                for name, segment in self._segments.items():
+                    if name not in segments:
+                        segment.close()
+                self._segments = segments
+                self._order = [segments[n] for n in reversed(names) if n in segments]
+                self._signature = signature
+            return self._order
+
+    def segments(self) -> List[Segment]:
+        """Open segments, newest first."""
+        return list(self._refresh())
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        self.lookups += 1
+        for segment in self._refresh():
+            record = segment.find(session_id)
+            if record is not None:
+                self.found += 1
+                return record
+        return None
+
+    def pack(self, records: Iterable[Dict[str, Any]]) -> List[str]:
+        """Write records into new segments, one per created-at day. Returns the segment paths."""
+        by_day: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            by_day.setdefault((record.get("created_at") or "unknown")[:10], []).append(record)
+        os.makedirs(self.directory, exist_ok=True)
+        paths = []
+        for day, group in sorted(by_day.items()):
+            path = os.path.join(self.directory, f"{day}-{uuid.uuid4().hex[:8]}.seg")
+            write_segment(path, group)
+            paths.append(path)
+        return paths
+
+    def iter_records(self, since_day: Optional[str] = None, until_day: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Every archived record, oldest segment first, optionally for days in [since_day, until_day)."""
+        for segment in reversed(self._refresh()):
+            day = segment.name[:10]
+            if (since_day and day < since_day) or (until_day and day >= until_day):
+                continue
+            yield from segment
+
+    def stats(self) -> Dict[str, Any]:
+        segments = self._refresh()
+        compressed = raw = sessions = 0
+        for segment in segments:
+            c, r = segment.sizes()
+            compressed, raw, sessions = compressed + c, raw + r, sessions + segment.count
+        return {
+            "directory": self.directory,
+            "segments": len(segments),
+            "sessions": sessions,
+            "compressed_bytes": compressed,
+            "raw_bytes": raw,
+            "ratio": round(raw / compressed, 2) if compressed else None,
+            "lookups": self.lookups,
+            "found": self.found,
+        }
@@ -0,0 +1,186 @@
+# backend/app/services/compliance.py
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+
+from app.services import lexicon
+
+# ===================== Configuration =====================
+
+# Compiled rule sets kept in memory, keyed by content hash
+COMPLIANCE_CACHE_SIZE = int(os.environ.get("COMPLIANCE_CACHE_SIZE", "128"))
+
+MUST_SAY = "must_say"
+MUST_NOT_SAY = "must_not_say"
+
+_WORD_CHAR = re.compile(r"\w")
+
+
+def _is_word(ch: str) -> bool:
+    return _WORD_CHAR.match(ch) is not None
+
+
+def rule_fingerprint(must_say: Iterable[str], must_not_say: Iterable[str],
+                     word_boundary: bool = False, case_sensitive: bool = False) -> str:
+    """Content hash of a rule set and its matching options."""
+    blob = json.dumps([list(must_say), list(must_not_say), word_boundary, case_sensitive], ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+# ===================== Compiled Rule Set =====================
+
+class ComplianceRuleSet:
+    """
+    Must-say / must-not-say phrases compiled into one multi-pattern matcher.
+
+    Every phrase is folded into a single trie-shaped regex that is tried at each
+    position of the text, so a scan costs one pass over the text no matter how
+    many phrases the set holds. Overlapping and nested hits are all reported
+    ("no side effects" also yields "no side" when both are rules).
+
+    Matching is substring and case-insensitive by default (same as the old
+    `phrase in text` checks); `word_boundary=True` only accepts whole-word hits
+    and `case_sensitive=True` disables case folding. Offsets always refer to the
+    original text.
+    """
+
+    def __init__(self, must_say: Optional[List[str]] = None, must_not_say: Optional[List[str]] = None,
+                 word_boundary: bool = False, case_sensitive: bool = False):
+        self.must_say = list(must_say or [])
+        self.must_not_say = list(must_not_say or [])
+        self.word_boundary = word_boundary
+        self.case_sensitive = case_sensitive
+        self.fingerprint = rule_fingerprint(self.must_say, self.must_not_say, word_boundary, case_sensitive)
+
+        self._kinds: Dict[str, FrozenSet[str]] = {}
+        for kind, phrases in ((MUST_SAY, self.must_say), (MUST_NOT_SAY, self.must_not_say)):
+            for phrase in phrases:
+                key = self.key(phrase)
+                self._kinds[key] = self._kinds.get(key, frozenset()) | {kind}
+        # "" is contained in any text, so it is satisfied without a hit
+        self.always: FrozenSet[str] = frozenset(k for k in self._kinds if not k)
+
+        keys = [k for k in self._kinds if k]
+        # At a given position the regex reports the longest rule only; shorter
+        # rules starting at the same position are necessarily its prefixes.
+        self._prefixes: Dict[str, List[str]] = {
+            k: [k[:i] for i in range(1, len(k)) if k[:i] in self._kinds] for k in keys
+        }
+        self._pattern = self._compile(keys)
+        self._folding_pattern: Optional["re.Pattern[str]"] = None
+
+    def key(self, phrase: str) -> str:
+        return phrase if self.case_sensitive else phrase.lower()
+
+    def _tail(self, key: str) -> str:
+        return r"(?!\w)" if self.word_boundary and _is_word(key[-1]) else ""
+
+    def _compile(self, keys: List[str], flags: int = 0) -> "re.Pattern[str]":
+        if not keys:
+            return re.compile(r"(?!)")
+        # Terms that start with a word character need a boundary before them;
+        # the two groups never share a first character, so they cannot compete.
+        led = {k: self._tail(k) for k in keys if self.word_boundary and _is_word(k[0])}
+        free = {k: self._tail(k) for k in keys if k not in led}
+        branches = []
+        if led:
+            branches.append(r"(?<!\w)" + lexicon.trie_pattern(led))
+        if free:
+            branches.append(lexicon.trie_pattern(free))
+        # zero-width lookahead so a hit is tried at every position (overlaps included)
+        return re.compile("(?=(" + "|".join(branches) + "))", flags)
+
+    def __len__(self) -> int:
+        return len(self._kinds)
+
+    def finditer(self, text: str) -> Iterator[Tuple[str, int, int]]:
+        """Yield (rule key, start, end) for every hit in `text`, overlaps included."""
+        haystack, pattern = text, self._pattern
+        if not self.case_sensitive:
+            haystack = text.lower()
+            if len(haystack) != len(text):
+                # lower() changed the length (e.g. "İ"): fold inside the regex to keep offsets
+                if self._folding_pattern is None:
+                    self._folding_pattern = self._compile([k for k in self._kinds if k], re.IGNORECASE)
+                haystack, pattern = text, self._folding_pattern
+        for m in pattern.finditer(haystack):
+            start = m.start()
+            matched = m.group(1)
+            key = self.key(matched)
+            if key not in self._kinds:
+                continue
+            for prefix in self._prefixes[key]:
+                end = start + len(prefix)
+                if self.word_boundary and _is_word(prefix[-1]) and end < len(haystack) and _is_word(haystack[end]):
+                    continue
+                yield prefix, start, end
+            yield key, start, start + len(matched)
+
+    def scan_turn(self, turn_index: int, text: str) -> List[Dict[str, Any]]:
+        """Every rule hit in one turn, with its turn index and character offsets."""
+        hits = []
+        for key, start, end in self.finditer(text):
+            for kind in sorted(self._kinds[key]):
+                hits.append({"rule": kind, "phrase": key, "turn_index": turn_index, "start": start, "end": end})
+        return hits
+
+    def scan(self, transcript: List[Dict[str, Any]]) -> "ComplianceReport":
+        report = ComplianceReport(self)
+        for turn_index, msg in enumerate(transcript):
+            report.add_turn(turn_index, msg.get("content") or msg.get("text") or "")
+        return report
+
+
+class ComplianceReport:
+    """Compliance hits accumulated turn by turn against one compiled rule set."""
+
+    __slots__ = ("rules", "hits", "found")
+
+    def __init__(self, rules: ComplianceRuleSet):
+        self.rules = rules
+        self.hits: List[Dict[str, Any]] = []
+        self.found: Set[str] = set(rules.always)
+
+    def add_turn(self, turn_index: int, text: str) -> List[Dict[str, Any]]:
+        hits = self.rules.scan_turn(turn_index, text)
+        self.hits.extend(hits)
+        self.found.update(hit["phrase"] for hit in hits)
+        return hits
+
+    def summary(self) -> Dict[str, List[str]]:
+        key, found = self.rules.key, self.found
+        return {
+            "mustSayMentioned": [phrase for phrase in self.rules.must_say if key(phrase) in found],
+            "mustSayMissed": [phrase for phrase in self.rules.must_say if key(phrase) not in found],
+            "mustNotSayViolations": [phrase for phrase in self.rules.must_not_say if key(phrase) in found],
+        }
+
+
+# ===================== Rule Set Cache =====================
+
+_RULE_SETS: "OrderedDict[str, ComplianceRuleSet]" = OrderedDict()
+_RULE_SETS_LOCK = threading.Lock()
+
+
+def compile_rules(must_say: Optional[List[str]] = None, must_not_say: Optional[List[str]] = None,
+                  word_boundary: bool = False, case_sensitive: bool = False) -> ComplianceRuleSet:
+    """Return the compiled rule set for these phrases, compiling it only on first use."""
+    must_say, must_not_say = list(must_say or []), list(must_not_say or [])
+    fingerprint = rule_fingerprint(must_say, must_not_say, word_boundary, case_sensitive)
+    with _RULE_SETS_LOCK:
+        rules = _RULE_SETS.get(fingerprint)
+        if rules is not None:
+            _RULE_SETS.move_to_end(fingerprint)
+            return rules
+    # compile outside the lock; a concurrent duplicate compile is harmless
+    rules = ComplianceRuleSet(must_say, must_not_say, word_boundary, case_sensitive)
+    with _RULE_SETS_LOCK:
+        _RULE_SETS[fingerprint] = rules
+        while len(_RULE_SETS) > COMPLIANCE_CACHE_SIZE:
+            _RULE_SETS.popitem(last=False)
+    return rules
@@ -0,0 +1,148 @@
+# backend/app/services/eval_cache.py
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from app.models.doctor_persona import PERSONA_REGISTRY
+from app.services import transcript_service
+from app.services.evaluation import EVALUATOR_VERSION, normalize_transcript
+
+# ===================== Configuration =====================
+
+# Memory tier budget, measured as serialized JSON size
+EVAL_CACHE_MAX_BYTES = int(os.environ.get("EVAL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Optional disk tier (survives restarts, shared by worker processes)
+EVAL_CACHE_DISK = os.environ.get("EVAL_CACHE_DISK", "false").lower() in ("1", "true", "yes")
+EVAL_CACHE_DIR = os.environ.get("EVAL_CACHE_DIR", os.path.join(transcript_service.BASE_DIR, "eval_cache"))
+
+
+def cache_key(kind: str, transcript: List[Dict[str, Any]], persona_id: str,
+              must_say: Optional[List[str]] = None, must_not_say: Optional[List[str]] = None) -> str:
+    """Content hash of everything an evaluation result depends on."""
+    persona = PERSONA_REGISTRY.get(persona_id)
+    blob = json.dumps(
+        [EVALUATOR_VERSION, kind, persona_id, persona.version if persona else None,
+         list(must_say or []), list(must_not_say or []),
+         normalize_transcript(transcript)],
+        ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+# ===================== Cache =====================
+
+class EvaluationCache:
+    """
+    Evaluation results keyed by content hash.
+
+    Memory tier: LRU evicted by total serialized size. Disk tier (optional): one
+    JSON file per key under `disk_dir`, consulted on a memory miss and promoted
+    back into memory. Cached results are shared; treat them as read-only.
+    """
+
+    def __init__(self, max_bytes: int = EVAL_CACHE_MAX_BYTES, disk_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+        self._entries: "OrderedDict[str, tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.get_memory(key)
+        return value if value is not None else self.get_disk(key)
+
+    def get_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        """Memory tier only: never touches the disk, safe on the event loop. A miss is not counted."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        return None
+
+    def get_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        """Disk tier (blocking file read; call off the event loop). Counts the miss if absent."""
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._remember(key, value, json.dumps(value, ensure_ascii=False))
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        blob = json.dumps(value, ensure_ascii=False)
+        self._remember(key, value, blob)
+        self._write_disk(key, blob)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else None,
+                "disk": bool(self.disk_dir),
+            }
+
+    def _remember(self, key: str, value: Dict[str, Any], blob: str) -> None:
+        size = len(blob)
+        if size > self.max_bytes:
+            return  # would evict everything else; disk tier (if any) still has it
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, blob: str) -> None:
+        if not self.disk_dir:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(blob)
+        os.replace(tmp, path)  # readers never see a partial file
+
+
+EVALUATION_CACHE = EvaluationCache(disk_dir=EVAL_CACHE_DIR if EVAL_CACHE_DISK else None)
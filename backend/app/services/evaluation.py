@@ -1,14 +1,20 @@
 # backend/app/services/evaluation.py
 
 import json
-from typing import List, Dict, Any, Optional
-from app.models.doctor_persona import PERSONAS
+from typing import List, Dict, Any, FrozenSet, Optional
+from app.models.doctor_persona import PERSONA_REGISTRY, Persona
+from app.services import compliance as compliance_rules, lexicon
+from app.services.session_cache import LiveSessionMap
+
+# Bump whenever scoring or output shape changes; part of the evaluation cache key
+EVALUATOR_VERSION = "1"
 
 # ===================== Evaluation Output Types =====================
 
 class TurnFeedback:
     def __init__(self, turn_index: int, speaker: str, content: str, critique: str, 
-                 sentiment: str, could_have_said: Optional[List[str]], justification: str):
+                 sentiment: str, could_have_said: Optional[List[str]], justification: str,
+                 source: str = "heuristic"):
         self.turn_index = turn_index
         self.speaker = speaker
         self.content = content
@@ -16,6 +22,7 @@ class TurnFeedback:
         self.sentiment = sentiment
         self.could_have_said = could_have_said or []
         self.justification = justification
+        self.source = source  # "heuristic" | "llm"
 
 class EvaluationOutput:
     def __init__(self, scores: Dict[str, int], compliance: Dict[str, List[str]], 
@@ -39,31 +46,23 @@ def format_turn_context(index: int, conversation: List[Dict[str, Any]], window_s
 
 def check_compliance(transcript: List[Dict[str, Any]], must_say: List[str], must_not_say: List[str]) -> Dict[str, List[str]]:
     """Check compliance against must-say and must-not-say lists."""
-    full_text = " ".join([msg.get("content", "").lower() for msg in transcript])
-    
-    must_say_mentioned = [phrase for phrase in must_say if phrase.lower() in full_text]
-    must_say_missed = [phrase for phrase in must_say if phrase.lower() not in full_text]
-    must_not_say_violations = [phrase for phrase in must_not_say if phrase.lower() in full_text]
-    
-    return {
-        "mustSayMentioned": must_say_mentioned,
-        "mustSayMissed": must_say_missed,
-        "mustNotSayViolations": must_not_say_violations,
-    }
+    return compliance_rules.compile_rules(must_say, must_not_say).scan(transcript).summary()
 
 # ===================== LLM-based Analysis =====================
 
 def analyze_turn_simple(turn_index: int, conversation: List[Dict[str, Any]], 
                        persona: Dict[str, Any]) -> TurnFeedback:
     """Simple turn analysis without external LLM call."""
-    rep_msg = conversation[turn_index]
-    content = rep_msg.get("content", "")
-    
+    content = conversation[turn_index].get("content", "")
+    return _analyze_rep_turn(turn_index, content, content.lower())
+
+def _analyze_rep_turn(turn_index: int, content: str, content_lower: str) -> TurnFeedback:
+    """Heuristic feedback for one rep turn whose lower-cased text is already known."""
     # Simple heuristic analysis
     sentiment = "neutral"
-    if any(word in content.lower() for word in ["evidence", "trial", "study", "data"]):
+    if any(word in content_lower for word in ["evidence", "trial", "study", "data"]):
         sentiment = "positive"
-    elif any(word in content.lower() for word in ["best", "revolutionary", "amazing"]):
+    elif any(word in content_lower for word in ["best", "revolutionary", "amazing"]):
         sentiment = "negative"
     
     critique = f"Message: '{content}'"
@@ -90,10 +89,33 @@ def analyze_turn_simple(turn_index: int, conversation: List[Dict[str, Any]],
         justification=justification
     )
 
+# Keyword groups behind the classic scores (matched against MR text)
+_CLASSIC_SCORE_KEYWORDS = {
+    "evidence": ["evidence", "trial"],
+    "empathy": ["patient", "safety"],
+    "hype": ["best", "revolutionary"],
+}
+
+# Keyword groups behind the structured scores (matched against the whole transcript)
+_STRUCTURED_SCORE_KEYWORDS = {
+    "trial": ["trial", "rct", "randomized"],
+    "stats": ["p=", "p-value", "%", "n="],
+    "empathy": ["patient", "safety", "concern", "understand"],
+    "hype": ["best", "revolutionary", "amazing", "unbelievable"],
+}
+
+def _keyword_flags(text_lower: str, groups: Dict[str, List[str]]) -> FrozenSet[str]:
+    """Names of the keyword groups with at least one keyword in `text_lower`."""
+    return frozenset(name for name, words in groups.items() if any(w in text_lower for w in words))
+
 def generate_scores_simple(transcript: List[Dict[str, Any]], persona: Dict[str, Any]) -> Dict[str, int]:
     """Generate simple scores without external LLM call."""
     rep_turns = get_rep_turns(transcript)
-    
+    full_text = " ".join([msg.get("content", "").lower() for msg in rep_turns])
+    return _scores_from_flags(_keyword_flags(full_text, _CLASSIC_SCORE_KEYWORDS))
+
+def _scores_from_flags(flags: FrozenSet[str]) -> Dict[str, int]:
+    """Classic keyword scores from the flags of the joined, lower-cased rep turns."""
     # Simple scoring based on content analysis
     accuracy = 70  # Base score
     empathy = 60   # Base score
@@ -101,13 +123,11 @@ def generate_scores_simple(transcript: List[Dict[str, Any]], persona: Dict[str,
     adaptability = 65  # Base score
     
     # Adjust based on content
-    full_text = " ".join([msg.get("content", "").lower() for msg in rep_turns])
-    
-    if "evidence" in full_text or "trial" in full_text:
+    if "evidence" in flags:
         accuracy += 15
-    if "patient" in full_text or "safety" in full_text:
+    if "empathy" in flags:
         empathy += 20
-    if "best" in full_text or "revolutionary" in full_text:
+    if "hype" in flags:
         accuracy -= 10
         compliance -= 15
     
@@ -118,6 +138,129 @@ def generate_scores_simple(transcript: List[Dict[str, Any]], persona: Dict[str,
         "adaptability": max(0, min(100, adaptability)),
     }
 
+# ===================== Transcript Analysis (shared pass) =====================
+
+def _normalize_speaker(role: Any) -> str:
+    if role in ("rep", "user", "mr", "MR"):
+        return "MR"
+    if role in ("doctor", "assistant"):
+        return "Doctor"
+    return str(role)
+
+def normalize_transcript(transcript: List[Dict[str, Any]]) -> List[List[Any]]:
+    """[speaker, text, timestamp] per turn, exactly as the evaluators read them."""
+    return [
+        [_normalize_speaker(msg.get("role") or msg.get("speaker") or ""),
+         msg.get("content") or msg.get("text") or "",
+         msg.get("timestamp") or ""]
+        for msg in transcript
+    ]
+
+class TranscriptAnalysis:
+    """
+    Everything both evaluators need, accumulated turn by turn: normalized turns,
+    per-turn lexicon hits, keyword score flags, compliance hits and pre-rendered
+    per-turn rows. Rendering never re-reads the transcript, so it costs the same
+    for 10 turns or 10k.
+    """
+    # Highlights only ever show the first few non-neutral MR turns
+    MAX_HIGHLIGHTS = 6
+
+    def __init__(self, persona_id: str, persona: Optional[Persona],
+                 must_say: List[str], must_not_say: List[str]):
+        self.persona_id = persona_id
+        self.persona = persona
+        self.must_say = must_say
+        self.must_not_say = must_not_say
+        self.turn_count = 0
+        self.mr_turn_count = 0
+        self.classic_flags: FrozenSet[str] = frozenset()
+        self.structured_flags: FrozenSet[str] = frozenset()
+        self.turn_feedback: List[Dict[str, Any]] = []  # classic turnLevelAnalysis rows
+        self.highlights: List[Dict[str, Any]] = []
+        self.violations: List[Dict[str, Any]] = []  # must-not-say hits in MR turns
+        self.raw_transcript: List[Dict[str, Any]] = []
+        # Compiled once per distinct rule list and shared across sessions
+        self.rules = compliance_rules.compile_rules(must_say, must_not_say)
+        self.compliance_report = compliance_rules.ComplianceReport(self.rules)
+
+    def add_turn(self, msg: Dict[str, Any]) -> None:
+        turn_index = self.turn_count
+        self.turn_count += 1
+        speaker = _normalize_speaker(msg.get("role") or msg.get("speaker") or "")
+        text = msg.get("content") or msg.get("text") or ""
+        text_lower = text.lower()
+        self.raw_transcript.append(
+            {"turn_index": turn_index, "speaker": speaker, "text": text, "timestamp": msg.get("timestamp") or ""}
+        )
+
+        # Transcript-level compliance: one scan yields every rule hit in this turn
+        hits = self.compliance_report.add_turn(turn_index, text)
+
+        self.structured_flags |= _keyword_flags(text_lower, _STRUCTURED_SCORE_KEYWORDS)
+        if speaker != "MR":
+            return
+
+        self.mr_turn_count += 1
+        self.classic_flags |= _keyword_flags(text_lower, _CLASSIC_SCORE_KEYWORDS)
+        tf = _analyze_rep_turn(turn_index, text, text_lower)
+        self.turn_feedback.append({
+            "turnIndex": tf.turn_index,
+            "speaker": tf.speaker,
+            "content": tf.content,
+            "critique": tf.critique,
+            "sentiment": tf.sentiment,
+            "couldHaveSaid": tf.could_have_said,
+            "justification": tf.justification
+        })
+
+        if len(self.highlights) < self.MAX_HIGHLIGHTS:
+            highlight = _highlight_for(turn_index, text, lexicon.scan(text_lower))
+            if highlight:
+                self.highlights.append(highlight)
+
+        # One violation per prohibited phrase hit in this MR turn, at its first offset
+        first_hit: Dict[str, Dict[str, Any]] = {}
+        for hit in hits:
+            if hit["rule"] == compliance_rules.MUST_NOT_SAY:
+                first_hit.setdefault(hit["phrase"], hit)
+        if first_hit:
+            for rule in self.must_not_say:
+                hit = first_hit.get(self.rules.key(rule))
+                if hit:
+                    self.violations.append({
+                        "turn_index": turn_index,
+                        "text": text,
+                        "rule": "must_not_say",
+                        "explain": f"Contains prohibited phrase: '{rule}'.",
+                        "start": hit["start"],
+                        "end": hit["end"],
+                    })
+
+    @property
+    def compliance(self) -> Dict[str, List[str]]:
+        return self.compliance_report.summary()
+
+    @property
+    def compliance_hits(self) -> List[Dict[str, Any]]:
+        """Every must-say / must-not-say hit with turn index and character offsets."""
+        return self.compliance_report.hits
+
+def open_analysis(persona_id: str, must_say: Optional[List[str]] = None,
+                  must_not_say: Optional[List[str]] = None) -> TranscriptAnalysis:
+    """Start an empty analysis; feed it with add_turn()."""
+    persona = PERSONA_REGISTRY.get(persona_id)
+    return TranscriptAnalysis(persona_id, persona, list(must_say or []), list(must_not_say or []))
+
+def analyze_transcript(transcript: List[Dict[str, Any]], persona_id: str,
+                       must_say: Optional[List[str]] = None,
+                       must_not_say: Optional[List[str]] = None) -> TranscriptAnalysis:
+    """Build the shared analysis once; render it with render_classic / render_structured."""
+    analysis = open_analysis(persona_id, must_say, must_not_say)
+    for msg in transcript:
+        analysis.add_turn(msg)
+    return analysis
+
 # ===================== Main Evaluation Function =====================
 
 def evaluate_conversation(transcript: List[Dict[str, Any]], persona_id: str, 
@@ -125,38 +268,28 @@ def evaluate_conversation(transcript: List[Dict[str, Any]], persona_id: str,
                          must_not_say: Optional[List[str]] = None) -> Dict[str, Any]:
     """
     Evaluate an MR-doctor conversation against a doctor persona.
-    transcript = list of {"role": "user"|"doctor", "content": "text"} dicts
+    transcript = list of {"role": "rep"|"user"|"doctor", "content": "text"} dicts
     persona_id = which doctor persona was simulated
     """
-    # 1. Find persona
-    persona = next((p for p in PERSONAS if p["id"] == persona_id), None)
-    if not persona:
+    return render_classic(analyze_transcript(transcript, persona_id, must_say, must_not_say))
+
+def render_classic(analysis: TranscriptAnalysis) -> Dict[str, Any]:
+    """Classic evaluation (scores, compliance, summary, per-turn feedback) from a shared analysis."""
+    # 1. Persona must exist
+    if not analysis.persona:
         return {"error": "Persona not found"}
     
-    # 2. Set default compliance lists
-    must_say = must_say or []
-    must_not_say = must_not_say or []
-    
-    # 3. Get rep turns and analyze each
-    rep_turns = get_rep_turns(transcript)
-    turn_feedbacks = []
-    
-    for i, rep_turn in enumerate(rep_turns):
-        turn_index = transcript.index(rep_turn)
-        feedback = analyze_turn_simple(turn_index, transcript, persona)
-        turn_feedbacks.append(feedback)
-    
-    # 4. Check compliance
-    compliance = check_compliance(transcript, must_say, must_not_say)
+    # 2. Compliance (accumulated by the shared pass)
+    compliance = analysis.compliance
     
-    # 5. Calculate compliance score
+    # 3. Calculate compliance score
     compliance_score = max(0, 100 - (len(compliance["mustSayMissed"]) * 10 + len(compliance["mustNotSayViolations"]) * 10))
     
-    # 6. Generate scores
-    scores = generate_scores_simple(transcript, persona)
+    # 4. Generate scores
+    scores = _scores_from_flags(analysis.classic_flags)
     scores["compliance"] = compliance_score
     
-    # 7. Generate feedback summary
+    # 5. Generate feedback summary
     feedback_summary = f"Overall performance: {scores['accuracy']}/100 accuracy, {scores['empathy']}/100 empathy. "
     if compliance["mustSayMissed"]:
         feedback_summary += f"Missed required phrases: {', '.join(compliance['mustSayMissed'])}. "
@@ -164,48 +297,51 @@ def evaluate_conversation(transcript: List[Dict[str, Any]], persona_id: str,
         feedback_summary += f"Avoided forbidden phrases: {', '.join(compliance['mustNotSayViolations'])}. "
     feedback_summary += "Focus on evidence-based communication and addressing doctor concerns directly."
     
-    # 8. Convert to dict format for JSON serialization
+    # 6. Per-turn analysis rows were rendered as turns arrived
     return {
         "scores": scores,
         "compliance": compliance,
+        "complianceHits": analysis.compliance_hits,
         "feedbackSummary": feedback_summary,
-        "turnLevelAnalysis": [
-            {
-                "turnIndex": tf.turn_index,
-                "speaker": tf.speaker,
-                "content": tf.content,
-                "critique": tf.critique,
-                "sentiment": tf.sentiment,
-                "couldHaveSaid": tf.could_have_said,
-                "justification": tf.justification
-            }
-            for tf in turn_feedbacks
-        ]
+        "turnLevelAnalysis": analysis.turn_feedback,
     }
 
 # ===================== Structured Evaluator (Context-Aware) =====================
 
 def _score_to_type_and_issue(content_lower: str) -> (str, Optional[str]):
-    if any(w in content_lower for w in ["best", "revolutionary", "amazing", "unbelievable"]):
+    return _classify_hits(lexicon.scan(content_lower))
+
+def _classify_hits(hits: FrozenSet[str]) -> (str, Optional[str]):
+    if lexicon.VAGUE_CLAIM in hits:
         return "issue", "vague_claim"
     
     # Comprehensive medical evidence detection
-    evidence_patterns = [
-        "n=", "p=", "p-value", "confidence interval", "ci", "hazard ratio", "hr", "odds ratio", "or",
-        "primary endpoint", "secondary endpoint", "efficacy", "response rate", "remission rate", 
-        "progression-free survival", "pfs", "overall survival", "os", "disease-free survival", "dfs",
-        "randomized", "rct", "double-blind", "placebo-controlled", "phase", "multicenter",
-        "adverse events", "ae", "serious adverse events", "sae", "toxicity", "safety profile",
-        "biomarker", "genetic", "mutation", "expression", "receptor", "pathway",
-        "real-world", "registry", "observational", "post-marketing", "surveillance",
-        "guidelines", "consensus", "recommendation", "standard of care", "treatment algorithm"
-    ]
-    
-    if any(pattern in content_lower for pattern in evidence_patterns):
+    if lexicon.EVIDENCE in hits:
         return "praise", "evidence_given"
     return "neutral", None
 
 
+def _highlight_for(turn_index: int, text: str, hits: FrozenSet[str]) -> Optional[Dict[str, Any]]:
+    """Highlight row for an MR turn, or None when the turn is neutral."""
+    h_type, issue_type = _classify_hits(hits)
+    if h_type == "neutral":
+        return None
+    suggestion = ""
+    if issue_type == "vague_claim":
+        suggestion = "Avoid hype; lead with trial size, endpoint, and p-value."
+    elif issue_type == "evidence_given":
+        suggestion = "Good. Add journal/source and safety note."
+    return {
+        "turn_index": turn_index,
+        "speaker": "MR",
+        "text": text,
+        "type": h_type,
+        "issue_type": issue_type or "neutral",
+        "suggestion": suggestion or "Keep it concise and evidence-based.",
+        "confidence": 0.9 if h_type != "neutral" else 0.5,
+    }
+
+
 # ===================== Tone Decision Function (Enhanced for Busy Doctor) =====================
 
 def tone_decide(current_state: Dict[str, Any], last_doctor: str, last_mr: str) -> Dict[str, Any]:
@@ -223,8 +359,8 @@ def tone_decide(current_state: Dict[str, Any], last_doctor: str, last_mr: str) -
     evidence_count = current_state.get("evidenceCount", 0)
     monologue_count = current_state.get("monologueCount", 0)
     
-    # Analyze MR's last message
-    mr_lower = last_mr.lower()
+    # Analyze MR's last message (one pass over every lexicon)
+    hits = lexicon.scan(last_mr)
     
     # Hard stop triggers (cutNow = True)
     cut_now = False
@@ -232,29 +368,11 @@ def tone_decide(current_state: Dict[str, Any], last_doctor: str, last_mr: str) -
         cut_now = True
     elif monologue_count >= 2 and time_pressure >= 4:  # 2+ long monologues under pressure
         cut_now = True
-    elif patience <= 1 and any(word in mr_lower for word in ["best", "revolutionary", "amazing"]):
+    elif patience <= 1 and lexicon.STRONG_HYPE in hits:
         cut_now = True
     
     # Evidence recognition (immediate engagement boost) - flexible medical criteria
-    evidence_patterns = [
-        # Statistical evidence
-        "n=", "p=", "p-value", "confidence interval", "ci", "hazard ratio", "hr", "odds ratio", "or",
-        # Clinical endpoints
-        "primary endpoint", "secondary endpoint", "efficacy", "response rate", "remission rate", 
-        "progression-free survival", "pfs", "overall survival", "os", "disease-free survival", "dfs",
-        # Trial design
-        "randomized", "rct", "double-blind", "placebo-controlled", "phase", "multicenter",
-        # Safety data
-        "adverse events", "ae", "serious adverse events", "sae", "toxicity", "safety profile",
-        # Biomarkers
-        "biomarker", "genetic", "mutation", "expression", "receptor", "pathway",
-        # Real-world evidence
-        "real-world", "registry", "observational", "post-marketing", "surveillance",
-        # Guidelines/standards
-        "guidelines", "consensus", "recommendation", "standard of care", "treatment algorithm"
-    ]
-    
-    if any(pattern in mr_lower for pattern in evidence_patterns):
+    if lexicon.EVIDENCE in hits:
         evidence_count += 1
         mood = "engaged"
         time_pressure = max(1, time_pressure - 2)  # Reduce pressure significantly
@@ -264,7 +382,7 @@ def tone_decide(current_state: Dict[str, Any], last_doctor: str, last_mr: str) -
         pause_reply = False
     else:
         # Hype detection (patience drain)
-        if any(word in mr_lower for word in ["best", "revolutionary", "amazing", "unbelievable", "game-changing"]):
+        if lexicon.HYPE in hits:
             hype_count += 1
             patience = max(0, patience - 2)
             mood = "annoyed"
@@ -284,7 +402,7 @@ def tone_decide(current_state: Dict[str, Any], last_doctor: str, last_mr: str) -
             pause_reply = False
         
         # Repetition detection
-        elif any(phrase in mr_lower for phrase in ["as i said", "like i mentioned", "again", "repeating"]):
+        elif lexicon.REPETITION in hits:
             patience = max(0, patience - 1)
             mood = "frustrated"
             time_pressure = min(5, time_pressure + 1)
@@ -335,39 +453,30 @@ def evaluate_conversation_structured(
     must_say: Optional[List[str]] = None,
     must_not_say: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
-    persona = next((p for p in PERSONAS if p["id"] == persona_id), None)
-    persona_desc = persona.get("description") if persona else persona_id
+    return render_structured(analyze_transcript(transcript, persona_id, must_say, must_not_say))
 
-    must_say = must_say or []
-    must_not_say = must_not_say or []
 
-    # Build MR/Doctor style transcript with indices
-    indexed = []
-    for idx, msg in enumerate(transcript):
-        speaker = msg.get("role") or msg.get("speaker") or ""
-        text = msg.get("content") or msg.get("text") or ""
-        ts = msg.get("timestamp") or ""
-        # normalize speaker labels
-        spk = "MR" if speaker in ("rep", "user", "mr", "MR") else ("Doctor" if speaker in ("doctor", "assistant") else str(speaker))
-        indexed.append({"turn_index": idx, "speaker": spk, "text": text, "timestamp": ts})
+def render_structured(analysis: TranscriptAnalysis) -> Dict[str, Any]:
+    """Structured evaluation (summary, scores, highlights, actions, violations) from a shared analysis."""
+    persona_desc = analysis.persona.get("description") if analysis.persona else analysis.persona_id
 
     # Scores (reuse simple heuristic with slight tweaks)
-    full_text_lower = " ".join([i["text"].lower() for i in indexed])
+    flags = analysis.structured_flags
     accuracy = 70
     empathy = 60
     compliance_score = 80
     adaptability = 65
 
-    if any(w in full_text_lower for w in ["trial", "rct", "randomized"]) and any(w in full_text_lower for w in ["p=", "p-value", "%", "n="]):
+    if "trial" in flags and "stats" in flags:
         accuracy += 15
-    if any(w in full_text_lower for w in ["patient", "safety", "concern", "understand"]):
+    if "empathy" in flags:
         empathy += 15
-    if any(w in full_text_lower for w in ["best", "revolutionary", "amazing", "unbelievable"]):
+    if "hype" in flags:
         accuracy -= 10
         compliance_score -= 10
 
     # Compliance
-    compliance = check_compliance(transcript, must_say, must_not_say)
+    compliance = analysis.compliance
     compliance_score = max(
         0,
         100 - (len(compliance["mustSayMissed"]) * 10 + len(compliance["mustNotSayViolations"]) * 10),
@@ -380,33 +489,6 @@ def evaluate_conversation_structured(
         "adaptability": max(0, min(100, adaptability)),
     }
 
-    # Highlights (top 6 MR turns prioritizing issues and praises)
-    highlights: List[Dict[str, Any]] = []
-    for item in indexed:
-        if item["speaker"] != "MR":
-            continue
-        t = item["text"]
-        t_lower = t.lower()
-        h_type, issue_type = _score_to_type_and_issue(t_lower)
-        if h_type == "neutral":
-            continue
-        suggestion = ""
-        if issue_type == "vague_claim":
-            suggestion = "Avoid hype; lead with trial size, endpoint, and p-value."
-        elif issue_type == "evidence_given":
-            suggestion = "Good. Add journal/source and safety note."
-        highlights.append({
-            "turn_index": item["turn_index"],
-            "speaker": "MR",
-            "text": t,
-            "type": h_type,
-            "issue_type": issue_type or "neutral",
-            "suggestion": suggestion or "Keep it concise and evidence-based.",
-            "confidence": 0.9 if h_type != "neutral" else 0.5,
-        })
-        if len(highlights) >= 6:
-            break
-
     # Top actions
     top_actions = [
         "Lead with primary endpoint and n-size when asked for evidence",
@@ -414,32 +496,81 @@ def evaluate_conversation_structured(
         "Offer a 1-page summary and propose a concise follow-up",
     ]
 
-    # Compliance violations list (turn-level)
-    violations: List[Dict[str, Any]] = []
-    for item in indexed:
-        if item["speaker"] != "MR":
-            continue
-        txt = item["text"].lower()
-        for rule in must_not_say:
-            if rule.lower() in txt:
-                violations.append({
-                    "turn_index": item["turn_index"],
-                    "text": item["text"],
-                    "rule": "must_not_say",
-                    "explain": f"Contains prohibited phrase: '{rule}'.",
-                })
-
     summary = (
         "MR demonstrated improving evidence use with room to lead earlier with trials;"
         " maintain polite tone, avoid hype, and adapt quickly to doctor cues."
     )
 
+    # Highlights (top 6 MR turns prioritizing issues and praises) and turn-level
+    # compliance violations were collected as turns arrived
     return {
         "summary": summary,
         "scores": scores,
-        "highlights": highlights,
+        "highlights": analysis.highlights,
         "top_actions": top_actions,
-        "compliance_violations": violations,
-        "raw_transcript": indexed,
+        "compliance_violations": analysis.violations,
+        "compliance_hits": analysis.compliance_hits,
+        "raw_transcript": analysis.raw_transcript,
         "persona": persona_desc,
-    }
\ No newline at end of file
+    }
+
+
+def evaluate_conversation_combined(
+    transcript: List[Dict[str, Any]],
+    persona_id: str,
+    must_say: Optional[List[str]] = None,
+    must_not_say: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Classic and structured evaluations rendered from a single analysis pass."""
+    analysis = analyze_transcript(transcript, persona_id, must_say, must_not_say)
+    return {"classic": render_classic(analysis), "structured": render_structured(analysis)}
+
+
+# ===================== Incremental Evaluation (live sessions) =====================
+
+class IncrementalEvaluator:
+    """
+    Evaluates a conversation while it happens: open(), add_turn() per message,
+    snapshot() for a live view, finalize() at the end. All heavy lifting happens
+    in add_turn, so finalize() does not depend on transcript length.
+    """
+    def __init__(self, session_id: str, analysis: TranscriptAnalysis):
+        self.session_id = session_id
+        self.analysis = analysis
+        self.result: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def open(cls, session_id: str, persona_id: str, must_say: Optional[List[str]] = None,
+             must_not_say: Optional[List[str]] = None) -> "IncrementalEvaluator":
+        return cls(session_id, open_analysis(persona_id, must_say, must_not_say))
+
+    def add_turn(self, turn: Dict[str, Any]) -> None:
+        if self.result is not None:
+            raise RuntimeError(f"Evaluation for session {self.session_id} is already finalized")
+        self.analysis.add_turn(turn)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current classic and structured views (lists are shared, not copied)."""
+        return {"classic": render_classic(self.analysis), "structured": render_structured(self.analysis)}
+
+    def finalize(self) -> Dict[str, Any]:
+        if self.result is None:
+            self.result = self.snapshot()
+        return self.result
+
+
+# Live evaluators keyed by session id; abandoned sessions age out, and /conversation/end
+# evaluates the stored transcript when a session's evaluator is gone
+EVALUATORS = LiveSessionMap()
+
+def open_evaluator(session_id: str, persona_id: str, must_say: Optional[List[str]] = None,
+                   must_not_say: Optional[List[str]] = None) -> IncrementalEvaluator:
+    evaluator = IncrementalEvaluator.open(session_id, persona_id, must_say, must_not_say)
+    EVALUATORS.put(session_id, evaluator)
+    return evaluator
+
+def get_evaluator(session_id: str) -> Optional[IncrementalEvaluator]:
+    return EVALUATORS.get(session_id)
+
+def close_evaluator(session_id: str) -> Optional[IncrementalEvaluator]:
+    return EVALUATORS.pop(session_id)
@@ -0,0 +1,101 @@
+# backend/app/services/http_client.py
+"""
+One pooled httpx.AsyncClient for all calls to the OpenAI API (Realtime session
+minting, turn analysis, and the AsyncOpenAI client used for doctor replies),
+opened and closed by the FastAPI lifespan. Requests reuse kept-alive
+connections instead of paying a TCP + TLS handshake each.
+"""
+
+import importlib.util
+import os
+import ssl
+from typing import Any, Dict, Optional
+
+import certifi
+import httpx
+
+# ===================== Configuration =====================
+
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+# Seconds: connect (TCP + TLS), and each read / write / wait-for-a-pooled-connection
+OPENAI_HTTP_CONNECT_TIMEOUT = float(os.environ.get("OPENAI_HTTP_CONNECT_TIMEOUT", "5.0"))
+OPENAI_HTTP_TIMEOUT = float(os.environ.get("OPENAI_HTTP_TIMEOUT", "10.0"))
+OPENAI_HTTP_MAX_CONNECTIONS = int(os.environ.get("OPENAI_HTTP_MAX_CONNECTIONS", "100"))
+OPENAI_HTTP_MAX_KEEPALIVE = int(os.environ.get("OPENAI_HTTP_MAX_KEEPALIVE", "20"))
+# Idle connections are closed after this many seconds
+OPENAI_HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("OPENAI_HTTP_KEEPALIVE_EXPIRY", "30.0"))
+# HTTP/2 needs the h2 package (pip install "httpx[http2]"); without it HTTP/1.1 is used
+OPENAI_HTTP2 = os.environ.get("OPENAI_HTTP2", "0").lower() in ("1", "true", "yes", "on")
+# CA bundle (PEM) to verify against instead of certifi's, e.g. behind a TLS-inspecting proxy;
+# certificates are always verified
+OPENAI_CA_BUNDLE = os.environ.get("OPENAI_CA_BUNDLE")
+
+
+def _ssl_context() -> ssl.SSLContext:
+    context = ssl.create_default_context()
+    if OPENAI_CA_BUNDLE:
+        context.load_verify_locations(cafile=OPENAI_CA_BUNDLE)
+    else:
+        context.load_verify_locations(cafile=certifi.where())
+    return context
+
+
+class SharedHttpClient:
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._openai = None
+        self.http2 = OPENAI_HTTP2 and importlib.util.find_spec("h2") is not None
+        self.opened = 0
+
+    def _open(self) -> httpx.AsyncClient:
+        api_key = os.environ.get("OPENAI_API_KEY")
+        self.opened += 1
+        return httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {api_key}"} if api_key else None,
+            timeout=httpx.Timeout(OPENAI_HTTP_TIMEOUT, connect=OPENAI_HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=OPENAI_HTTP_MAX_CONNECTIONS,
+                                max_keepalive_connections=OPENAI_HTTP_MAX_KEEPALIVE,
+                                keepalive_expiry=OPENAI_HTTP_KEEPALIVE_EXPIRY),
+            http2=self.http2,
+            verify=_ssl_context(),
+        )
+
+    def start(self) -> None:
+        if self._client is None or self._client.is_closed:
+            self._client = self._open()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared client (opened on first use outside the lifespan, e.g. in scripts)."""
+        self.start()
+        return self._client
+
+    @property
+    def openai(self):
+        """Process-wide AsyncOpenAI client on the shared connection pool."""
+        client = self.client
+        if self._openai is None or self._openai[0] is not client:
+            from openai import AsyncOpenAI
+            self._openai = (client, AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"), base_url=OPENAI_BASE_URL,
+                                                http_client=client))
+        return self._openai[1]
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._openai = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "open": self._client is not None and not self._client.is_closed,
+            "http2": self.http2,
+            "http2_requested": OPENAI_HTTP2,
+            "clients_opened": self.opened,
+            "max_connections": OPENAI_HTTP_MAX_CONNECTIONS,
+            "max_keepalive": OPENAI_HTTP_MAX_KEEPALIVE,
+        }
+
+
+OPENAI_HTTP = SharedHttpClient()
@@ -0,0 +1,260 @@
+# backend/app/services/jobs.py
+
+import asyncio
+import itertools
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from app.services import evaluation, transcript_service
+from app.services.eval_cache import EVALUATION_CACHE, cache_key
+
+# ===================== Configuration =====================
+
+EVAL_WORKERS = int(os.environ.get("EVAL_WORKERS", "2"))
+EVAL_QUEUE_SIZE = int(os.environ.get("EVAL_QUEUE_SIZE", "256"))
+# "thread": evaluate in the worker threads; "process": hand the CPU work to a process pool
+EVAL_WORKER_MODE = os.environ.get("EVAL_WORKER_MODE", "thread")
+# Finished jobs kept in memory for polling (results are also persisted per session)
+EVAL_JOB_HISTORY = int(os.environ.get("EVAL_JOB_HISTORY", "1000"))
+
+# Lower runs first
+PRIORITY_INTERACTIVE = 0   # a user is waiting on the response
+PRIORITY_BACKGROUND = 10   # fire-and-forget, polled later
+
+EVALUATION_KINDS = {
+    "classic": evaluation.evaluate_conversation,
+    "structured": evaluation.evaluate_conversation_structured,
+    "combined": evaluation.evaluate_conversation_combined,
+}
+
+
+class QueueFullError(Exception):
+    """Raised when the evaluation queue is at capacity."""
+
+
+class EvaluationJob:
+    __slots__ = (
+        "job_id", "kind", "priority", "session_id", "status", "result", "error",
+        "submitted_at", "started_at", "finished_at", "future", "args", "cache_key", "cached",
+    )
+
+    def __init__(self, kind: str, priority: int, session_id: Optional[str], args: tuple):
+        self.job_id = str(uuid.uuid4())
+        self.kind = kind
+        self.priority = priority
+        self.session_id = session_id
+        self.status = "queued"  # queued | running | done | failed
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.future: Future = Future()
+        self.args = args
+        self.cache_key = cache_key(kind, *args)
+        self.cached = False
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        out = {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "session_id": self.session_id,
+            "status": self.status,
+            "priority": self.priority,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "cached": self.cached,
+        }
+        if self.error:
+            out["error"] = self.error
+        if include_result and self.result is not None:
+            out["result"] = self.result
+        return out
+
+
+# ===================== Job Queue =====================
+
+class EvaluationJobQueue:
+    """
+    Bounded pool of worker threads draining a priority queue of evaluation jobs.
+    Interactive jobs overtake background ones; FIFO within a priority.
+    """
+
+    def __init__(self, workers: int = EVAL_WORKERS, max_queued: int = EVAL_QUEUE_SIZE,
+                 mode: str = EVAL_WORKER_MODE, history: int = EVAL_JOB_HISTORY):
+        self.workers = max(1, workers)
+        self.mode = mode
+        self.history = history
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue(maxsize=max_queued)
+        self._seq = itertools.count()
+        self._jobs: "OrderedDict[str, EvaluationJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._persister: Optional[ThreadPoolExecutor] = None
+        self.worker_errors = 0
+        self.persist_errors = 0
+        self.last_error: Optional[str] = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            if self.mode == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"eval-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put((float("inf"), next(self._seq), None))  # sentinel after pending jobs
+        for t in threads:
+            t.join()
+        if self._pool:
+            self._pool.shutdown()
+            self._pool = None
+        if self._persister:
+            self._persister.shutdown()
+            self._persister = None
+
+    def submit(self, kind: str, transcript: List[Dict[str, Any]], persona_id: str,
+               must_say: Optional[List[str]] = None, must_not_say: Optional[List[str]] = None,
+               session_id: Optional[str] = None, priority: int = PRIORITY_BACKGROUND) -> EvaluationJob:
+        if kind not in EVALUATION_KINDS:
+            raise ValueError(f"Unknown evaluation kind: {kind}")
+        job = EvaluationJob(kind, priority, session_id, (transcript, persona_id, must_say, must_not_say))
+        # memory tier only here; the disk tier is read by the worker, off the event loop
+        cached = EVALUATION_CACHE.get_memory(job.cache_key)
+        if cached is not None:
+            # Retries and re-opened sessions never occupy a worker
+            job.cached = True
+            job.started_at = job.submitted_at
+            job.args = ()
+            self._finish(job, cached)  # persisted on the persister thread, off the event loop
+            with self._lock:
+                self._jobs[job.job_id] = job
+                self._trim()
+            return job
+        self.start()
+        try:
+            self._queue.put_nowait((priority, next(self._seq), job))
+        except queue.Full:
+            raise QueueFullError("Evaluation queue is full, retry later")
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._trim()
+        return job
+
+    async def run(self, kind: str, transcript: List[Dict[str, Any]], persona_id: str,
+                  must_say: Optional[List[str]] = None, must_not_say: Optional[List[str]] = None,
+                  session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Queue an interactive job and await its result without blocking the event loop."""
+        job = self.submit(kind, transcript, persona_id, must_say, must_not_say,
+                          session_id=session_id, priority=PRIORITY_INTERACTIVE)
+        return await asyncio.wrap_future(job.future)
+
+    def get(self, job_id: str) -> Optional[EvaluationJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses = [j.status for j in self._jobs.values()]
+        return {
+            "workers": self.workers,
+            "mode": self.mode,
+            "queue_depth": self._queue.qsize(),
+            "running": statuses.count("running"),
+            "tracked_jobs": len(statuses),
+            "worker_errors": self.worker_errors,
+            "persist_errors": self.persist_errors,
+            "last_error": self.last_error,
+            "cache": EVALUATION_CACHE.stats(),
+        }
+
+    def _trim(self) -> None:
+        # drop the oldest finished jobs beyond the history limit (caller holds the lock)
+        excess = len(self._jobs) - self.history
+        if excess <= 0:
+            return
+        for job_id in [jid for jid, j in self._jobs.items() if j.status in ("done", "failed")][:excess]:
+            del self._jobs[job_id]
+
+    def _worker(self) -> None:
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                return
+            try:
+                self._run_job(job)
+            except Exception as exc:  # nothing may take a worker thread down
+                self.worker_errors += 1
+                self.last_error = f"{type(exc).__name__}: {exc}"
+            finally:
+                job.args = ()  # release the transcript
+
+    def _run_job(self, job: EvaluationJob) -> None:
+        if not job.future.set_running_or_notify_cancel():
+            # the waiting request went away before a worker got to it
+            job.error = "cancelled"
+            job.status = "failed"
+            job.finished_at = time.time()
+            return
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            cached = EVALUATION_CACHE.get_disk(job.cache_key)
+            if cached is not None:
+                job.cached = True
+                self._finish(job, cached)
+                return
+            fn = EVALUATION_KINDS[job.kind]
+            if self._pool:
+                result = self._pool.submit(fn, *job.args).result()
+            else:
+                result = fn(*job.args)
+            EVALUATION_CACHE.put(job.cache_key, result)
+            self._finish(job, result)
+        except Exception as exc:
+            job.error = str(exc)
+            job.status = "failed"
+            job.finished_at = time.time()
+            if not job.future.done():
+                job.future.set_exception(exc)
+
+    def _finish(self, job: EvaluationJob, result: Dict[str, Any]) -> None:
+        job.result = result
+        job.status = "done"
+        job.finished_at = time.time()
+        if not job.future.done():
+            job.future.set_result(result)
+        if job.session_id:
+            self._persist_later(job)  # a failed write never fails a computed evaluation
+
+    def _persist_later(self, job: EvaluationJob) -> None:
+        with self._lock:
+            if self._persister is None:
+                self._persister = ThreadPoolExecutor(max_workers=1, thread_name_prefix="eval-persist")
+            persister = self._persister
+        persister.submit(self._persist, job)
+
+    def _persist(self, job: EvaluationJob) -> None:
+        try:
+            transcript_service.save_evaluation(job.session_id, job.to_dict())
+        except Exception as exc:
+            self.persist_errors += 1
+            self.last_error = f"{type(exc).__name__}: {exc}"
+
+
+EVALUATION_QUEUE = EvaluationJobQueue()
@@ -0,0 +1,199 @@
+# backend/app/services/lexicon.py
+
+import re
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+# ===================== Phrase Lexicons =====================
+
+# Medical evidence markers (statistics, endpoints, trial design, safety, biomarkers, RWE, guidelines)
+EVIDENCE_TERMS = (
+    # Statistical evidence
+    "n=", "p=", "p-value", "confidence interval", "ci", "hazard ratio", "hr", "odds ratio", "or",
+    # Clinical endpoints
+    "primary endpoint", "secondary endpoint", "efficacy", "response rate", "remission rate",
+    "progression-free survival", "pfs", "overall survival", "os", "disease-free survival", "dfs",
+    # Trial design
+    "randomized", "rct", "double-blind", "placebo-controlled", "phase", "multicenter",
+    # Safety data
+    "adverse events", "ae", "serious adverse events", "sae", "toxicity", "safety profile",
+    # Biomarkers
+    "biomarker", "genetic", "mutation", "expression", "receptor", "pathway",
+    # Real-world evidence
+    "real-world", "registry", "observational", "post-marketing", "surveillance",
+    # Guidelines/standards
+    "guidelines", "consensus", "recommendation", "standard of care", "treatment algorithm",
+)
+
+# Marketing hype (patience drain)
+HYPE_TERMS = ("best", "revolutionary", "amazing", "unbelievable", "game-changing")
+
+# Hype that ends the call outright when patience is exhausted
+STRONG_HYPE_TERMS = ("best", "revolutionary", "amazing")
+
+# Hype flagged as an unsupported claim by the structured evaluator
+VAGUE_CLAIM_TERMS = ("best", "revolutionary", "amazing", "unbelievable")
+
+# Rep repeating themselves
+REPETITION_TERMS = ("as i said", "like i mentioned", "again", "repeating")
+
+EVIDENCE = "evidence"
+HYPE = "hype"
+STRONG_HYPE = "strong_hype"
+VAGUE_CLAIM = "vague_claim"
+REPETITION = "repetition"
+
+# ===================== Compiled Matcher =====================
+
+_TERMINAL = ""
+_WORD_CHAR = re.compile(r"\w")
+
+
+def _is_word(ch: str) -> bool:
+    return _WORD_CHAR.match(ch) is not None
+
+
+def _insert(trie: Dict[str, Any], term: str, tail: str = "") -> None:
+    node = trie
+    for ch in term:
+        node = node.setdefault(ch, {})
+    node[_TERMINAL] = tail
+
+
+def _trie_to_pattern(node: Dict[str, Any], tail: Optional[str] = None) -> str:
+    """
+    Render a character trie as a regex. `tail` is appended wherever a term ends;
+    when None, each term's own tail (stored by `_insert`) is used.
+    """
+    alternatives = [re.escape(ch) + _trie_to_pattern(child, tail) for ch, child in sorted(node.items()) if ch]
+    if _TERMINAL in node:
+        alternatives.append(node[_TERMINAL] if tail is None else tail)  # after children so the longest term wins
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return "(?:" + "|".join(alternatives) + ")"
+
+
+def trie_pattern(terms: Mapping[str, str]) -> str:
+    """
+    Regex alternation over `terms` (term -> tail regex required after it), shaped
+    as a trie so matching cost does not grow with the number of terms. At any
+    position the longest term whose tail holds wins.
+    """
+    trie: Dict[str, Any] = {}
+    for term, tail in terms.items():
+        _insert(trie, term, tail)
+    return _trie_to_pattern(trie) if trie else r"(?!)"
+
+
+class LexiconMatcher:
+    """
+    Single-pass matcher over several named phrase lexicons.
+
+    All terms are folded into one character trie and compiled into a single regex,
+    so scanning an utterance costs one pass whose work depends on the text length,
+    not on how many terms the lexicons hold.
+
+    With `word_boundary=True` a term only matches as a whole word ("or" does not
+    fire inside "for"); terms of 4+ characters also accept a plural "s".
+    Matching is case-insensitive: text is lower-cased before scanning.
+    """
+
+    def __init__(self, lexicons: Mapping[str, Iterable[str]], word_boundary: bool = True):
+        self.word_boundary = word_boundary
+        self._categories: Dict[str, FrozenSet[str]] = {}
+        for category, terms in lexicons.items():
+            for term in terms:
+                key = term.lower()
+                if key:
+                    self._categories[key] = self._categories.get(key, frozenset()) | {category}
+        self._pattern = self._compile(self._categories)
+        # A hit on a longer term hides shorter terms that start where it does, so
+        # let the longer term carry the categories of the terms nested inside it.
+        nested = {term: self._nested_categories(term) for term in self._categories}
+        self._categories = nested
+
+    def _compile(self, terms: Iterable[str]) -> "re.Pattern[str]":
+        # zero-width lookahead so a hit is tried at every position (overlaps included), as in compliance.py
+        if not self.word_boundary:
+            return re.compile("(?=(" + trie_pattern({term: "" for term in terms}) + "))")
+
+        short_tail = r"(?!\w)"
+        plural_tail = r"s?(?!\w)"
+        branches = []
+        for lead, group in (
+            (r"(?<!\w)", [t for t in terms if _is_word(t[0])]),
+            ("", [t for t in terms if not _is_word(t[0])]),
+        ):
+            if not group:
+                continue
+            tries: Dict[str, Dict[str, dict]] = {"short": {}, "plural": {}, "open": {}}
+            for term in group:
+                if not _is_word(term[-1]):
+                    _insert(tries["open"], term)
+                elif len(term) >= 4:
+                    _insert(tries["plural"], term)
+                else:
+                    _insert(tries["short"], term)
+            parts = [
+                _trie_to_pattern(trie, tail)
+                for trie, tail in ((tries["plural"], plural_tail), (tries["short"], short_tail), (tries["open"], ""))
+                if trie
+            ]
+            branches.append(lead + "(?:" + "|".join(parts) + ")")
+        return re.compile("(?=(" + ("|".join(branches) if branches else r"(?!)") + "))")
+
+    def _nested_categories(self, term: str) -> FrozenSet[str]:
+        found = set(self._categories[term])
+        for i in range(len(term)):
+            if self.word_boundary and i and _is_word(term[i]) and _is_word(term[i - 1]):
+                continue
+            for j in range(i + 1, len(term) + 1):
+                sub = term[i:j]
+                if sub == term or sub not in self._categories:
+                    continue
+                if self.word_boundary and j < len(term) and _is_word(term[j - 1]) and _is_word(term[j]):
+                    continue
+                found |= self._categories[sub]
+        return frozenset(found)
+
+    def _lookup(self, matched: str):
+        if matched in self._categories:
+            return matched
+        if matched.endswith("s") and matched[:-1] in self._categories:
+            return matched[:-1]
+        return None
+
+    def __len__(self) -> int:
+        return len(self._categories)
+
+    def finditer(self, text: str) -> Iterator[Tuple[str, int, int]]:
+        """Yield (term, start, end) for the longest hit starting at each position in `text`, overlaps included."""
+        for m in self._pattern.finditer(text.lower()):
+            key = self._lookup(m.group(1))
+            if key is not None:
+                yield key, m.start(), m.start() + len(m.group(1))
+
+    def terms(self, text: str) -> List[str]:
+        """Return the matched terms in order of appearance."""
+        return [term for term, _, _ in self.finditer(text)]
+
+    def categories(self, text: str) -> FrozenSet[str]:
+        """Return every lexicon category with at least one hit in `text`."""
+        found: FrozenSet[str] = frozenset()
+        for term, _, _ in self.finditer(text):
+            found = found | self._categories[term]
+        return found
+
+
+# Shared matcher for tone control and evaluation, compiled once at import
+TONE_LEXICON = LexiconMatcher({
+    EVIDENCE: EVIDENCE_TERMS,
+    HYPE: HYPE_TERMS,
+    STRONG_HYPE: STRONG_HYPE_TERMS,
+    VAGUE_CLAIM: VAGUE_CLAIM_TERMS,
+    REPETITION: REPETITION_TERMS,
+})
+
+
+def scan(text: str) -> FrozenSet[str]:
+    """Return the tone-lexicon categories hit anywhere in `text` (one pass)."""
+    return TONE_LEXICON.categories(text)
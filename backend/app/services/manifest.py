@@ -0,0 +1,139 @@
+# backend/app/services/manifest.py
+"""
+Append-only index of stored sessions (manifest.jsonl next to the session shards).
+
+One JSON line per change:
+    {"op": "put", "session_id", "persona_id", "created_at", "size", "path"}
+    {"op": "del", "session_id"}
+
+The in-memory view is kept sorted by created_at, so listings and time-range
+queries never walk the storage directories. Other processes append to the same
+file; each instance reads only the bytes added since it last looked.
+"""
+
+import bisect
+import json
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class SessionManifest:
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._order: List[Tuple[str, str]] = []  # (created_at, session_id), sorted
+        self._offset = 0
+        self._lines = 0
+        self._lock = threading.Lock()
+
+    # ----- reading -----
+
+    def _refresh(self) -> None:
+        """Apply lines appended since the last read (caller holds the lock)."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        if size < self._offset:  # rewritten by compact() elsewhere
+            self._entries, self._order, self._offset, self._lines = {}, [], 0, 0
+        if size == self._offset:
+            return
+        with open(self.path, "rb") as fh:
+            fh.seek(self._offset)
+            chunk = fh.read(size - self._offset)
+        end = chunk.rfind(b"\n") + 1  # a line still being written is picked up next time
+        for line in chunk[:end].splitlines():
+            try:
+                self._apply(json.loads(line))
+            except (ValueError, KeyError):
+                continue
+            self._lines += 1
+        self._offset += end
+
+    def _apply(self, event: Dict[str, Any]) -> None:
+        session_id = event["session_id"]
+        old = self._entries.get(session_id)
+        if event.get("op") == "del":
+            if old is not None:
+                del self._entries[session_id]
+                self._order.pop(bisect.bisect_left(self._order, (old["created_at"], session_id)))
+            return
+        entry = {k: event.get(k) for k in ("session_id", "persona_id", "created_at", "size", "path")}
+        if old is not None:
+            entry["created_at"] = old["created_at"]  # first write wins; re-saves only update the rest
+            entry["persona_id"] = entry["persona_id"] or old["persona_id"]
+        else:
+            entry["created_at"] = entry["created_at"] or ""
+            bisect.insort(self._order, (entry["created_at"], session_id))
+        self._entries[session_id] = entry
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            entry = self._entries.get(session_id)
+            return dict(entry) if entry else None
+
+    def query(self, since: Optional[str] = None, until: Optional[str] = None,
+              persona_id: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Entries created in [since, until), oldest first."""
+        with self._lock:
+            self._refresh()
+            lo = bisect.bisect_left(self._order, (since,)) if since else 0
+            hi = bisect.bisect_left(self._order, (until,)) if until else len(self._order)
+            out = []
+            for _, session_id in self._order[lo:hi]:
+                entry = self._entries[session_id]
+                if persona_id is not None and entry["persona_id"] != persona_id:
+                    continue
+                out.append(dict(entry))
+                if limit is not None and len(out) >= limit:
+                    break
+            return out
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._entries)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.query())
+
+    # ----- writing -----
+
+    def _append(self, event: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "ab") as fh:  # O_APPEND: concurrent writers never interleave a line
+            fh.write((json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    def put(self, session_id: str, persona_id: Optional[str], created_at: Optional[str], size: int, path: str) -> None:
+        event = {"op": "put", "session_id": session_id, "persona_id": persona_id,
+                 "created_at": created_at, "size": size, "path": path}
+        with self._lock:
+            self._append(event)
+            self._refresh()
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._append({"op": "del", "session_id": session_id})
+            self._refresh()
+            if self._lines > 2 * len(self._entries) + 1000:
+                self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        """Rewrite the file with one put line per live session."""
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            for _, session_id in self._order:
+                fh.write((json.dumps({"op": "put", **self._entries[session_id]}, ensure_ascii=False) + "\n").encode("utf-8"))
+        os.replace(tmp, self.path)
+        self._offset = os.path.getsize(self.path)
+        self._lines = len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh()
+            return {"sessions": len(self._entries), "lines": self._lines, "bytes": self._offset,
+                    "oldest": self._order[0][0] if self._order else None,
+                    "newest": self._order[-1][0] if self._order else None}
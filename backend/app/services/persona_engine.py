@@ -1,36 +1,78 @@
 from __future__ import annotations
 
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import struct
+import time
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Literal, List, Dict, Any
+from typing import Literal, List, Dict, Any, Deque, Mapping, Sequence, Tuple
 from datetime import datetime
 
+from app.services.session_cache import LiveSessionMap
+
 Mood = Literal["Neutral", "Engaged", "Dismissive"]
 Stage = Literal["Introduction", "Discussion", "ObjectionDiscussion", "Closure"]
 Skepticism = Literal["Low", "Medium", "High"]
 
 
-@dataclass
-class SkepticismState:
-    scores: List[int] = field(default_factory=list)  # -1,0,1 history
+MOODS: Tuple[Mood, ...] = ("Neutral", "Engaged", "Dismissive")
+STAGES: Tuple[Stage, ...] = ("Introduction", "Discussion", "ObjectionDiscussion", "Closure")
+SKEPTICISM_LEVELS: Tuple[Skepticism, ...] = ("Low", "Medium", "High")
+_BASELINE_NUMERIC = {"Low": 1, "Medium": 2, "High": 3}
+
+SKEPTICISM_WINDOW = 5
 
-    def update(self, latest: int, max_window: int = 5) -> None:
-        self.scores.append(latest)
-        if len(self.scores) > max_window:
-            self.scores.pop(0)
+
+@dataclass(slots=True)
+class SkepticismState:
+    """Last `SKEPTICISM_WINDOW` relevancy scores (-1, 0, 1) in a fixed ring with a running sum."""
+    ring: List[int] = field(default_factory=lambda: [0] * SKEPTICISM_WINDOW)
+    head: int = 0  # slot the next score goes into
+    count: int = 0
+    total: int = 0
+
+    @classmethod
+    def from_scores(cls, scores: List[int]) -> "SkepticismState":
+        state = cls()
+        for score in scores[-SKEPTICISM_WINDOW:]:
+            state.update(score)
+        return state
+
+    @property
+    def scores(self) -> List[int]:
+        """Window contents, oldest first."""
+        start = (self.head - self.count) % SKEPTICISM_WINDOW
+        return [self.ring[(start + i) % SKEPTICISM_WINDOW] for i in range(self.count)]
+
+    def update(self, latest: int, max_window: int = SKEPTICISM_WINDOW) -> None:
+        if max_window != SKEPTICISM_WINDOW:
+            raise ValueError(f"Skepticism window is fixed at {SKEPTICISM_WINDOW}")
+        if self.count == SKEPTICISM_WINDOW:
+            self.total -= self.ring[self.head]  # overwrite the oldest
+        else:
+            self.count += 1
+        self.ring[self.head] = latest
+        self.total += latest
+        self.head = (self.head + 1) % SKEPTICISM_WINDOW
 
     def level(self, baseline: Skepticism) -> Skepticism:
-        sum_scores = sum(self.scores)
-        baseline_numeric = {"Low": 1, "Medium": 2, "High": 3}[baseline]
+        baseline_numeric = _BASELINE_NUMERIC[baseline]
         upper = baseline_numeric + 1
         lower = baseline_numeric - 1
-        if sum_scores >= upper:
+        if self.total >= upper:
             return "Low"
-        if sum_scores <= lower:
+        if self.total <= lower:
             return "High"
         return "Medium"
 
 
-@dataclass
+@dataclass(slots=True)
 class DoctorState:
     mood: Mood = "Neutral"
     time_pressure_level: int = 1  # 0-5
@@ -41,6 +83,110 @@ class DoctorState:
     current_skepticism_level: Skepticism = "Medium"
     notes: str | None = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Readable, JSON-ready view (for display; clients round-trip `encode_state` tokens)."""
+        return {
+            "mood": self.mood,
+            "time_pressure_level": self.time_pressure_level,
+            "stage": self.stage,
+            "seconds_elapsed": self.seconds_elapsed,
+            "trust": self.trust,
+            "skepticism_scores": self.skepticism_state.scores,
+            "current_skepticism_level": self.current_skepticism_level,
+            "notes": self.notes,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any], baseline: Skepticism = "Medium") -> "DoctorState":
+        """Legacy path: rebuild from a client-supplied dict, falling back to defaults on bad values."""
+        scores = data.get("skepticism_scores")
+        if scores is None:
+            skepticism_state = data.get("skepticism_state")
+            scores = skepticism_state.get("scores", []) if isinstance(skepticism_state, Mapping) else []
+        return cls(
+            mood=data.get("mood") if data.get("mood") in MOODS else "Neutral",
+            time_pressure_level=max(0, min(5, int(data.get("time_pressure_level", 1)))),
+            stage=data.get("stage") if data.get("stage") in STAGES else "Introduction",
+            seconds_elapsed=max(0, min(0xFFFFFFFF, int(data.get("seconds_elapsed", 0)))),
+            trust=max(0, min(100, int(data.get("trust", 50)))),
+            skepticism_state=SkepticismState.from_scores([max(-1, min(1, int(x))) for x in scores]),
+            current_skepticism_level=(
+                data.get("current_skepticism_level")
+                if data.get("current_skepticism_level") in SKEPTICISM_LEVELS else baseline
+            ),
+        )
+
+
+# ===================== State Token Codec =====================
+
+# Bump when the packed layout or the signature changes; older tokens are then rejected
+STATE_TOKEN_VERSION = 2
+# Tokens are signed so clients can carry state without being able to edit it. Without a
+# configured secret each process signs with its own random key: tokens then stop working
+# across restarts and between workers, so set STATE_TOKEN_SECRET in any real deployment.
+STATE_TOKEN_SECRET = (os.environ.get("STATE_TOKEN_SECRET") or os.environ.get("SECRET_KEY") or "").encode()
+if not STATE_TOKEN_SECRET:
+    STATE_TOKEN_SECRET = secrets.token_bytes(32)
+    logging.getLogger(__name__).warning(
+        "STATE_TOKEN_SECRET is not set; signing state tokens with a per-process random key")
+_STATE_LAYOUT = struct.Struct(">BBBBBBIB5b")  # version, mood, stage, skepticism, pressure, trust, seconds, n, window
+_STATE_TAG_LEN = 8
+
+
+class StateTokenError(ValueError):
+    """Raised when a state token is malformed, from another version, or tampered with."""
+
+
+def _state_tag(body: bytes, session_id: str) -> bytes:
+    # the session id is signed too, so a token cannot be replayed into another session
+    message = session_id.encode("utf-8") + b"\x00" + body
+    return hmac.new(STATE_TOKEN_SECRET, message, hashlib.sha256).digest()[:_STATE_TAG_LEN]
+
+
+def encode_state(state: DoctorState, session_id: str) -> str:
+    """Short opaque token (32 chars) for one session, carrying everything but the free-text notes."""
+    scores = state.skepticism_state.scores
+    body = _STATE_LAYOUT.pack(
+        STATE_TOKEN_VERSION,
+        MOODS.index(state.mood),
+        STAGES.index(state.stage),
+        SKEPTICISM_LEVELS.index(state.current_skepticism_level),
+        state.time_pressure_level,
+        state.trust,
+        state.seconds_elapsed,
+        len(scores),
+        *(scores + [0] * (SKEPTICISM_WINDOW - len(scores))),
+    )
+    return base64.urlsafe_b64encode(body + _state_tag(body, session_id)).decode("ascii").rstrip("=")
+
+
+def decode_state(token: str, session_id: str) -> DoctorState:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (ValueError, TypeError):
+        raise StateTokenError("State token is not valid base64")
+    if len(raw) != _STATE_LAYOUT.size + _STATE_TAG_LEN:
+        raise StateTokenError("State token has the wrong length")
+    body, tag = raw[:_STATE_LAYOUT.size], raw[_STATE_LAYOUT.size:]
+    if not hmac.compare_digest(tag, _state_tag(body, session_id)):
+        raise StateTokenError("State token signature mismatch")
+    version, mood, stage, skepticism, pressure, trust, seconds, n, *window = _STATE_LAYOUT.unpack(body)
+    if version != STATE_TOKEN_VERSION:
+        raise StateTokenError(f"Unsupported state token version {version}")
+    if (mood >= len(MOODS) or stage >= len(STAGES) or skepticism >= len(SKEPTICISM_LEVELS)
+            or pressure > 5 or trust > 100 or n > SKEPTICISM_WINDOW
+            or any(x not in (-1, 0, 1) for x in window)):
+        raise StateTokenError("State token holds out-of-range values")
+    return DoctorState(
+        mood=MOODS[mood],
+        time_pressure_level=pressure,
+        stage=STAGES[stage],
+        seconds_elapsed=seconds,
+        trust=trust,
+        skepticism_state=SkepticismState.from_scores(window[:n]),
+        current_skepticism_level=SKEPTICISM_LEVELS[skepticism],
+    )
+
 
 def transition_mood(current: Mood, relevancy: int, time_pressure_level: int) -> Mood:
     t = max(0, min(5, time_pressure_level))
@@ -59,7 +205,7 @@ def update_state(
     time_delta: int,
     baseline_skepticism: Skepticism,
 ) -> DoctorState:
-    relevancy = int(llm_result.get("relevancy", 0))
+    relevancy = max(-1, min(1, int(llm_result.get("relevancy", 0))))
     next_mood: Mood | None = llm_result.get("nextMood")  # optional; we still compute fallback
 
     new_trust = max(0, min(100, state.trust + relevancy * 10))
@@ -77,12 +223,14 @@ def update_state(
 
     # mood
     computed_mood = transition_mood(state.mood, relevancy, new_time)
-    final_mood: Mood = next_mood if next_mood in ("Neutral", "Engaged", "Dismissive") else computed_mood
+    final_mood: Mood = next_mood if next_mood in MOODS else computed_mood
+
+    next_stage = llm_result.get("nextConversationStage")
 
     return DoctorState(
         mood=final_mood,
         time_pressure_level=new_time,
-        stage=llm_result.get("nextConversationStage", state.stage),
+        stage=next_stage if next_stage in STAGES else state.stage,
         seconds_elapsed=state.seconds_elapsed + max(0, int(time_delta)),
         trust=new_trust,
         skepticism_state=state.skepticism_state,
@@ -91,23 +239,27 @@ def update_state(
     )
 
 
-def create_system_prompt(
-    persona: Dict[str, Any],
-    state: DoctorState,
-    remaining_time: int,
-    conversation_transcript: List[Dict[str, str]],
-    last_rep_message: str,
-) -> str:
-    def join(arr: List[str]) -> str:
-        return ", ".join(arr) if arr else "None"
-
-    transcript_str = "\n".join(
-        [
-            f"[{m.get('timestamp') or datetime.utcnow().isoformat()}] {'Rep' if m['role']=='rep' else 'Doctor'}: {m['content']}"
-            for m in conversation_transcript
-        ]
-    )
+# ===================== Prompt Builder =====================
+
+# Rough prompt budget for the transcript-bearing system prompt (≈4 chars per token)
+PROMPT_TOKEN_BUDGET = int(os.environ.get("PROMPT_TOKEN_BUDGET", "3000"))
+# When over budget, fold old turns until the verbatim transcript is back under
+# this fraction of its share, so the summary (and the prefix after it) changes rarely
+PROMPT_FOLD_TARGET = float(os.environ.get("PROMPT_FOLD_TARGET", "0.7"))
+# Recent folded rep lines quoted in the summary
+SUMMARY_EXCERPTS = 3
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
 
+
+def _join(arr: List[str]) -> str:
+    return ", ".join(arr) if arr else "None"
+
+
+def render_persona_prefix(persona: Mapping[str, Any]) -> str:
+    """Everything in the prompt that only depends on the persona."""
     return f"""
 You are a medical doctor engaged in a professional sales consultation with a medical representative (the "rep").
 
@@ -120,40 +272,17 @@ You have a fixed persona that defines your professional traits. However, your be
 - ID: {persona['id']}
 - Description: {persona['description']}
 - Communication style: {persona['communication_style']}
-- Decision factors: {join(persona['decision_factors'])}
+- Decision factors: {_join(persona['decision_factors'])}
 - Knowledge level: {persona['knowledge_level']}
 - Consultation style: {persona['consultation_style']}
-- Typical objections: {join(persona['typical_objections'])}
-- Preferred evidence: {join(persona['preferred_evidence'])}
+- Typical objections: {_join(persona['typical_objections'])}
+- Preferred evidence: {_join(persona['preferred_evidence'])}
 - Gender: {persona.get('gender','Not specified')}
 - Available consultation time: {persona['availableTimeSeconds']} seconds
 - Baseline skepticism level: {persona['skepticism_level']}
 - Behavioral triggers:
-    - Positive: {join(persona['behavioral_triggers']['positive'])}
-    - Negative: {join(persona['behavioral_triggers']['negative'])}
-
----
-
-### Dynamic State (subject to change):
-
-- Mood: {state.mood}
-- Current skepticism level: {state.current_skepticism_level}
-- Current Stage: {state.stage}
-- Time pressure level: {state.time_pressure_level}
-- Remaining time: {remaining_time} seconds
-
----
-
-### Conversation Transcript (chronological):
-
-{transcript_str}
-
----
-
-### Last Rep Message:
-{last_rep_message}
-
-Always base your reply and analysis only on this message.
+    - Positive: {_join(persona['behavioral_triggers']['positive'])}
+    - Negative: {_join(persona['behavioral_triggers']['negative'])}
 
 ---
 
@@ -176,7 +305,175 @@ Return ONLY JSON:
   "nextMood": "Neutral" | "Engaged" | "Dismissive",
   "signals": ["asks for data"]
 }}
+
+The conversation so far and your current state follow.
+
+---
+"""
+
+
+_PERSONA_PREFIXES: Dict[str, str] = {}
+
+
+def persona_prefix(persona: Mapping[str, Any]) -> str:
+    """Rendered once per persona version (edited personas re-render)."""
+    version = getattr(persona, "version", None)
+    key = f"{persona['id']}@{version}" if version else json.dumps(persona, sort_keys=True, ensure_ascii=False)
+    prefix = _PERSONA_PREFIXES.get(key)
+    if prefix is None:
+        prefix = _PERSONA_PREFIXES[key] = render_persona_prefix(persona)
+    return prefix
+
+
+def render_transcript_line(message: Dict[str, Any]) -> str:
+    timestamp = message.get("timestamp") or datetime.utcnow().isoformat()
+    speaker = "Rep" if message.get("role") == "rep" else "Doctor"
+    return f"[{timestamp}] {speaker}: {message.get('content', '')}\n"
+
+
+class PromptBuilder:
+    """
+    Incremental system prompt for one conversation.
+
+    Layout, most stable first so upstream prefix caching keeps hitting:
+    persona prefix (fixed per persona) -> summary of folded turns (changes only
+    when a batch of turns is folded) -> verbatim recent turns (append-only) ->
+    dynamic state and last rep message (change every turn).
+
+    Each transcript line is rendered exactly once. When the prompt would exceed
+    `token_budget`, the oldest verbatim turns are folded into the summary.
+    """
+
+    def __init__(self, persona: Mapping[str, Any], token_budget: int = PROMPT_TOKEN_BUDGET):
+        self.persona = persona
+        self.prefix = persona_prefix(persona)
+        self.token_budget = token_budget
+        self.turn_count = 0
+        self._recent: Deque[Tuple[str, str, int]] = deque()  # (role, line, tokens)
+        self._recent_text = ""
+        self._recent_tokens = 0
+        self._folded = {"rep": 0, "doctor": 0}
+        self._folded_since = ""
+        self._folded_until = ""
+        self._excerpts: Deque[str] = deque(maxlen=SUMMARY_EXCERPTS)
+        self._summary = ""
+        self.last_stats: Dict[str, Any] = {}
+
+    def add(self, message: Dict[str, Any]) -> None:
+        line = render_transcript_line(message)
+        role = "rep" if message.get("role") == "rep" else "doctor"
+        self._recent.append((role, line, estimate_tokens(line)))
+        self._recent_text += line
+        self._recent_tokens += self._recent[-1][2]
+        self.turn_count += 1
+
+    def sync(self, transcript: List[Dict[str, Any]]) -> None:
+        """Append whatever part of `transcript` this builder has not seen yet."""
+        for message in transcript[self.turn_count:]:
+            self.add(message)
+
+    def _transcript_budget(self, dynamic_tokens: int) -> int:
+        fixed = estimate_tokens(self.prefix) + estimate_tokens(self._summary) + dynamic_tokens
+        return max(0, self.token_budget - fixed)
+
+    def _fold(self, budget: int) -> bool:
+        target = int(budget * PROMPT_FOLD_TARGET)
+        folded = False
+        # keep at least the latest turn verbatim
+        while len(self._recent) > 1 and self._recent_tokens > target:
+            role, line, tokens = self._recent.popleft()
+            folded = True
+            self._recent_tokens -= tokens
+            self._folded[role] += 1
+            stamp = line[1:line.index("]")] if line.startswith("[") and "]" in line else ""
+            self._folded_since = self._folded_since or stamp
+            self._folded_until = stamp
+            if role == "rep":
+                text = line.split(": ", 1)[-1].strip()
+                self._excerpts.append(text if len(text) <= 120 else text[:117] + "...")
+        if not folded:
+            return False
+        self._recent_text = "".join(line for _, line, _ in self._recent)
+        excerpts = "\n".join(f'- "{e}"' for e in self._excerpts)
+        self._summary = (
+            f"### Earlier Conversation (summarized):\n\n"
+            f"{self._folded['rep']} rep and {self._folded['doctor']} doctor turns "
+            f"from {self._folded_since} to {self._folded_until}.\n"
+            + (f"Most recent earlier rep points:\n{excerpts}\n" if excerpts else "")
+            + "\n---\n\n"
+        )
+        return True
+
+    def render(self, state: "DoctorState", remaining_time: int, last_rep_message: str,
+               pending: Sequence[Dict[str, Any]] = ()) -> str:
+        """
+        The prompt for the next reply. `pending` messages (this turn's rep
+        message) are rendered after the transcript but not added: add() them
+        once the turn is stored, so a failed turn leaves the builder unchanged.
+        """
+        start = time.perf_counter()
+        pending_text = "".join(render_transcript_line(m) for m in pending)
+        dynamic = f"""
+---
+
+### Dynamic State (subject to change):
+
+- Mood: {state.mood}
+- Current skepticism level: {state.current_skepticism_level}
+- Current Stage: {state.stage}
+- Time pressure level: {state.time_pressure_level}
+- Remaining time: {remaining_time} seconds
+
+---
+
+### Last Rep Message:
+{last_rep_message}
+
+Always base your reply and analysis only on this message.
 """
+        budget = self._transcript_budget(estimate_tokens(dynamic) + estimate_tokens(pending_text))
+        folded = self._recent_tokens > budget and self._fold(budget)
+        prompt = (
+            self.prefix + self._summary
+            + "### Conversation Transcript (chronological):\n\n" + self._recent_text + pending_text + dynamic
+        )
+        self.last_stats = {
+            "chars": len(prompt),
+            "tokens_est": estimate_tokens(prompt),
+            "build_ms": round((time.perf_counter() - start) * 1e3, 3),
+            "verbatim_turns": len(self._recent),
+            "summarized_turns": self._folded["rep"] + self._folded["doctor"],
+            "folded_this_turn": folded,
+            "stable_prefix_chars": len(self.prefix) + len(self._summary),
+        }
+        return prompt
+
+
+# Live prompt builders keyed by session id; abandoned sessions age out (rebuilt by sync() on the next turn)
+PROMPT_BUILDERS = LiveSessionMap()
 
 
+def get_prompt_builder(session_id: str, persona: Mapping[str, Any]) -> PromptBuilder:
+    """Existing builder for the session, or a fresh one (e.g. after a restart; sync() catches it up)."""
+    builder = PROMPT_BUILDERS.get(session_id)
+    if builder is None or builder.persona is not persona:  # new session or persona reloaded
+        builder = PromptBuilder(persona)
+        PROMPT_BUILDERS.put(session_id, builder)
+    return builder
 
+
+def close_prompt_builder(session_id: str) -> None:
+    PROMPT_BUILDERS.pop(session_id)
+
+
+def create_system_prompt(
+    persona: Mapping[str, Any],
+    state: DoctorState,
+    remaining_time: int,
+    conversation_transcript: List[Dict[str, str]],
+    last_rep_message: str,
+) -> str:
+    """One-off prompt; live sessions should keep a PromptBuilder instead."""
+    builder = PromptBuilder(persona)
+    builder.sync(conversation_transcript)
+    return builder.render(state, remaining_time, last_rep_message)
@@ -0,0 +1,73 @@
+# backend/app/services/reply_stream.py
+"""
+Incremental extraction of one string field from JSON that is still being
+generated, for streaming the doctor's reply text out of the turn model's
+{"doctorReply": "...", "relevancy": ..., ...} answer before the JSON is complete.
+"""
+
+import json
+import re
+from typing import Any, Dict
+
+
+class JsonStringFieldStream:
+    """
+    Feed the model output as it arrives; each feed() returns the newly decoded
+    part of the field's value (escapes resolved). Escape sequences split across
+    chunks are held back until complete.
+    """
+
+    def __init__(self, field: str):
+        self._key = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self.done = False
+        self.text = ""
+
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk
+        if self.done:
+            return ""
+        if not self._started:
+            match = self._key.search(self._buffer)
+            if match is None:
+                return ""
+            self._started = True
+            self._pos = match.end()
+        out = []
+        buffer, pos = self._buffer, self._pos
+        while pos < len(buffer):
+            char = buffer[pos]
+            if char == '"':
+                self.done = True
+                pos += 1
+                break
+            if char != "\\":
+                out.append(char)
+                pos += 1
+                continue
+            if pos + 1 >= len(buffer):
+                break  # wait for the rest of the escape
+            if buffer[pos + 1] != "u":
+                out.append(json.loads(f'"{buffer[pos:pos + 2]}"'))
+                pos += 2
+                continue
+            escape = buffer[pos:pos + 6]
+            if len(escape) < 6:
+                break
+            if 0xD800 <= int(escape[2:], 16) < 0xDC00:  # high surrogate: needs its pair
+                if len(buffer) < pos + 12:
+                    break
+                escape = buffer[pos:pos + 12]
+            out.append(json.loads(f'"{escape}"'))
+            pos += len(escape)
+        self._pos = pos
+        delta = "".join(out)
+        self.text += delta
+        return delta
+
+
+def sse(event: str, data: Dict[str, Any]) -> str:
+    """One server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
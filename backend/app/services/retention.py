@@ -0,0 +1,125 @@
+# backend/app/services/retention.py
+"""
+Background retention sweeper: sessions older than TRANSCRIPT_RETENTION_DAYS are
+archived (or deleted) in batches of TRANSCRIPT_RETENTION_BATCH, with the event
+loop free between batches. Candidates come from the manifest / database index,
+never from listing the storage directories.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from app.services import transcript_service
+from app.services.storage import STORAGE
+
+# ===================== Configuration =====================
+
+# Age in days after which sessions leave live storage; 0 keeps everything
+TRANSCRIPT_RETENTION_DAYS = float(os.environ.get("TRANSCRIPT_RETENTION_DAYS", "0"))
+# "archive" (pack into compressed segments under TRANSCRIPT_ARCHIVE_DIR) or "delete"
+TRANSCRIPT_RETENTION_ACTION = os.environ.get("TRANSCRIPT_RETENTION_ACTION", "archive").lower()
+TRANSCRIPT_RETENTION_BATCH = int(os.environ.get("TRANSCRIPT_RETENTION_BATCH", "200"))
+# Seconds between sweeps
+TRANSCRIPT_RETENTION_INTERVAL = float(os.environ.get("TRANSCRIPT_RETENTION_INTERVAL", "3600"))
+
+
+class RetentionSweeper:
+
+    def __init__(self, days: float = TRANSCRIPT_RETENTION_DAYS, action: str = TRANSCRIPT_RETENTION_ACTION,
+                 batch_size: int = TRANSCRIPT_RETENTION_BATCH, interval: float = TRANSCRIPT_RETENTION_INTERVAL):
+        if action not in ("archive", "delete"):
+            raise ValueError(f"Unknown retention action: {action}")
+        self.days = days
+        self.action = action
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.swept = 0
+        self.failed = 0
+        self.runs = 0
+        self.failed_runs = 0
+        self.last_run: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def cutoff(self, now: Optional[datetime] = None) -> str:
+        return ((now or datetime.utcnow()) - timedelta(days=self.days)).isoformat() + "Z"
+
+    def sweep_batch(self, cutoff: str) -> int:
+        """Archive or delete up to batch_size sessions created before `cutoff`; returns how many went. Blocking."""
+        session_ids = [e["session_id"] for e in transcript_service.list_sessions(until=cutoff, limit=self.batch_size)]
+        if self.action == "archive":
+            try:  # the whole batch goes into one segment per day
+                done = len(transcript_service.archive_sessions(session_ids))
+            except Exception as exc:  # nothing was deleted; the next sweep retries
+                self.failed += len(session_ids)
+                self.last_error = f"archive: {type(exc).__name__}: {exc}"
+                return 0
+            self.swept += done
+            return done
+        done = 0
+        for session_id in session_ids:
+            try:
+                transcript_service.delete_transcript(session_id, evaluation=True)
+                self.swept += 1
+                done += 1
+            except Exception as exc:  # skip it this round; the next sweep retries
+                self.failed += 1
+                self.last_error = f"{session_id}: {type(exc).__name__}: {exc}"
+        return done
+
+    async def sweep(self) -> int:
+        """One full sweep, a batch at a time on the storage I/O threads."""
+        cutoff = self.cutoff()
+        total = 0
+        while True:
+            done = await STORAGE.run(self.sweep_batch, cutoff)
+            total += done
+            if done < self.batch_size:  # nothing left, or failures to retry next sweep
+                break
+            await asyncio.sleep(0)  # let requests in between batches
+        self.runs += 1
+        self.last_run = time.time()
+        return total
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except Exception as exc:  # e.g. manifest / database I/O: record it and try again next interval
+                self.failed_runs += 1
+                self.last_error = f"sweep: {type(exc).__name__}: {exc}"
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Run sweeps in the background (no-op when retention is disabled)."""
+        if self.days > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.days > 0,
+            "days": self.days,
+            "action": self.action,
+            "batch_size": self.batch_size,
+            "swept": self.swept,
+            "failed": self.failed,
+            "runs": self.runs,
+            "failed_runs": self.failed_runs,
+            "last_run": self.last_run,
+            "last_error": self.last_error,
+        }
+
+
+RETENTION_SWEEPER = RetentionSweeper()
@@ -0,0 +1,239 @@
+# backend/app/services/search_index.py
+"""
+Phrase search over stored transcripts.
+
+An inverted index (term -> positions in (session_id, turn_index)) kept in a
+SQLite FTS5 table next to the transcripts. transcript_service updates it on
+every save, append and delete, so compliance questions ("which sessions this
+month contained 'no side effects'?") are answered from the postings instead
+of by opening every session.
+
+Tables:
+    sessions   one row per indexed session (created_at, persona_id)
+    turns      one row per message: (session, turn_index, role, digest)
+    turn_text  FTS5 over the message text, rowid = turns.id
+
+digest (crc32 of role + content) lets a full save re-index only the turns
+that changed: saves usually repeat the previous messages and add a few.
+"""
+
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id          INTEGER PRIMARY KEY,
+    session_id  TEXT NOT NULL UNIQUE,
+    persona_id  TEXT,
+    created_at  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS turns (
+    id          INTEGER PRIMARY KEY,
+    session     INTEGER NOT NULL,
+    turn_index  INTEGER NOT NULL,
+    role        TEXT,
+    digest      INTEGER NOT NULL,
+    UNIQUE (session, turn_index)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS turn_text USING fts5 (
+    content, tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE INDEX IF NOT EXISTS sessions_created ON sessions (created_at);
+"""
+
+
+class SearchQueryError(ValueError):
+    """Raised for an empty or malformed search."""
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def _digest(message: Dict[str, Any]) -> int:
+    return zlib.crc32(f"{message.get('role')}\x00{message.get('content') or ''}".encode("utf-8"))
+
+
+def match_expression(phrases: Sequence[str]) -> str:
+    """FTS5 query matching any of the phrases (each phrase's words adjacent and in order)."""
+    quoted = ['"' + p.strip().replace('"', '""') + '"' for p in phrases if p and p.strip()]
+    if not quoted:
+        raise SearchQueryError("Give at least one search phrase")
+    return " OR ".join(quoted)
+
+
+class TranscriptSearchIndex:
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        self._writer.executescript(SCHEMA)
+        self.indexed_turns = 0
+        self.queries = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    # ----- connections -----
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _write(self, fn, *args) -> Any:
+        with self._write_lock:
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(conn, *args)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+
+    # ----- maintenance -----
+
+    def _session(self, conn: sqlite3.Connection, session_id: str, persona_id: Optional[str],
+                 created_at: Optional[str]) -> int:
+        conn.execute(
+            "INSERT INTO sessions (session_id, persona_id, created_at) VALUES (?1, ?2, ?3)"
+            " ON CONFLICT(session_id) DO UPDATE SET persona_id = COALESCE(?2, sessions.persona_id)",
+            (session_id, persona_id, created_at or _now()),
+        )
+        return conn.execute("SELECT id FROM sessions WHERE session_id = ?", (session_id,)).fetchone()[0]
+
+    def _truncate(self, conn: sqlite3.Connection, session: int, from_index: int) -> None:
+        conn.execute("DELETE FROM turn_text WHERE rowid IN"
+                     " (SELECT id FROM turns WHERE session = ?1 AND turn_index >= ?2)", (session, from_index))
+        conn.execute("DELETE FROM turns WHERE session = ?1 AND turn_index >= ?2", (session, from_index))
+
+    def _insert(self, conn: sqlite3.Connection, session: int, start: int, messages: List[Dict[str, Any]]) -> None:
+        for offset, message in enumerate(messages):
+            cursor = conn.execute("INSERT INTO turns (session, turn_index, role, digest) VALUES (?, ?, ?, ?)",
+                                  (session, start + offset, message.get("role"), _digest(message)))
+            conn.execute("INSERT INTO turn_text (rowid, content) VALUES (?, ?)",
+                         (cursor.lastrowid, message.get("content") or ""))
+        self.indexed_turns += len(messages)
+
+    def index_session(self, session_id: str, messages: Iterable[Dict[str, Any]], persona_id: Optional[str] = None,
+                      created_at: Optional[str] = None) -> int:
+        """Make the indexed turns of a session equal `messages`. Returns how many turns were (re)indexed."""
+        messages = list(messages)
+
+        def write(conn: sqlite3.Connection) -> int:
+            session = self._session(conn, session_id, persona_id, created_at)
+            digests = [row[0] for row in conn.execute(
+                "SELECT digest FROM turns WHERE session = ? ORDER BY turn_index", (session,))]
+            keep = 0
+            while keep < min(len(digests), len(messages)) and digests[keep] == _digest(messages[keep]):
+                keep += 1
+            if keep < len(digests):
+                self._truncate(conn, session, keep)
+            self._insert(conn, session, keep, messages[keep:])
+            return len(messages) - keep
+
+        return self._write(write)
+
+    def append(self, session_id: str, messages: Iterable[Dict[str, Any]], start: Optional[int] = None) -> bool:
+        """
+        Index messages added after the session's last indexed turn; `start` is
+        the turn index of the first one when the caller knows it. Returns False
+        (and writes nothing) when the session is not indexed yet or its indexed
+        turns are out of step with `start`: index the whole session instead.
+        """
+        messages = list(messages)
+
+        def write(conn: sqlite3.Connection) -> bool:
+            row = conn.execute("SELECT id FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                return False
+            last = conn.execute("SELECT MAX(turn_index) FROM turns WHERE session = ?", (row[0],)).fetchone()[0]
+            following = 0 if last is None else last + 1
+            if start is not None and start != following:
+                return False
+            self._insert(conn, row[0], following, messages)
+            return True
+
+        return self._write(write)
+
+    def delete_session(self, session_id: str) -> None:
+        def write(conn: sqlite3.Connection) -> None:
+            row = conn.execute("SELECT id FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is not None:
+                self._truncate(conn, row[0], 0)
+                conn.execute("DELETE FROM sessions WHERE id = ?", (row[0],))
+
+        self._write(write)
+
+    def record_error(self, exc: Exception) -> None:
+        self.errors += 1
+        self.last_error = f"{type(exc).__name__}: {exc}"
+
+    def optimize(self) -> None:
+        """Merge the FTS segments (after bulk indexing)."""
+        self._write(lambda conn: conn.execute("INSERT INTO turn_text (turn_text) VALUES ('optimize')"))
+
+    # ----- queries -----
+
+    def _query(self, select: str, tail: str, phrases: Sequence[str], role: Optional[str], since: Optional[str],
+               until: Optional[str], persona_id: Optional[str], limit: int) -> List[tuple]:
+        where = ["turn_text MATCH ?"]
+        params: List[Any] = [match_expression(phrases)]
+        for clause, value in (("t.role = ?", role), ("s.created_at >= ?", since),
+                              ("s.created_at < ?", until), ("s.persona_id = ?", persona_id)):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        params.append(limit)
+        self.queries += 1
+        try:
+            return self._reader().execute(
+                f"SELECT {select} FROM turn_text f JOIN turns t ON t.id = f.rowid JOIN sessions s ON s.id = t.session"
+                f" WHERE {' AND '.join(where)} {tail} LIMIT ?", params).fetchall()
+        except sqlite3.OperationalError as exc:  # e.g. a phrase with nothing but punctuation
+            raise SearchQueryError(str(exc)) from exc
+
+    def search(self, phrases: Sequence[str], role: Optional[str] = None, since: Optional[str] = None,
+               until: Optional[str] = None, persona_id: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Turns containing any of the phrases, newest first, filtered by role and session created_at [since, until)."""
+        rows = self._query("s.session_id, t.turn_index, t.role, s.created_at, s.persona_id, f.content",
+                           "ORDER BY f.rowid DESC", phrases, role, since, until, persona_id, limit)
+        return [{"session_id": r[0], "turn_index": r[1], "role": r[2], "created_at": r[3],
+                 "persona_id": r[4], "content": r[5]} for r in rows]
+
+    def sessions(self, phrases: Sequence[str], role: Optional[str] = None, since: Optional[str] = None,
+                 until: Optional[str] = None, persona_id: Optional[str] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Sessions with at least one matching turn, newest first, with the matching turn indexes."""
+        rows = self._query("s.session_id, s.created_at, s.persona_id, group_concat(t.turn_index)",
+                           "GROUP BY s.id ORDER BY s.created_at DESC", phrases, role, since, until, persona_id, limit)
+        return [{"session_id": r[0], "created_at": r[1], "persona_id": r[2],
+                 "turns": sorted(int(i) for i in r[3].split(","))} for r in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._reader()
+        return {
+            "path": self.path,
+            "sessions": conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0],
+            "turns": conn.execute("SELECT COUNT(*) FROM turns").fetchone()[0],
+            "indexed_turns": self.indexed_turns,
+            "queries": self.queries,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+    def close(self) -> None:
+        with self._write_lock:
+            self._writer.close()
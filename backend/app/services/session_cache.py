@@ -0,0 +1,217 @@
+# backend/app/services/session_cache.py
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+# ===================== Configuration =====================
+
+# Memory budget for resident sessions, measured as serialized JSON size
+SESSION_CACHE_MAX_BYTES = int(os.environ.get("SESSION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Sessions untouched for this many seconds are dropped (they fault back in from storage)
+SESSION_CACHE_TTL = float(os.environ.get("SESSION_CACHE_TTL", "900"))
+# Live per-session objects (incremental evaluators, prompt builders) kept at most, and idle seconds before dropping one
+LIVE_SESSION_LIMIT = int(os.environ.get("LIVE_SESSION_LIMIT", "10000"))
+LIVE_SESSION_TTL = float(os.environ.get("LIVE_SESSION_TTL", "1800"))
+
+
+class _Entry:
+    __slots__ = ("record", "size", "touched")
+
+    def __init__(self, record: Dict[str, Any], size: int):
+        self.record = record
+        self.size = size
+        self.touched = time.monotonic()
+
+
+def _copy(record: Dict[str, Any]) -> Dict[str, Any]:
+    payload = record["payload"]
+    return {**record, "payload": {**payload, "messages": list(payload.get("messages") or [])}}
+
+
+class SessionCache:
+    """
+    Hot sessions ({"session_id", "created_at", "payload"} records) in memory.
+
+    LRU by total serialized size plus an idle TTL. It is a read cache in front
+    of the durable store: writers update the store first, then the resident
+    copy via put()/append(); sessions that are not resident are simply loaded
+    again on the next get(). get() returns a shallow copy, so callers may append
+    to payload["messages"] without touching the cached list.
+    """
+
+    def __init__(self, max_bytes: int = SESSION_CACHE_MAX_BYTES, ttl: float = SESSION_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and self.ttl and now - entry.touched > self.ttl:
+                self._drop(session_id)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            entry.touched = now
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return _copy(entry.record)
+
+    def message_count(self, session_id: str) -> Optional[int]:
+        """Messages in the resident copy, or None if not resident (no LRU or hit-rate effect)."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            return None if entry is None else len(entry.record["payload"].get("messages") or [])
+
+    def put(self, session_id: str, record: Dict[str, Any], size: Optional[int] = None) -> None:
+        if size is None:
+            size = len(json.dumps(record, ensure_ascii=False))
+        with self._lock:
+            self._drop(session_id)
+            if size > self.max_bytes:
+                return
+            self._entries[session_id] = _Entry(_copy(record), size)
+            self._bytes += size
+            self._trim()
+
+    def append(self, session_id: str, messages: Iterable[Dict[str, Any]], fields: Dict[str, Any], size: int) -> None:
+        """Apply an append to the resident copy, if any; `size` is the serialized size it adds."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return
+            payload = entry.record["payload"]
+            payload.setdefault("messages", []).extend(messages)
+            payload.update(fields)
+            entry.size += size
+            entry.touched = time.monotonic()
+            self._entries.move_to_end(session_id)
+            self._bytes += size
+            self._trim()
+
+    def discard(self, session_id: str) -> None:
+        with self._lock:
+            self._drop(session_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _drop(self, session_id: str) -> None:
+        entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _trim(self) -> None:
+        # idle sessions sit at the LRU end, so expiry stops at the first live one
+        if self.ttl:
+            deadline = time.monotonic() - self.ttl
+            while self._entries:
+                session_id, entry = next(iter(self._entries.items()))
+                if entry.touched >= deadline:
+                    break
+                self._drop(session_id)
+                self.expirations += 1
+        while self._bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "sessions": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class LiveSessionMap:
+    """
+    Per-session objects that can be rebuilt from storage, LRU by count plus an
+    idle TTL like SessionCache, so sessions that never reach /conversation/end
+    do not pile up. A dropped session simply misses on the next get().
+    """
+
+    def __init__(self, max_entries: int = LIVE_SESSION_LIMIT, ttl: float = LIVE_SESSION_TTL):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, list]" = OrderedDict()  # session_id -> [value, touched]
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, session_id: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            if self.ttl and now - entry[1] > self.ttl:
+                del self._entries[session_id]
+                self.expirations += 1
+                return None
+            entry[1] = now
+            self._entries.move_to_end(session_id)
+            return entry[0]
+
+    def put(self, session_id: str, value: Any) -> None:
+        with self._lock:
+            self._entries.pop(session_id, None)
+            self._entries[session_id] = [value, time.monotonic()]
+            self._trim()
+
+    def pop(self, session_id: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+            return None if entry is None else entry[0]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _trim(self) -> None:
+        if self.ttl:
+            deadline = time.monotonic() - self.ttl
+            while self._entries:
+                session_id, entry = next(iter(self._entries.items()))
+                if entry[1] >= deadline:
+                    break
+                del self._entries[session_id]
+                self.expirations += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._entries),
+                "max_sessions": self.max_entries,
+                "ttl": self.ttl,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+SESSION_CACHE = SessionCache()
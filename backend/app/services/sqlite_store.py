@@ -0,0 +1,369 @@
+# backend/app/services/sqlite_store.py
+"""
+SQLite (WAL) backend for transcript_service: sessions, messages, state history
+and evaluations in one database file, indexed for dashboard queries.
+
+Reads use one connection per thread. Writes go through a single writer thread
+that commits everything queued since its last commit in one transaction (group
+commit); callers block until their write is durable.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id  TEXT PRIMARY KEY,
+    persona_id  TEXT,
+    started_at  TEXT,
+    created_at  TEXT NOT NULL,
+    updated_at  TEXT NOT NULL,
+    payload     TEXT NOT NULL              -- session payload minus messages
+);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id  TEXT NOT NULL,
+    seq         INTEGER NOT NULL,
+    role        TEXT,
+    content     TEXT,
+    timestamp   TEXT,
+    extra       TEXT,                      -- any other message keys, as JSON
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS states (
+    session_id  TEXT NOT NULL,
+    seq         INTEGER NOT NULL,
+    state       TEXT NOT NULL,
+    state_token TEXT,
+    created_at  TEXT NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS evaluations (
+    session_id  TEXT PRIMARY KEY,
+    kind        TEXT,
+    score       REAL,                      -- mean of the classic scores
+    scores      TEXT,
+    created_at  TEXT NOT NULL,
+    evaluation  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_persona_started ON sessions (persona_id, started_at);
+CREATE INDEX IF NOT EXISTS sessions_started ON sessions (started_at);
+CREATE INDEX IF NOT EXISTS evaluations_score ON evaluations (score);
+"""
+
+_MESSAGE_KEYS = ("role", "content", "timestamp")
+
+# Seconds a caller waits for its write to commit (SQLite itself waits up to 30 s for the write lock)
+TRANSCRIPT_DB_WRITE_TIMEOUT = float(os.environ.get("TRANSCRIPT_DB_WRITE_TIMEOUT", "60"))
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _message_row(session_id: str, seq: int, message: Dict[str, Any]) -> tuple:
+    extra = {k: v for k, v in message.items() if k not in _MESSAGE_KEYS}
+    return (session_id, seq, message.get("role"), message.get("content"), message.get("timestamp"),
+            _dumps(extra) if extra else None)
+
+
+def evaluation_scores(evaluation: Dict[str, Any]) -> Dict[str, Any]:
+    """Classic scores from a job dict or a raw (classic/combined) evaluation result."""
+    result = evaluation.get("result", evaluation) or {}
+    if "classic" in result:
+        result = result["classic"]
+    scores = result.get("scores") or {}
+    return {k: v for k, v in scores.items() if isinstance(v, (int, float))}
+
+
+class SqliteTranscriptStore:
+    """Same operations as the file store in transcript_service, backed by SQLite."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._pending: List[tuple] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self.commits = 0
+        self.writes = 0
+        self.failed_batches = 0
+        self.last_error: Optional[str] = None
+        writer = self._connect()
+        writer.executescript(SCHEMA)
+        self._writer = threading.Thread(target=self._write_loop, args=(writer,), daemon=True, name="sqlite-writer")
+        self._writer.start()
+
+    # ----- connections -----
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoint; safe with WAL
+        conn.execute("PRAGMA foreign_keys=OFF")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # ----- group commit -----
+
+    def _submit(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("store is closed")
+            self._pending.append((fn, future))
+            self._cond.notify()
+        try:
+            return future.result(timeout=TRANSCRIPT_DB_WRITE_TIMEOUT)
+        except FutureTimeoutError:
+            written = "not written" if future.cancel() else "may still be written"
+            raise TimeoutError(f"SQLite write not committed within {TRANSCRIPT_DB_WRITE_TIMEOUT:g}s ({written})")
+
+    def _write_loop(self, conn: sqlite3.Connection) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    break
+                # everything queued while the last commit was running goes into this one
+                batch, self._pending = self._pending, []
+            # callers that timed out and withdrew their write are skipped
+            batch = [(fn, future) for fn, future in batch if future.set_running_or_notify_cancel()]
+            try:
+                results = self._commit(conn, batch)
+                self.commits += 1
+            except Exception as exc:  # e.g. "database is locked": fail this batch, keep the writer alive
+                self.failed_batches += 1
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                if conn.in_transaction:
+                    try:
+                        conn.execute("ROLLBACK")
+                    except sqlite3.Error:
+                        pass
+                results = [(future, None, exc) for _, future in batch]
+            self.writes += len(batch)
+            for future, value, exc in results:
+                if exc is None:
+                    future.set_result(value)
+                else:
+                    future.set_exception(exc)
+        conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, batch: List[tuple]) -> List[tuple]:
+        results = []
+        conn.execute("BEGIN IMMEDIATE")
+        for fn, future in batch:
+            conn.execute("SAVEPOINT op")
+            try:
+                results.append((future, fn(conn), None))
+                conn.execute("RELEASE op")
+            except Exception as exc:  # one bad write must not fail the whole group
+                conn.execute("ROLLBACK TO op")
+                conn.execute("RELEASE op")
+                results.append((future, None, exc))
+        conn.execute("COMMIT")
+        return results
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._writer.join()
+
+    # ----- transcripts -----
+
+    def save_transcript(self, transcript_payload: dict) -> str:
+        session_id = transcript_payload.get("session_id") or str(uuid.uuid4())
+        self._submit(lambda conn: self._upsert(conn, session_id, transcript_payload, _now()))
+        return session_id
+
+    def import_records(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Insert stored {"session_id", "created_at", "payload"} records in one transaction (migration)."""
+        records = list(records)
+
+        def write(conn: sqlite3.Connection) -> None:
+            for record in records:
+                self._upsert(conn, record["session_id"], record.get("payload") or {}, record.get("created_at") or _now())
+
+        self._submit(write)
+        return len(records)
+
+    def _upsert(self, conn: sqlite3.Connection, session_id: str, transcript_payload: dict, now: str) -> None:
+        payload = {k: v for k, v in transcript_payload.items() if k != "messages"}
+        conn.execute(
+            "INSERT INTO sessions (session_id, persona_id, started_at, created_at, updated_at, payload)"
+            " VALUES (?1, ?2, COALESCE(?3, ?4), ?4, ?4, ?5) ON CONFLICT(session_id) DO UPDATE SET"
+            " persona_id=excluded.persona_id, started_at=COALESCE(?3, sessions.started_at),"
+            " updated_at=excluded.updated_at, payload=excluded.payload",
+            (session_id, payload.get("persona_id"), payload.get("started_at"), now, _dumps(payload)),
+        )
+        conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+        conn.executemany("INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?)",
+                         [_message_row(session_id, i, m) for i, m in enumerate(transcript_payload.get("messages") or [])])
+        if "state" in payload:
+            self._insert_state(conn, session_id, payload["state"], payload.get("state_token"), now)
+
+    def append_turn(self, session_id: str, messages: Iterable[Dict[str, Any]] = (), **fields: Any) -> None:
+        messages = list(messages)
+        now = _now()
+
+        def write(conn: sqlite3.Connection) -> None:
+            row = conn.execute("SELECT payload FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                payload = {"session_id": session_id}
+                conn.execute("INSERT INTO sessions VALUES (?, NULL, ?, ?, ?, ?)",
+                             (session_id, now, now, now, _dumps(payload)))
+            if fields:
+                payload = json.loads(row[0]) if row else {"session_id": session_id}
+                payload.update(fields)
+                conn.execute("UPDATE sessions SET payload = ?, updated_at = ? WHERE session_id = ?",
+                             (_dumps(payload), now, session_id))
+            if messages:
+                start = conn.execute("SELECT COALESCE(MAX(seq) + 1, 0) FROM messages WHERE session_id = ?",
+                                     (session_id,)).fetchone()[0]
+                conn.executemany("INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?)",
+                                 [_message_row(session_id, start + i, m) for i, m in enumerate(messages)])
+            if "state" in fields:
+                self._insert_state(conn, session_id, fields["state"], fields.get("state_token"), now)
+
+        self._submit(write)
+
+    def delete_transcript(self, session_id: str, evaluation: bool = False) -> None:
+        tables = ("sessions", "messages", "states") + (("evaluations",) if evaluation else ())
+
+        def write(conn: sqlite3.Connection) -> None:
+            for table in tables:
+                conn.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+
+        self._submit(write)
+
+    @staticmethod
+    def _insert_state(conn: sqlite3.Connection, session_id: str, state: Any, token: Optional[str], now: str) -> None:
+        conn.execute(
+            "INSERT INTO states SELECT ?, COALESCE(MAX(seq) + 1, 0), ?, ?, ? FROM states WHERE session_id = ?",
+            (session_id, _dumps(state), token, now, session_id),
+        )
+
+    def load_transcript(self, session_id: str) -> Optional[dict]:
+        conn = self._reader()
+        row = conn.execute("SELECT created_at, payload FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            return None
+        payload = json.loads(row[1])
+        messages = []
+        for role, content, timestamp, extra in conn.execute(
+            "SELECT role, content, timestamp, extra FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+        ):
+            message = {"role": role, "content": content, "timestamp": timestamp}
+            if extra:
+                message.update(json.loads(extra))
+            messages.append(message)
+        payload["messages"] = messages
+        return {"session_id": session_id, "created_at": row[0], "payload": payload}
+
+    def states(self, session_id: str) -> List[Dict[str, Any]]:
+        """State history of a session, oldest first."""
+        return [
+            {"state": json.loads(state), "state_token": token, "created_at": created_at}
+            for state, token, created_at in self._reader().execute(
+                "SELECT state, state_token, created_at FROM states WHERE session_id = ? ORDER BY seq", (session_id,)
+            )
+        ]
+
+    # ----- evaluations -----
+
+    def save_evaluation(self, session_id: str, evaluation: dict) -> None:
+        scores = evaluation_scores(evaluation)
+        score = sum(scores.values()) / len(scores) if scores else None
+        now = _now()
+
+        def write(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "INSERT OR REPLACE INTO evaluations VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, evaluation.get("kind"), score, _dumps(scores), now, _dumps(evaluation)),
+            )
+
+        self._submit(write)
+
+    def load_evaluation(self, session_id: str) -> Optional[dict]:
+        row = self._reader().execute("SELECT evaluation FROM evaluations WHERE session_id = ?", (session_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # ----- queries -----
+
+    @staticmethod
+    def _started_between(since: Optional[str], until: Optional[str]) -> tuple:
+        where, args = [], []
+        if since:
+            where.append("s.started_at >= ?")
+            args.append(since)
+        if until:
+            where.append("s.started_at < ?")
+            args.append(until)
+        return where, args
+
+    def sessions_per_persona_per_day(self, since: Optional[str] = None, until: Optional[str] = None) -> List[Dict[str, Any]]:
+        """[{"persona_id", "day", "sessions", "avg_score"}] for sessions started in [since, until)."""
+        where, args = self._started_between(since, until)
+        rows = self._reader().execute(
+            "SELECT s.persona_id, substr(s.started_at, 1, 10) AS day, COUNT(*), AVG(e.score)"
+            " FROM sessions s LEFT JOIN evaluations e ON e.session_id = s.session_id"
+            f" WHERE {' AND '.join(where) or '1'}"
+            " GROUP BY s.persona_id, day ORDER BY day, s.persona_id",
+            args,
+        )
+        return [{"persona_id": p, "day": d, "sessions": n, "avg_score": round(a, 2) if a is not None else None}
+                for p, d, n, a in rows]
+
+    def find_sessions(self, persona_id: Optional[str] = None, since: Optional[str] = None,
+                      until: Optional[str] = None, min_score: Optional[float] = None,
+                      max_score: Optional[float] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Sessions matching the filters, newest first, with their evaluation score if any."""
+        where, args = self._started_between(since, until)
+        if persona_id is not None:
+            where.append("s.persona_id = ?")
+            args.append(persona_id)
+        if min_score is not None:
+            where.append("e.score >= ?")
+            args.append(min_score)
+        if max_score is not None:
+            where.append("e.score <= ?")
+            args.append(max_score)
+        rows = self._reader().execute(
+            "SELECT s.session_id, s.persona_id, s.started_at, e.score,"
+            " (SELECT COUNT(*) FROM messages m WHERE m.session_id = s.session_id)"
+            " FROM sessions s LEFT JOIN evaluations e ON e.session_id = s.session_id"
+            f" WHERE {' AND '.join(where) or '1'} ORDER BY s.started_at DESC LIMIT ?",
+            (*args, limit),
+        )
+        return [{"session_id": sid, "persona_id": pid, "started_at": started, "score": score, "messages": count}
+                for sid, pid, started, score, count in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._reader()
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "sessions": conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0],
+            "evaluations": conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0],
+            "commits": self.commits,
+            "writes": self.writes,
+            "writes_per_commit": round(self.writes / self.commits, 2) if self.commits else None,
+            "failed_batches": self.failed_batches,
+            "last_error": self.last_error,
+        }
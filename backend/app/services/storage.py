@@ -0,0 +1,285 @@
+# backend/app/services/storage.py
+"""
+Async facade over transcript_service for request handlers.
+
+Blocking file / database work runs on a small thread pool, never on the event
+loop. Saves are write-behind: they are buffered per session and flushed after
+STORAGE_FLUSH_WINDOW seconds, so several saves of one session inside the window
+reach the disk as a single write. Loads see buffered writes (read-your-writes).
+Pending writes are flushed on shutdown via the FastAPI lifespan.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.services import transcript_service
+from app.services.session_cache import SESSION_CACHE
+
+# ===================== Configuration =====================
+
+# How long a save may wait for more saves of the same session before it is written
+STORAGE_FLUSH_WINDOW = float(os.environ.get("STORAGE_FLUSH_WINDOW", "0.05"))
+STORAGE_IO_WORKERS = int(os.environ.get("STORAGE_IO_WORKERS", "4"))
+# A failing write is retried after 0.5 s, 1 s, 2 s, ... (at most STORAGE_RETRY_MAX apart);
+# after STORAGE_MAX_ATTEMPTS it is set aside as a dead letter (see stats)
+STORAGE_RETRY_MAX = float(os.environ.get("STORAGE_RETRY_MAX", "30"))
+STORAGE_MAX_ATTEMPTS = int(os.environ.get("STORAGE_MAX_ATTEMPTS", "8"))
+
+_RETRY_BASE = 0.5
+_DEAD_LETTERS_KEPT = 1000
+
+log = logging.getLogger(__name__)
+
+
+class _PendingWrite:
+    """Coalesced writes for one session: a full save, or appends since the last flush."""
+
+    __slots__ = ("payload", "messages", "fields", "ops", "queued_at", "attempts", "retry_at")
+
+    def __init__(self):
+        self.payload: Optional[Dict[str, Any]] = None
+        self.messages: List[Dict[str, Any]] = []
+        self.fields: Dict[str, Any] = {}
+        self.ops = 0
+        self.queued_at = time.perf_counter()
+        self.attempts = 0  # failed writes so far
+        self.retry_at = 0.0  # perf_counter time before which a failed write is not retried
+
+    def save(self, payload: Dict[str, Any]) -> None:
+        self.payload = {**payload, "messages": list(payload.get("messages") or [])}
+        self.messages, self.fields = [], {}
+        self.ops += 1
+
+    def append(self, messages: Iterable[Dict[str, Any]], fields: Dict[str, Any]) -> None:
+        if self.payload is not None:  # fold into the pending full save
+            self.payload["messages"].extend(messages)
+            self.payload.update(fields)
+        else:
+            self.messages.extend(messages)
+            self.fields.update(fields)
+        self.ops += 1
+
+    def apply(self, record: Optional[Dict[str, Any]], session_id: str) -> Optional[Dict[str, Any]]:
+        """What a load returns once this write lands on top of `record`."""
+        if self.payload is not None:
+            return {"session_id": session_id, "created_at": datetime.utcnow().isoformat() + "Z",
+                    "payload": {**self.payload, "messages": list(self.payload["messages"])}}
+        if record is None:
+            record = {"session_id": session_id, "created_at": None, "payload": {"session_id": session_id}}
+        payload = record["payload"]
+        payload["messages"] = list(payload.get("messages") or []) + self.messages
+        payload.update(self.fields)
+        return record
+
+    def write(self, session_id: str) -> None:
+        if self.payload is not None:
+            transcript_service.save_transcript({**self.payload, "session_id": session_id})
+        else:
+            transcript_service.append_turn(session_id, self.messages, **self.fields)
+
+
+class WriteBehindStorage:
+    """
+    Non-blocking transcript storage. One flusher task per event loop writes
+    buffered sessions; per-session locks keep a load from racing a flush of the
+    same session.
+    """
+
+    def __init__(self, flush_window: float = STORAGE_FLUSH_WINDOW, io_workers: int = STORAGE_IO_WORKERS):
+        self.flush_window = flush_window
+        self.io_workers = io_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[str, _PendingWrite] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._locks: List[asyncio.Lock] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._latencies_ms: deque = deque(maxlen=1024)
+        self.enqueued = 0
+        self.coalesced = 0
+        self.flushed = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        # session_id -> what was given up on; write them back with a tool once the cause is fixed
+        self.dead_letters: Dict[str, Dict[str, Any]] = {}
+
+    # ----- lifecycle -----
+
+    def _bind(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:  # asyncio primitives belong to one loop
+            self._loop = loop
+            self._locks = [asyncio.Lock() for _ in range(64)]
+            self._wakeup = asyncio.Event()
+            self._flusher = None
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="storage-io")
+        return loop
+
+    def start(self) -> None:
+        """Start the flusher on the running loop (idempotent; also done lazily on first save)."""
+        loop = self._bind()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = loop.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """Flush everything pending and stop the flusher and the I/O threads."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush(force=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        lost = sorted(set(self._pending) | set(self.dead_letters))
+        if lost:
+            log.error("storage closed with %d session(s) not written (last error: %s): %s",
+                      len(lost), self.last_error, ", ".join(lost[:20]))
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking storage call on the I/O threads."""
+        return await self._bind().run_in_executor(self._executor, fn, *args)
+
+    def _lock(self, session_id: str) -> asyncio.Lock:
+        return self._locks[hash(session_id) % len(self._locks)]
+
+    # ----- writes -----
+
+    def _enqueue(self, session_id: str) -> _PendingWrite:
+        transcript_service.check_session_id(session_id)  # a write that can never land is refused up front
+        self.start()
+        pending = self._pending.get(session_id)
+        if pending is None:
+            pending = self._pending[session_id] = _PendingWrite()
+        else:
+            self.coalesced += 1
+        self.enqueued += 1
+        self._wakeup.set()
+        return pending
+
+    async def save_transcript(self, transcript_payload: dict) -> str:
+        """Buffer a full save; returns the session id immediately."""
+        session_id = transcript_payload.get("session_id") or str(uuid.uuid4())
+        self._enqueue(session_id).save({**transcript_payload, "session_id": session_id})
+        return session_id
+
+    async def append_turn(self, session_id: str, messages: Iterable[Dict[str, Any]] = (), **fields: Any) -> None:
+        self._enqueue(session_id).append(list(messages), fields)
+
+    async def compact(self, session_id: str) -> bool:
+        """Flush the session's buffered turns, then fold its log into the snapshot."""
+        await self._flush_one(session_id)
+        async with self._lock(session_id):
+            return await self.run(transcript_service.compact, session_id)
+
+    async def save_evaluation(self, session_id: str, evaluation: dict) -> None:
+        await self.run(transcript_service.save_evaluation, session_id, evaluation)
+
+    # ----- reads -----
+
+    async def load_transcript(self, session_id: str) -> Optional[dict]:
+        transcript_service.check_session_id(session_id)
+        self._bind()
+        async with self._lock(session_id):
+            pending = self._pending.get(session_id)
+            if pending is not None and pending.payload is not None:
+                return pending.apply(None, session_id)
+            record = await self.run(transcript_service.load_transcript, session_id)
+            pending = self._pending.get(session_id)  # appends queued while we were reading
+            return pending.apply(record, session_id) if pending is not None else record
+
+    async def load_evaluation(self, session_id: str) -> Optional[dict]:
+        return await self.run(transcript_service.load_evaluation, session_id)
+
+    # ----- flushing -----
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if self.flush_window:
+                await asyncio.sleep(self.flush_window)  # let more saves of the same sessions coalesce
+            await self.flush()
+
+    async def flush(self, force: bool = False) -> None:
+        """Write every buffered session now (failed writes only once their backoff is over, unless forced)."""
+        self._bind()
+        now = time.perf_counter()
+        due = [sid for sid, p in self._pending.items() if force or p.retry_at <= now]
+        await asyncio.gather(*(self._flush_one(sid) for sid in due))
+
+    async def _flush_one(self, session_id: str) -> None:
+        self._bind()
+        async with self._lock(session_id):
+            pending = self._pending.pop(session_id, None)
+            if pending is None:
+                return
+            try:
+                await self.run(pending.write, session_id)
+            except Exception as exc:
+                self.errors += 1
+                self.last_error = f"{session_id}: {type(exc).__name__}: {exc}"
+                newer = self._pending.get(session_id)
+                if newer is not None and newer.payload is not None:
+                    return  # a newer full save replaces the failed write
+                if newer is not None:  # keep the order: failed appends, then newer ones
+                    if pending.payload is not None:
+                        pending.append(newer.messages, newer.fields)
+                    else:
+                        pending.messages.extend(newer.messages)
+                        pending.fields.update(newer.fields)
+                self._retry_later(session_id, pending)
+                return
+            self.flushed += 1
+            self._latencies_ms.append((time.perf_counter() - pending.queued_at) * 1000)
+
+    def _retry_later(self, session_id: str, pending: _PendingWrite) -> None:
+        pending.attempts += 1
+        if pending.attempts >= STORAGE_MAX_ATTEMPTS:
+            if len(self.dead_letters) >= _DEAD_LETTERS_KEPT:
+                self.dead_letters.pop(next(iter(self.dead_letters)))
+            self.dead_letters[session_id] = {"error": self.last_error, "attempts": pending.attempts,
+                                             "ops": pending.ops, "write": pending}
+            log.error("giving up on session %s after %d attempts: %s", session_id, pending.attempts, self.last_error)
+            return
+        delay = min(STORAGE_RETRY_MAX, _RETRY_BASE * 2 ** (pending.attempts - 1))
+        pending.retry_at = time.perf_counter() + delay
+        self._pending[session_id] = pending
+        self._loop.call_later(delay, self._wakeup.set)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies_ms)
+
+        def pct(p: float) -> Optional[float]:
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 2) if latencies else None
+
+        return {
+            "backend": transcript_service.TRANSCRIPT_BACKEND,
+            "queue_depth": len(self._pending),
+            "queued_ops": sum(p.ops for p in self._pending.values()),
+            "enqueued": self.enqueued,
+            "coalesced": self.coalesced,
+            "flushed": self.flushed,
+            "flush_window": self.flush_window,
+            "flush_latency_ms": {"p50": pct(0.5), "p99": pct(0.99), "max": round(latencies[-1], 2) if latencies else None},
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "retrying": sum(1 for p in self._pending.values() if p.attempts),
+            "dead_letters": len(self.dead_letters),
+            "dead_letter_sessions": list(self.dead_letters)[-20:],
+            "session_cache": SESSION_CACHE.stats(),
+        }
+
+
+STORAGE = WriteBehindStorage()
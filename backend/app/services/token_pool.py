@@ -0,0 +1,244 @@
+# backend/app/services/token_pool.py
+"""
+Pre-minted ephemeral Realtime sessions for /session-token.
+
+When SESSION_TOKEN_POOL_SIZE > 0, a background task keeps that many sessions
+minted ahead of demand for each pooled (model, voice) configuration, so a rep
+pressing "Start" gets a token without waiting on the upstream round trip.
+Sessions are handed out oldest first and each one only once; any whose
+client_secret expires within SESSION_TOKEN_POOL_MARGIN seconds is thrown away
+instead. Refills run under a concurrency cap and back off while upstream fails.
+A request the pool cannot serve mints a session directly (a miss).
+
+Ephemeral client secrets live about a minute, so a pool of N costs roughly N
+upstream sessions per (lifetime - margin) seconds even when idle: size it for
+the busiest start-of-block burst and switch it off outside training hours.
+"""
+
+import asyncio
+import os
+import statistics
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from app.services.http_client import OPENAI_BASE_URL, OPENAI_HTTP
+
+# ===================== Configuration =====================
+
+OPENAI_REALTIME_MODEL = os.environ.get("OPENAI_REALTIME_MODEL", "gpt-4o-realtime-preview")
+OPENAI_REALTIME_VOICE = os.environ.get("OPENAI_REALTIME_VOICE", "verse")
+# Sessions kept ready per configuration; 0 disables the pool
+SESSION_TOKEN_POOL_SIZE = int(os.environ.get("SESSION_TOKEN_POOL_SIZE", "0"))
+# Extra voices to pool besides OPENAI_REALTIME_VOICE (comma-separated); other voices are minted on demand
+SESSION_TOKEN_POOL_VOICES = [v.strip() for v in os.environ.get("SESSION_TOKEN_POOL_VOICES", "").split(",") if v.strip()]
+# Never hand out a token with fewer seconds than this left
+SESSION_TOKEN_POOL_MARGIN = float(os.environ.get("SESSION_TOKEN_POOL_MARGIN", "20"))
+# Upstream mints in flight at once for refills
+SESSION_TOKEN_POOL_CONCURRENCY = int(os.environ.get("SESSION_TOKEN_POOL_CONCURRENCY", "4"))
+
+# Assumed client_secret lifetime when the response carries no expires_at
+_DEFAULT_TTL = 60.0
+_MAX_BACKOFF = 30.0
+
+
+class SessionMintError(Exception):
+    def __init__(self, message: str, status_code: int = 502):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+async def mint_realtime_session(model: str, voice: str) -> Dict[str, Any]:
+    """Create one ephemeral Realtime session upstream (on the shared pooled HTTP client)."""
+    url = f"{OPENAI_BASE_URL}/realtime/sessions"
+    headers = {
+        "Authorization": f"Bearer {os.environ.get('OPENAI_API_KEY')}",
+        "Content-Type": "application/json",
+    }
+    try:
+        resp = await OPENAI_HTTP.client.post(url, headers=headers, json={"model": model, "voice": voice})
+    except httpx.HTTPError as exc:
+        raise SessionMintError(f"OpenAI session creation failed: {type(exc).__name__}: {exc}")
+    if resp.status_code >= 400:
+        raise SessionMintError(f"OpenAI session creation failed: {resp.text}", status_code=500)
+    return resp.json()
+
+
+def expires_at(session: Dict[str, Any], minted_at: float) -> float:
+    """Epoch seconds when the session's client secret stops working."""
+    secret = session.get("client_secret") or {}
+    value = secret.get("expires_at") or session.get("expires_at")
+    return float(value) if value else minted_at + _DEFAULT_TTL
+
+
+def _quantiles(samples: Deque[float]) -> Optional[Dict[str, float]]:
+    if len(samples) < 2:
+        return None
+    q = statistics.quantiles(samples, n=100)
+    return {"p50": round(q[49], 2), "p90": round(q[89], 2), "p99": round(q[98], 2), "n": len(samples)}
+
+
+class _PooledConfig:
+    __slots__ = ("model", "voice", "ready", "minting")
+
+    def __init__(self, model: str, voice: str):
+        self.model = model
+        self.voice = voice
+        self.ready: Deque[Tuple[float, Dict[str, Any]]] = deque()  # (expires_at, session), oldest first
+        self.minting = 0
+
+
+class SessionTokenPool:
+
+    def __init__(self, mint: Callable[[str, str], Awaitable[Dict[str, Any]]] = mint_realtime_session,
+                 size: int = SESSION_TOKEN_POOL_SIZE, margin: float = SESSION_TOKEN_POOL_MARGIN,
+                 concurrency: int = SESSION_TOKEN_POOL_CONCURRENCY,
+                 configs: Optional[List[Tuple[str, str]]] = None):
+        self._mint = mint
+        self.size = max(0, size)
+        if self.size and margin >= _DEFAULT_TTL:
+            # every session would arrive already expiring and the pool would mint in a loop
+            raise ValueError(f"SESSION_TOKEN_POOL_MARGIN ({margin:g}s) must be below the "
+                             f"{_DEFAULT_TTL:g}s session lifetime")
+        self.margin = margin
+        self.concurrency = max(1, concurrency)
+        if configs is None:
+            voices = [OPENAI_REALTIME_VOICE] + [v for v in SESSION_TOKEN_POOL_VOICES if v != OPENAI_REALTIME_VOICE]
+            configs = [(OPENAI_REALTIME_MODEL, voice) for voice in voices]
+        self._configs = {key: _PooledConfig(*key) for key in configs}
+        self._task: Optional[asyncio.Task] = None
+        self._minters: Set[asyncio.Task] = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._closing = False
+        self._retry_at = 0.0
+        self._backoff = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.minted = 0
+        self.discarded = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._hit_ms: Deque[float] = deque(maxlen=1000)
+        self._miss_ms: Deque[float] = deque(maxlen=1000)
+
+    # ----- handing out -----
+
+    def _take(self, config: _PooledConfig, now: float) -> Optional[Dict[str, Any]]:
+        while config.ready:
+            expiry, session = config.ready.popleft()
+            if expiry - self.margin > now:
+                return session
+            self.discarded += 1
+        return None
+
+    async def get(self, model: str = OPENAI_REALTIME_MODEL, voice: str = OPENAI_REALTIME_VOICE) -> Dict[str, Any]:
+        """A fresh session for (model, voice): from the pool if one is ready, else minted now."""
+        start = time.perf_counter()
+        config = self._configs.get((model, voice)) if self.size else None
+        session = self._take(config, time.time()) if config is not None else None
+        if config is not None and self._wake is not None:
+            self._wake.set()  # refill behind this request
+        if session is not None:
+            self.hits += 1
+            self._hit_ms.append((time.perf_counter() - start) * 1e3)
+            return session
+        self.misses += 1
+        session = await self._mint(model, voice)
+        self._miss_ms.append((time.perf_counter() - start) * 1e3)
+        return session
+
+    # ----- refilling -----
+
+    async def _mint_into(self, config: _PooledConfig) -> None:
+        try:
+            async with self._semaphore:
+                session = await self._mint(config.model, config.voice)
+            now = time.time()
+            expiry = expires_at(session, now)
+            if expiry - self.margin <= now:
+                # unusable on arrival; counting it as a failure keeps the refill from spinning
+                raise SessionMintError(f"Session expires within the {self.margin:g}s margin")
+            config.ready.append((expiry, session))
+            self.minted += 1
+            self._backoff = 0.0
+        except Exception as exc:  # upstream trouble: back off, requests still mint directly
+            self.failures += 1
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            self._backoff = min(_MAX_BACKOFF, max(1.0, self._backoff * 2))
+            self._retry_at = time.time() + self._backoff
+        finally:
+            config.minting -= 1
+            self._wake.set()
+
+    def _refill(self, now: float) -> float:
+        """Drop expiring sessions, start mints for the shortfall; returns when to look again."""
+        next_check = now + 30.0
+        for config in self._configs.values():
+            while config.ready and config.ready[0][0] - self.margin <= now:
+                config.ready.popleft()
+                self.discarded += 1
+            if now >= self._retry_at:
+                for _ in range(self.size - len(config.ready) - config.minting):
+                    config.minting += 1
+                    task = asyncio.get_running_loop().create_task(self._mint_into(config))
+                    self._minters.add(task)
+                    task.add_done_callback(self._minters.discard)
+            if config.ready:
+                next_check = min(next_check, config.ready[0][0] - self.margin)
+        if now < self._retry_at:
+            next_check = min(next_check, self._retry_at)
+        return next_check
+
+    async def _loop(self) -> None:
+        while not self._closing:  # wait_for can swallow a cancel that races the wake-up
+            self._wake.clear()
+            next_check = self._refill(time.time())
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(0.01, next_check - time.time()))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        """Start keeping the pool full (no-op when SESSION_TOKEN_POOL_SIZE is 0)."""
+        if self.size and (self._task is None or self._task.done()):
+            self._closing = False
+            self._wake = asyncio.Event()
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def close(self) -> None:
+        self._closing = True
+        tasks = list(self._minters) + ([self._task] if self._task is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        for config in self._configs.values():
+            config.ready.clear()  # never handed out; they simply expire upstream
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        served = self.hits + self.misses
+        return {
+            "enabled": self.size > 0,
+            "size": self.size,
+            "margin_seconds": self.margin,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / served, 3) if served else None,
+            "time_to_token_ms": {"hit": _quantiles(self._hit_ms), "miss": _quantiles(self._miss_ms),
+                                 "all": _quantiles(deque(list(self._hit_ms) + list(self._miss_ms)))},
+            "minted": self.minted,
+            "discarded_near_expiry": self.discarded,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "pools": [{"model": c.model, "voice": c.voice, "ready": len(c.ready), "minting": c.minting,
+                       "oldest_expires_in": round(c.ready[0][0] - now, 1) if c.ready else None}
+                      for c in self._configs.values()],
+        }
+
+
+SESSION_TOKENS = SessionTokenPool()
@@ -0,0 +1,240 @@
+# backend/app/services/tone.py
+
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from app.services import lexicon
+
+# ===================== Tone State =====================
+
+TONE_STATE_FIELDS = (
+    "mood", "timePressure", "skepticism", "patience", "engagement",
+    "hypeCount", "evidenceCount", "monologueCount",
+)
+
+MOODS = ("Neutral", "Engaged", "Dismissive")
+
+# Busy senior doctor: matches the realtime client's starting state
+DEFAULT_TONE_STATE: Dict[str, Any] = {
+    "mood": "Neutral",
+    "timePressure": 4,
+    "skepticism": 4,
+    "patience": 1,
+    "engagement": 1,
+    "hypeCount": 0,
+    "evidenceCount": 0,
+    "monologueCount": 0,
+}
+
+REP_ROLES = ("rep", "user", "mr", "MR")
+DOCTOR_ROLES = ("doctor", "assistant")
+
+ENDING_PHRASES = [
+    "I'm ending this call. Send me the data sheet.",
+    "I don't have time for this. Email me the trial results.",
+    "I have patients waiting. This conversation is over.",
+    "Send me the evidence, not the sales pitch. Goodbye."
+]
+
+
+def coerce_tone_state(fields: Dict[str, Any], base: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Merge client-supplied tone fields over `base`, dropping unknown keys. Raises ValueError on bad values."""
+    state = dict(base or DEFAULT_TONE_STATE)
+    for key, value in (fields or {}).items():
+        if key not in TONE_STATE_FIELDS:
+            continue
+        if key == "mood":
+            if value not in MOODS:
+                raise ValueError(f"Invalid mood: {value!r}")
+            state[key] = value
+        else:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"Invalid {key}: {value!r}")
+            state[key] = int(value)
+    return state
+
+
+# ===================== Decision Rules =====================
+
+def decide_tone(current_state: Dict[str, Any], last_doctor: str, last_mr: str) -> Dict[str, Any]:
+    """
+    Enhanced tone decision for realistic busy doctor behavior.
+    Returns mood, timePressure, skepticism, action, pauseReply, and cutNow flag.
+    """
+    # Analyze MR's last message (one pass over every lexicon)
+    return apply_tone_rules(current_state, lexicon.scan(last_mr or ""), len((last_mr or "").split()))
+
+
+def apply_tone_rules(current_state: Dict[str, Any], hits: FrozenSet[str], mr_word_count: int) -> Dict[str, Any]:
+    """Tone rules over an already-scanned MR message (lexicon hits + word count)."""
+    # Extract state
+    mood = current_state["mood"]
+    time_pressure = current_state["timePressure"]
+    skepticism = current_state["skepticism"]
+    patience = current_state.get("patience", 5)
+    engagement = current_state.get("engagement", 5)
+    hype_count = current_state.get("hypeCount", 0)
+    evidence_count = current_state.get("evidenceCount", 0)
+    monologue_count = current_state.get("monologueCount", 0)
+
+    # Hard stop triggers (cutNow = True)
+    cut_now = False
+    if hype_count >= 3:  # 3+ hype phrases
+        cut_now = True
+    elif monologue_count >= 2 and time_pressure >= 4:  # 2+ long monologues under pressure
+        cut_now = True
+    elif patience <= 1 and lexicon.STRONG_HYPE in hits:
+        cut_now = True
+
+    # Evidence recognition (immediate engagement boost) - flexible medical criteria
+    if lexicon.EVIDENCE in hits:
+        evidence_count += 1
+        mood = "Engaged"
+        time_pressure = max(1, time_pressure - 2)  # Reduce pressure significantly
+        skepticism = max(1, skepticism - 1)
+        engagement = min(10, engagement + 2)
+        action = "Good. Now tell me about the clinical significance and practical implications."
+        pause_reply = False
+    else:
+        # Hype detection (patience drain)
+        if lexicon.HYPE in hits:
+            hype_count += 1
+            patience = max(0, patience - 2)
+            mood = "Dismissive"
+            time_pressure = min(5, time_pressure + 1)
+            skepticism = min(5, skepticism + 1)
+            engagement = max(1, engagement - 1)
+            action = "I need specifics, not marketing. What's the actual data?"
+            pause_reply = False
+
+        # Monologue detection (time pressure increase)
+        elif mr_word_count > 25:  # Long message
+            monologue_count += 1
+            patience = max(0, patience - 1)
+            mood = "Dismissive"
+            time_pressure = min(5, time_pressure + 1)
+            action = "I need the key points, not a presentation. Bottom line?"
+            pause_reply = False
+
+        # Repetition detection
+        elif lexicon.REPETITION in hits:
+            patience = max(0, patience - 1)
+            mood = "Dismissive"
+            time_pressure = min(5, time_pressure + 1)
+            action = "I heard you the first time. What else do you have?"
+            pause_reply = False
+
+        # Default busy behavior
+        else:
+            if time_pressure >= 4:
+                mood = "Dismissive"
+                action = "I have patients waiting. What's the key point?"
+                pause_reply = True
+            else:
+                mood = "Neutral"
+                action = "Continue, but be concise."
+                pause_reply = False
+
+    # Generate ending phrases for cutNow
+    if cut_now:
+        action = ENDING_PHRASES[hype_count % len(ENDING_PHRASES)]
+        mood = "Dismissive"
+        time_pressure = 5
+        patience = 0
+
+    return {
+        "mood": mood,
+        "timePressure": time_pressure,
+        "skepticism": skepticism,
+        "action": action,
+        "pauseReply": pause_reply,
+        "cutNow": cut_now,
+        "patience": patience,
+        "engagement": engagement,
+        "hypeCount": hype_count,
+        "evidenceCount": evidence_count,
+        "monologueCount": monologue_count
+    }
+
+
+# ===================== Batch Replay =====================
+
+def tone_trajectory(transcript: List[Dict[str, Any]], initial_state: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Replay a whole transcript through the tone rules in one pass.
+    Each rep turn is scanned once; each doctor turn yields one decision against
+    the latest rep turn since the previous decision (same as the live channel).
+    """
+    state = coerce_tone_state(initial_state or {})
+    no_mr = (frozenset(), 0)
+    pending = no_mr
+    trajectory: List[Dict[str, Any]] = []
+    for idx, msg in enumerate(transcript):
+        role = msg.get("role") or msg.get("speaker") or ""
+        if role in REP_ROLES:
+            text = msg.get("content") or msg.get("text") or ""
+            pending = (lexicon.scan(text), len(text.split()))
+        elif role in DOCTOR_ROLES:
+            decision = apply_tone_rules(state, *pending)
+            pending = no_mr
+            state = decision
+            trajectory.append({"turn_index": idx, **decision})
+    return trajectory
+
+
+# ===================== Server-held Session =====================
+
+class ToneSession:
+    """
+    Tone state for one live conversation, kept on the server so clients only
+    stream utterances. The latest rep utterance is held until the next doctor
+    utterance, which triggers one `decide_tone` pass over it.
+    """
+
+    __slots__ = ("session_id", "state", "pending_mr", "seq")
+
+    def __init__(self, session_id: str, state: Optional[Dict[str, Any]] = None):
+        self.session_id = session_id
+        self.state = coerce_tone_state(state or {})
+        self.pending_mr = ""
+        self.seq = 0
+
+    def update(self, fields: Dict[str, Any]) -> None:
+        """Apply client-side tone adjustments (e.g. from doctor signals)."""
+        self.state = coerce_tone_state(fields, self.state)
+
+    def add_rep(self, text: str) -> None:
+        if text:
+            self.pending_mr = text
+
+    def add_doctor(self, text: str) -> Dict[str, Any]:
+        """Run the tone rules and return a compact delta of what changed."""
+        last_mr, self.pending_mr = self.pending_mr, ""
+        decision = decide_tone(self.state, text, last_mr)
+
+        changed = {k: decision[k] for k in TONE_STATE_FIELDS if decision[k] != self.state[k]}
+        self.state = {k: decision[k] for k in TONE_STATE_FIELDS}
+        self.seq += 1
+
+        delta: Dict[str, Any] = {"type": "decision", "seq": self.seq, "action": decision["action"][:200]}
+        if changed:
+            delta["state"] = changed
+        if decision["pauseReply"]:
+            delta["pauseReply"] = True
+        if decision["cutNow"]:
+            delta["cutNow"] = True
+        return delta
+
+
+TONE_SESSIONS: Dict[str, ToneSession] = {}
+
+
+def open_tone_session(session_id: str, state: Optional[Dict[str, Any]] = None) -> ToneSession:
+    session = ToneSession(session_id, state)
+    TONE_SESSIONS[session_id] = session
+    return session
+
+
+def close_tone_session(session: ToneSession) -> None:
+    """Forget `session`, unless a reconnect has already replaced it under the same id."""
+    if TONE_SESSIONS.get(session.session_id) is session:
+        del TONE_SESSIONS[session.session_id]
@@ -1,30 +1,30 @@
 # backend/app/services/transcript.py
 
-from typing import List, Dict
+from typing import List
 
-# In-memory storage for now (later can use DB)
-TRANSCRIPTS: Dict[str, List[dict]] = {}
+from app.services import transcript_service
+
+# Messages are stored through transcript_service (durable store + bounded hot-session
+# cache, see session_cache.py) rather than in a module-level dict.
 
 def save_message(session_id: str, role: str, content: str):
     """
     Save a message to the transcript for a given session.
     role = "user" (MR) or "doctor"
     """
-    if session_id not in TRANSCRIPTS:
-        TRANSCRIPTS[session_id] = []
-    TRANSCRIPTS[session_id].append({"role": role, "content": content})
+    transcript_service.append_turn(session_id, [{"role": role, "content": content}])
 
 
 def get_transcript(session_id: str) -> List[dict]:
     """
     Return all messages for a session.
     """
-    return TRANSCRIPTS.get(session_id, [])
+    record = transcript_service.load_transcript(session_id)
+    return record["payload"].get("messages", []) if record else []
 
 
 def clear_transcript(session_id: str):
     """
     Clear transcript for a session.
     """
-    if session_id in TRANSCRIPTS:
-        del TRANSCRIPTS[session_id]
+    transcript_service.delete_transcript(session_id)
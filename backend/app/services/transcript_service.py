@@ -1,13 +1,296 @@
 # backend/app/services/transcript_service.py
+"""
+Session storage under backend/storage/.
+
+Each session is a snapshot ({session_id}.json: {"session_id", "created_at",
+"payload"}) plus an optional append-only log ({session_id}.log, one JSON event
+per line), stored in a two-level shard directory derived from the session id
+(storage/3f/a2/{session_id}.json). manifest.jsonl indexes every session
+(see manifest.py) so listings never walk the shards. Files from the old flat
+layout are moved into their shard the first time they are touched (or all at
+once with app.tools.shard_storage). Turns are appended to the log instead of rewriting the snapshot;
+compaction folds the log back into the snapshot. Snapshots written before the
+log existed are read unchanged.
+
+Log lines:
+    {"op": "log", "id": "...", "created_at": "..."}   first line of every log
+    {"op": "msg", "data": {"role", "content", "timestamp"}}
+    {"op": "set", "data": {...}}                      payload fields to overwrite
+
+A snapshot records which log it absorbed ({"log": {"id", "offset"}}), so a crash
+between writing the snapshot and removing the log never replays events twice.
+
+With TRANSCRIPT_BACKEND=sqlite the same functions read and write the SQLite
+store in sqlite_store.py instead (migrate with app.tools.migrate_to_sqlite).
+Either way, recently used sessions are served from SESSION_CACHE; writes go to
+the store first and then update the cached copy. Sessions moved out by the
+retention sweeper live in compressed segments under archive_dir() (archive.py);
+load_transcript() falls back to them when the live session is gone.
+Message text is also indexed for phrase search (search_index.py, search.db).
+"""
 import os
+import hashlib
 import json
+import re
+import threading
 import uuid
 from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from app.services.archive import SessionArchive
+from app.services.manifest import SessionManifest
+from app.services.search_index import TranscriptSearchIndex
+from app.services.session_cache import SESSION_CACHE
+from app.services.sqlite_store import SqliteTranscriptStore
+
+# Storage directory inside backend (backend/storage/); created on first write
+BASE_DIR = os.environ.get("TRANSCRIPT_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "storage"))
+
+# When appends reach the disk: "always" (fsync every append), "snapshot"
+# (fsync snapshots only) or "never" (leave it to the OS)
+TRANSCRIPT_FSYNC = os.environ.get("TRANSCRIPT_FSYNC", "snapshot").lower()
+# Fold the log into the snapshot once it grows past this many bytes
+TRANSCRIPT_COMPACT_BYTES = int(os.environ.get("TRANSCRIPT_COMPACT_BYTES", str(256 * 1024)))
+
+# "file" (snapshot + log per session under BASE_DIR) or "sqlite" (one WAL database)
+TRANSCRIPT_BACKEND = os.environ.get("TRANSCRIPT_BACKEND", "file").lower()
+TRANSCRIPT_DB = os.environ.get("TRANSCRIPT_DB", os.path.join(BASE_DIR, "transcripts.db"))
+
+# Where the retention sweeper packs expired sessions (default: BASE_DIR/archive)
+TRANSCRIPT_ARCHIVE_DIR = os.environ.get("TRANSCRIPT_ARCHIVE_DIR")
+
+# Phrase index over message text (search_index.py); "off" disables it
+TRANSCRIPT_SEARCH = os.environ.get("TRANSCRIPT_SEARCH", "on").lower()
+TRANSCRIPT_SEARCH_DB = os.environ.get("TRANSCRIPT_SEARCH_DB")
+
+# Session ids become file names: letters, digits, "-" and "_" only (uuid4 ids qualify)
+_SESSION_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+# Striped locks: appends and compaction of one session never interleave in-process
+_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+class InvalidSessionIdError(ValueError):
+    """Raised for a session id that cannot name a stored session (e.g. one with a path in it)."""
+
+
+def check_session_id(session_id: Any) -> str:
+    """`session_id` if it is safe to store under, else InvalidSessionIdError."""
+    if not isinstance(session_id, str) or not _SESSION_ID.fullmatch(session_id):
+        raise InvalidSessionIdError(f"Invalid session id: {session_id!r}")
+    return session_id
+
+
+_DATABASE: Optional[SqliteTranscriptStore] = None
+_DATABASE_LOCK = threading.Lock()
+
+
+def database() -> Optional[SqliteTranscriptStore]:
+    """The SQLite store when TRANSCRIPT_BACKEND=sqlite (opened on first use), else None."""
+    global _DATABASE
+    if TRANSCRIPT_BACKEND != "sqlite":
+        return None
+    if _DATABASE is None:
+        with _DATABASE_LOCK:
+            if _DATABASE is None:
+                os.makedirs(os.path.dirname(os.path.abspath(TRANSCRIPT_DB)), exist_ok=True)
+                _DATABASE = SqliteTranscriptStore(TRANSCRIPT_DB)
+    return _DATABASE
+
+
+_SEARCH: Optional[TranscriptSearchIndex] = None
+_SEARCH_LOCK = threading.Lock()
+
+
+def search_index() -> Optional[TranscriptSearchIndex]:
+    """The phrase index (opened on first use), or None when TRANSCRIPT_SEARCH=off."""
+    global _SEARCH
+    if TRANSCRIPT_SEARCH == "off":
+        return None
+    path = TRANSCRIPT_SEARCH_DB or os.path.join(BASE_DIR, "search.db")
+    if _SEARCH is None or _SEARCH.path != path:
+        with _SEARCH_LOCK:
+            if _SEARCH is None or _SEARCH.path != path:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                _SEARCH = TranscriptSearchIndex(path)
+    return _SEARCH
+
+
+def _search_update(method: str, *args: Any) -> None:
+    """Apply a change to the phrase index. The session is already stored, so a failure is
+    counted rather than raised (app.tools.search_transcripts --rebuild repairs the index)."""
+    index = search_index()
+    if index is None:
+        return
+    try:
+        getattr(index, method)(*args)
+    except Exception as exc:
+        index.record_error(exc)
+
+
+def _search_append(session_id: str, messages: List[Dict[str, Any]], start: Optional[int]) -> None:
+    """Index appended messages; a session the index has not seen (or has fallen behind on)
+    is indexed whole from storage, with its stored persona and creation time. Caller holds the lock."""
+    index = search_index()
+    if index is None or not messages:
+        return
+    try:
+        if index.append(session_id, messages, start):
+            return
+        record = _read_stored(session_id)
+        if record is not None:
+            payload = record["payload"]
+            index.index_session(session_id, payload.get("messages") or [], payload.get("persona_id"),
+                                record.get("created_at"))
+    except Exception as exc:
+        index.record_error(exc)
+
+
+_MANIFEST: Optional[SessionManifest] = None
+_LEGACY: Dict[str, bool] = {}  # BASE_DIR -> still holds flat-layout files
+_DIRS: set = set()
+
+
+def manifest() -> SessionManifest:
+    """Index of the sessions under BASE_DIR (file backend)."""
+    global _MANIFEST
+    path = os.path.join(BASE_DIR, "manifest.jsonl")
+    if _MANIFEST is None or _MANIFEST.path != path:
+        _MANIFEST = SessionManifest(path)
+    return _MANIFEST
+
+
+def _lock(session_id: str) -> threading.Lock:
+    return _LOCKS[hash(session_id) % len(_LOCKS)]
+
+
+def shard_dir(session_id: str, base: Optional[str] = None) -> str:
+    check_session_id(session_id)  # every per-session path is built here
+    digest = hashlib.sha1(session_id.encode("utf-8")).hexdigest()
+    return os.path.join(base or BASE_DIR, digest[:2], digest[2:4])
+
+
+def _snapshot_path(session_id: str) -> str:
+    return os.path.join(shard_dir(session_id), f"{session_id}.json")
+
+
+def _evaluation_path(session_id: str) -> str:
+    return os.path.join(shard_dir(session_id), f"{session_id}.evaluation.json")
+
+
+def _ensure_dir(path: str) -> None:
+    directory = os.path.dirname(path)
+    if directory not in _DIRS:
+        os.makedirs(directory, exist_ok=True)
+        _DIRS.add(directory)
+
+
+def _log_path(snapshot_path: str) -> str:
+    return snapshot_path[: -len(".json")] + ".log"
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def _write_atomic(path: str, data: Any, indent: Optional[int] = 2) -> None:
+    _ensure_dir(path)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, ensure_ascii=False, indent=indent)
+        if TRANSCRIPT_FSYNC != "never":
+            fh.flush()
+            os.fsync(fh.fileno())
+    os.replace(tmp, path)  # readers see the old or the new file, never half of one
+
+
+def _log_position(log_path: str) -> Optional[Dict[str, Any]]:
+    """{"id", "offset"} of an existing log (offset = its current size), else None."""
+    try:
+        with open(log_path, "rb") as fh:
+            header = json.loads(fh.readline() or b"{}")
+            fh.seek(0, os.SEEK_END)
+            return {"id": header.get("id"), "offset": fh.tell()}
+    except (OSError, ValueError):
+        return None
+
 
-# Storage directory inside backend (backend/storage/)
-BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "storage")
-os.makedirs(BASE_DIR, exist_ok=True)
+# ===================== Layout =====================
 
+def _has_legacy() -> bool:
+    """Whether BASE_DIR still has flat-layout session files (checked once per process)."""
+    if BASE_DIR not in _LEGACY:
+        found = False
+        if os.path.isdir(BASE_DIR):
+            with os.scandir(BASE_DIR) as entries:
+                found = any(e.name.endswith((".json", ".log")) and e.is_file() for e in entries)
+        _LEGACY[BASE_DIR] = found
+    return _LEGACY[BASE_DIR]
+
+
+def _migrate_legacy(session_id: str) -> bool:
+    """Move a flat-layout session into its shard and index it (caller holds the lock)."""
+    if not _has_legacy():
+        return False
+    moved = False
+    for suffix in (".json", ".log", ".evaluation.json"):
+        old = os.path.join(BASE_DIR, session_id + suffix)
+        if os.path.exists(old):
+            new = os.path.join(shard_dir(session_id), session_id + suffix)
+            _ensure_dir(new)
+            os.replace(old, new)
+            moved = True
+    if moved:
+        _index(session_id, load_transcript_file(_snapshot_path(session_id)))
+    return moved
+
+
+def _index(session_id: str, record: Optional[Dict[str, Any]]) -> None:
+    if record is None:
+        return
+    filename = _snapshot_path(session_id)
+    size = sum(os.path.getsize(p) for p in (filename, _log_path(filename)) if os.path.exists(p))
+    manifest().put(session_id, record["payload"].get("persona_id"), record.get("created_at"), size,
+                   os.path.relpath(filename, BASE_DIR))
+
+
+def iter_storage_files(base: Optional[str] = None) -> Iterator[os.DirEntry]:
+    """Stream every file in the flat layout and the shard directories under `base`."""
+    base = base or BASE_DIR
+    if not os.path.isdir(base):
+        return
+    with os.scandir(base) as top:
+        for entry in top:
+            if entry.is_file():
+                yield entry
+            elif entry.is_dir() and len(entry.name) == 2:
+                with os.scandir(entry.path) as middle:
+                    for sub in middle:
+                        if sub.is_dir() and len(sub.name) == 2:
+                            with os.scandir(sub.path) as files:
+                                yield from (f for f in files if f.is_file())
+
+
+def iter_snapshot_paths(base: Optional[str] = None) -> Iterator[str]:
+    """Snapshot path of every stored session (also for sessions that only have a log)."""
+    for entry in iter_storage_files(base):
+        name = entry.name
+        if name.endswith(".json") and not name.endswith(".evaluation.json"):
+            yield entry.path
+        elif name.endswith(".log") and not os.path.exists(entry.path[: -len(".log")] + ".json"):
+            yield entry.path[: -len(".log")] + ".json"
+
+
+def list_sessions(since: Optional[str] = None, until: Optional[str] = None,
+                  persona_id: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Sessions created in [since, until) (ISO timestamps), from the index rather than the disk."""
+    db = database()
+    if db is not None:
+        return db.find_sessions(persona_id, since, until, limit=limit or 1_000_000)
+    return manifest().query(since, until, persona_id, limit)
+
+
+# ===================== Snapshots =====================
 
 def save_transcript(transcript_payload: dict) -> str:
     """
@@ -17,22 +300,274 @@ def save_transcript(transcript_payload: dict) -> str:
         "session_id": "optional",
         "messages": [{ "role": "rep", "content": "..." , "timestamp": "..." }, ...]
       }
+    The payload replaces the whole session, including anything appended since
+    the last snapshot; use append_turn() to add to a session.
     """
-    session_id = transcript_payload.get("session_id") or str(uuid.uuid4())
+    session_id = check_session_id(transcript_payload.get("session_id") or str(uuid.uuid4()))
     out = {
         "session_id": session_id,
-        "created_at": datetime.utcnow().isoformat() + "Z",
+        "created_at": _now(),
         "payload": transcript_payload,
     }
-    filename = os.path.join(BASE_DIR, f"{session_id}.json")
-    with open(filename, "w", encoding="utf-8") as fh:
-        json.dump(out, fh, ensure_ascii=False, indent=2)
+    with _lock(session_id):
+        db = database()
+        if db is not None:
+            out["payload"] = {**transcript_payload, "session_id": session_id}
+            db.save_transcript(out["payload"])
+        else:
+            _migrate_legacy(session_id)
+            filename = _snapshot_path(session_id)
+            log = _log_path(filename)
+            position = _log_position(log)
+            _write_atomic(filename, {**out, "log": position} if position else out)  # supersedes the log
+            if position:
+                _remove(log)
+            manifest().put(session_id, transcript_payload.get("persona_id"), out["created_at"],
+                           os.path.getsize(filename), os.path.relpath(filename, BASE_DIR))
+        _search_update("index_session", session_id, transcript_payload.get("messages") or [],
+                       transcript_payload.get("persona_id"), out["created_at"])
+        SESSION_CACHE.put(session_id, out)
     return session_id
 
 
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _replay(record: Optional[Dict[str, Any]], log_path: str) -> Optional[Dict[str, Any]]:
+    """Apply the events in `log_path` that `record` has not absorbed yet."""
+    try:
+        fh = open(log_path, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return record
+    with fh:
+        header = json.loads(fh.readline() or "{}")
+        absorbed = (record or {}).get("log") or {}
+        if absorbed.get("id") == header.get("id"):
+            fh.seek(absorbed.get("offset", 0))
+        if record is None:
+            session_id = os.path.basename(log_path)[: -len(".log")]
+            record = {"session_id": session_id, "created_at": header.get("created_at"),
+                      "payload": {"session_id": session_id, "messages": []}}
+        payload = record["payload"]
+        for line in fh:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue  # torn line from a crash mid-append
+            if event.get("op") == "msg":
+                payload.setdefault("messages", []).append(event["data"])
+            elif event.get("op") == "set":
+                payload.update(event["data"])
+    return record
+
+
+def load_transcript_file(path: str) -> dict | None:
+    """Load a session from its snapshot path, replaying the sibling log if any."""
+    record = None
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as fh:
+            record = json.load(fh)
+    record = _replay(record, _log_path(path))
+    if record is not None:
+        record.pop("log", None)
+    return record
+
+
 def load_transcript(session_id: str) -> dict | None:
-    filename = os.path.join(BASE_DIR, f"{session_id}.json")
+    """The session record, from the hot-session cache or else from storage."""
+    check_session_id(session_id)
+    record = SESSION_CACHE.get(session_id)
+    if record is not None:
+        return record
+    with _lock(session_id):  # no append can land between the read and the cache fill
+        db = database()
+        if db is not None:
+            record = db.load_transcript(session_id)
+        else:
+            _migrate_legacy(session_id)
+            record = load_transcript_file(_snapshot_path(session_id))
+        if record is not None:
+            SESSION_CACHE.put(session_id, record)
+            return record
+    record = archive().get(session_id)  # archived sessions are read-only and not cached
+    if record is not None:
+        record.pop("evaluation", None)
+    return record
+
+
+def delete_transcript(session_id: str, evaluation: bool = False) -> None:
+    """Remove a stored session (snapshot, log, search postings and cached copy; the evaluation too if asked)."""
+    check_session_id(session_id)
+    _delete_stored(session_id, evaluation)
+    _search_update("delete_session", session_id)
+
+
+def _delete_stored(session_id: str, evaluation: bool) -> None:
+    with _lock(session_id):
+        db = database()
+        if db is not None:
+            db.delete_transcript(session_id, evaluation)
+        else:
+            _migrate_legacy(session_id)
+            filename = _snapshot_path(session_id)
+            _remove(filename)
+            _remove(_log_path(filename))
+            if evaluation:
+                _remove(_evaluation_path(session_id))
+            manifest().delete(session_id)
+        SESSION_CACHE.discard(session_id)
+
+
+def archive_dir() -> str:
+    return TRANSCRIPT_ARCHIVE_DIR or os.path.join(BASE_DIR, "archive")
+
+
+_ARCHIVE: Optional[SessionArchive] = None
+
+
+def archive() -> SessionArchive:
+    """Compressed segments of archived sessions (see archive.py)."""
+    global _ARCHIVE
+    if _ARCHIVE is None or _ARCHIVE.directory != archive_dir():
+        _ARCHIVE = SessionArchive(archive_dir())
+    return _ARCHIVE
+
+
+def _load_stored(session_id: str) -> dict | None:
+    with _lock(session_id):
+        return _read_stored(session_id)
+
+
+def _read_stored(session_id: str) -> dict | None:
+    # live storage only, bypassing the cache (caller holds the lock)
+    db = database()
+    if db is not None:
+        return db.load_transcript(session_id)
+    _migrate_legacy(session_id)
+    return load_transcript_file(_snapshot_path(session_id))
+
+
+def archive_sessions(session_ids: Iterable[str]) -> List[str]:
+    """
+    Pack sessions (with their evaluations) into new archive segments, then
+    remove them from live storage. Returns the ids that were archived.
+    """
+    records = []
+    for session_id in session_ids:
+        record = _load_stored(session_id)
+        if record is None:
+            delete_transcript(session_id)  # drop a stale index entry
+            continue
+        evaluation = load_evaluation(session_id)
+        if evaluation is not None:
+            record["evaluation"] = evaluation
+        records.append(record)
+    if not records:
+        return []
+    archive().pack(records)  # durable before anything is deleted
+    for record in records:
+        _delete_stored(record["session_id"], evaluation=True)  # stays searchable
+    return [record["session_id"] for record in records]
+
+
+# ===================== Append log =====================
+
+def append_turn(session_id: str, messages: Iterable[Dict[str, Any]] = (), **fields: Any) -> None:
+    """
+    Append messages (and payload fields to overwrite, e.g. state=...) to the
+    session log with a single write. Compacts once the log is large.
+    """
+    check_session_id(session_id)
+    messages = list(messages)
+    lines = [json.dumps({"op": "msg", "data": m}, ensure_ascii=False) for m in messages]
+    if fields:
+        lines.append(json.dumps({"op": "set", "data": fields}, ensure_ascii=False))
+    if not lines:
+        return
+    added = sum(len(line) + 1 for line in lines)
+    with _lock(session_id):
+        resident = SESSION_CACHE.message_count(session_id)  # turn index of the first new message, if known
+        db = database()
+        if db is not None:
+            db.append_turn(session_id, messages, **fields)
+        else:
+            _append_log(session_id, lines)
+        _search_append(session_id, messages, resident)
+        SESSION_CACHE.append(session_id, messages, fields, added)
+
+
+def _append_log(session_id: str, lines: List[str]) -> None:
+    _migrate_legacy(session_id)
+    log = _log_path(_snapshot_path(session_id))
+    _ensure_dir(log)
+    with open(log, "a+b") as fh:
+        if fh.seek(0, os.SEEK_END) == 0:
+            lines.insert(0, json.dumps({"op": "log", "id": uuid.uuid4().hex, "created_at": _now()}))
+        else:
+            fh.seek(-1, os.SEEK_END)
+            if fh.read(1) != b"\n":
+                lines.insert(0, "")  # terminate a torn line so it can't swallow this one
+        fh.write(("\n".join(lines) + "\n").encode("utf-8"))
+        if TRANSCRIPT_FSYNC == "always":
+            fh.flush()
+            os.fsync(fh.fileno())
+        size = fh.tell()
+    if size >= TRANSCRIPT_COMPACT_BYTES:
+        _compact_locked(session_id)
+
+
+def compact(session_id: str) -> bool:
+    """Fold the session log into its snapshot. Returns False if there was no log."""
+    if database() is not None:
+        return False  # rows are already in place
+    with _lock(session_id):
+        return _compact_locked(session_id)
+
+
+def _compact_locked(session_id: str) -> bool:
+    _migrate_legacy(session_id)
+    filename = _snapshot_path(session_id)
+    log = _log_path(filename)
+    position = _log_position(log)
+    if position is None:
+        return False
+    record = load_transcript_file(filename)
+    record["log"] = position
+    _write_atomic(filename, record)
+    _remove(log)
+    _index(session_id, record)
+    return True
+
+
+# ===================== Evaluations =====================
+
+def save_evaluation(session_id: str, evaluation: dict) -> None:
+    """
+    Persist an evaluation result next to its transcript ({session_id}.evaluation.json).
+    """
+    check_session_id(session_id)
+    db = database()
+    if db is not None:
+        return db.save_evaluation(session_id, evaluation)
+    with _lock(session_id):
+        _migrate_legacy(session_id)
+        _write_atomic(_evaluation_path(session_id), evaluation)
+
+
+def load_evaluation(session_id: str) -> dict | None:
+    check_session_id(session_id)
+    db = database()
+    if db is not None:
+        return db.load_evaluation(session_id)
+    with _lock(session_id):
+        _migrate_legacy(session_id)
+    filename = _evaluation_path(session_id)
     if not os.path.exists(filename):
-        return None
+        record = archive().get(session_id) if os.path.isdir(archive_dir()) else None
+        return record.get("evaluation") if record else None
     with open(filename, "r", encoding="utf-8") as fh:
         return json.load(fh)
@@ -0,0 +1,164 @@
+# backend/app/services/turn_analysis.py
+"""
+LLM-backed per-turn critique of MR turns.
+
+Rep turns are packed into batches (each turn with its `format_turn_context`
+window) so one chat-completions request critiques several turns. Batches run
+concurrently under a semaphore and the whole analysis has a time budget: any
+turn without an LLM answer at the deadline, or whose batch failed, falls back
+to the heuristic `analyze_turn_simple`. The result is always complete.
+
+Works with any OpenAI-compatible endpoint (OPENAI_BASE_URL), including the
+local stub in app/tools/stub_llm.py.
+"""
+
+import asyncio
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.services.evaluation import TurnFeedback, analyze_turn_simple, format_turn_context, normalize_transcript
+from app.services.http_client import OPENAI_BASE_URL, OPENAI_HTTP
+
+# ===================== Configuration =====================
+
+TURN_ANALYSIS_MODEL = os.environ.get("TURN_ANALYSIS_MODEL") or os.environ.get("OPENAI_TEXT_MODEL", "gpt-4o-mini")
+TURN_ANALYSIS_BATCH_SIZE = int(os.environ.get("TURN_ANALYSIS_BATCH_SIZE", "6"))
+TURN_ANALYSIS_CONCURRENCY = int(os.environ.get("TURN_ANALYSIS_CONCURRENCY", "4"))
+# Total budget for the whole transcript, in seconds
+TURN_ANALYSIS_DEADLINE = float(os.environ.get("TURN_ANALYSIS_DEADLINE", "8.0"))
+
+SENTIMENTS = ("positive", "negative", "neutral")
+
+
+# ===================== Prompt =====================
+
+def build_system_prompt(persona: Dict[str, Any]) -> str:
+    return (
+        "You are an expert pharmaceutical sales coach reviewing a medical representative (MR) "
+        f"speaking with a doctor: {persona.get('description', persona.get('id', 'unknown'))}.\n"
+        f"Doctor communication style: {persona.get('communication_style', 'n/a')}. "
+        f"Skepticism: {persona.get('skepticism_level', 'n/a')}. "
+        f"Preferred evidence: {', '.join(persona.get('preferred_evidence', [])) or 'n/a'}.\n"
+        "For each item you receive, critique only the MR's LAST line, using the preceding lines as context.\n"
+        "Reply with strict JSON: {\"turns\": [{\"turn_index\": int, \"critique\": str, "
+        "\"sentiment\": \"positive\"|\"negative\"|\"neutral\", \"could_have_said\": [str], "
+        "\"justification\": str}]} with one entry per item and the same turn_index values."
+    )
+
+
+def build_batch_message(conversation: List[Dict[str, Any]], turn_indices: List[int]) -> str:
+    items = [{"turn_index": i, "context": format_turn_context(i, conversation)} for i in turn_indices]
+    return json.dumps({"items": items}, ensure_ascii=False)
+
+
+def _feedback_from_llm(turn_index: int, content: str, item: Dict[str, Any]) -> Optional[TurnFeedback]:
+    critique = item.get("critique")
+    if not isinstance(critique, str) or not critique:
+        return None
+    sentiment = item.get("sentiment") if item.get("sentiment") in SENTIMENTS else "neutral"
+    could_have_said = [s for s in (item.get("could_have_said") or []) if isinstance(s, str)]
+    return TurnFeedback(
+        turn_index=turn_index,
+        speaker="rep",
+        content=content,
+        critique=critique,
+        sentiment=sentiment,
+        could_have_said=could_have_said,
+        justification=str(item.get("justification") or ""),
+        source="llm",
+    )
+
+
+# ===================== Engine =====================
+
+async def _analyze_batch(client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                         conversation: List[Dict[str, Any]], persona: Dict[str, Any],
+                         turn_indices: List[int], results: Dict[int, TurnFeedback]) -> None:
+    async with semaphore:
+        response = await client.post(
+            f"{OPENAI_BASE_URL}/chat/completions",
+            json={
+                "model": TURN_ANALYSIS_MODEL,
+                "temperature": 0.2,
+                "response_format": {"type": "json_object"},
+                "messages": [
+                    {"role": "system", "content": build_system_prompt(persona)},
+                    {"role": "user", "content": build_batch_message(conversation, turn_indices)},
+                ],
+            },
+        )
+        response.raise_for_status()
+    content = response.json()["choices"][0]["message"]["content"] or "{}"
+    wanted = set(turn_indices)
+    for item in json.loads(content).get("turns", []):
+        turn_index = item.get("turn_index") if isinstance(item, dict) else None
+        if turn_index in wanted and turn_index not in results:
+            feedback = _feedback_from_llm(turn_index, conversation[turn_index].get("content", ""), item)
+            if feedback:
+                results[turn_index] = feedback
+
+
+async def analyze_turns(conversation: List[Dict[str, Any]], persona: Dict[str, Any],
+                        client: Optional[httpx.AsyncClient] = None,
+                        batch_size: int = TURN_ANALYSIS_BATCH_SIZE,
+                        concurrency: int = TURN_ANALYSIS_CONCURRENCY,
+                        deadline: float = TURN_ANALYSIS_DEADLINE) -> Dict[str, Any]:
+    """
+    Critique every MR turn, by the LLM where it answers in time and heuristically
+    otherwise. Returns {"turns": [TurnFeedback in turn order], "llm": n, "fallback": n,
+    "errors": [why batches fell back]}.
+    """
+    rep_indices = [i for i, (speaker, _, _) in enumerate(normalize_transcript(conversation)) if speaker == "MR"]
+    results: Dict[int, TurnFeedback] = {}
+    errors: List[str] = []
+    batches = [rep_indices[i:i + batch_size] for i in range(0, len(rep_indices), max(1, batch_size))]
+
+    if batches:
+        client = client or OPENAI_HTTP.client  # pooled; batches past the deadline are cancelled below
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        tasks = [
+            asyncio.create_task(_analyze_batch(client, semaphore, conversation, persona, batch, results))
+            for batch in batches
+        ]
+        try:
+            _, pending = await asyncio.wait(tasks, timeout=deadline)
+            for task in pending:
+                task.cancel()
+            outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+            errors = sorted({
+                f"{type(exc).__name__}: {str(exc).splitlines()[0] if str(exc) else ''}" for exc in outcomes
+                if isinstance(exc, Exception) and not isinstance(exc, asyncio.CancelledError)
+            })
+            if pending:
+                errors.append(f"deadline of {deadline}s reached with {len(pending)} batch(es) pending")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    llm_count = len(results)
+    for i in rep_indices:
+        if i not in results:
+            results[i] = analyze_turn_simple(i, conversation, persona)
+    return {
+        "turns": [results[i] for i in rep_indices],
+        "llm": llm_count,
+        "fallback": len(rep_indices) - llm_count,
+        "errors": errors,
+    }
+
+
+def feedback_row(tf: TurnFeedback) -> Dict[str, Any]:
+    """TurnFeedback as a classic turnLevelAnalysis row."""
+    return {
+        "turnIndex": tf.turn_index,
+        "speaker": tf.speaker,
+        "content": tf.content,
+        "critique": tf.critique,
+        "sentiment": tf.sentiment,
+        "couldHaveSaid": tf.could_have_said,
+        "justification": tf.justification,
+        "source": tf.source,
+    }
@@ -0,0 +1,93 @@
+# backend/app/tools/archive_sessions.py
+"""
+Inspect and maintain the compressed session archive (see app/services/archive.py).
+
+    cd backend
+    python -m app.tools.archive_sessions --stats
+    python -m app.tools.archive_sessions --older-than-days 30   # pack old live sessions now
+    python -m app.tools.archive_sessions --pack-json            # repack per-session archive/*.json files
+    python -m app.tools.archive_sessions --get <session_id>
+    python -m app.tools.archive_sessions --verify
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from app.services import transcript_service
+
+
+def archive_older_than(days: float, batch_size: int = 500) -> Dict[str, Any]:
+    start = time.perf_counter()
+    cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat() + "Z"
+    archived = 0
+    while True:
+        batch = [e["session_id"] for e in transcript_service.list_sessions(until=cutoff, limit=batch_size)]
+        done = len(transcript_service.archive_sessions(batch))
+        archived += done
+        if done < batch_size:
+            break
+    return {"archived": archived, "seconds": round(time.perf_counter() - start, 2)}
+
+
+def pack_json(batch_size: int = 500) -> Dict[str, Any]:
+    """Move one-file-per-session archive JSON into segments."""
+    start = time.perf_counter()
+    archive = transcript_service.archive()
+    packed = 0
+    records, paths = [], []
+    for entry in list(transcript_service.iter_storage_files(archive.directory)):
+        if not entry.name.endswith(".json"):
+            continue
+        with open(entry.path, "r", encoding="utf-8") as fh:
+            records.append(json.load(fh))
+        paths.append(entry.path)
+        if len(records) >= batch_size:
+            packed += _pack(archive, records, paths)
+            records, paths = [], []
+    if records:
+        packed += _pack(archive, records, paths)
+    return {"packed": packed, "seconds": round(time.perf_counter() - start, 2)}
+
+
+def _pack(archive, records: List[Dict[str, Any]], paths: List[str]) -> int:
+    archive.pack(records)
+    for path in paths:
+        os.remove(path)
+    return len(records)
+
+
+def verify() -> Dict[str, Any]:
+    segments = transcript_service.archive().segments()
+    return {"segments": len(segments), "corrupt": [s.name for s in segments if not s.verify()]}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Maintain the compressed session archive.")
+    parser.add_argument("--storage", default=transcript_service.BASE_DIR, help="transcript directory")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--older-than-days", type=float, help="archive live sessions older than this")
+    group.add_argument("--pack-json", action="store_true", help="repack per-session JSON archive files")
+    group.add_argument("--get", metavar="SESSION_ID", help="print one archived session")
+    group.add_argument("--verify", action="store_true", help="check every segment index checksum")
+    args = parser.parse_args(argv)
+    transcript_service.BASE_DIR = args.storage
+
+    if args.older_than_days is not None:
+        result = archive_older_than(args.older_than_days)
+    elif args.pack_json:
+        result = pack_json()
+    elif args.get:
+        result = transcript_service.archive().get(args.get)
+    elif args.verify:
+        result = verify()
+    else:
+        result = transcript_service.archive().stats()
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
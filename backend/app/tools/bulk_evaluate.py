@@ -0,0 +1,250 @@
+# backend/app/tools/bulk_evaluate.py
+"""
+Re-score every stored session after heuristic changes.
+
+    cd backend
+    python -m app.tools.bulk_evaluate --out rescore.ndjson --workers 8
+
+Sessions are streamed from the storage directory and evaluated on a process
+pool in chunks. Rows are appended to the output (NDJSON or CSV) as they finish
+and each finished session id is recorded in a checkpoint file, so an
+interrupted run picks up where it stopped. Per-persona aggregates are written
+to <out>.aggregates.json at the end.
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from app.services import transcript_service
+from app.services.evaluation import (
+    evaluate_conversation,
+    evaluate_conversation_combined,
+    evaluate_conversation_structured,
+)
+
+SCORE_KEYS = ("accuracy", "empathy", "compliance", "adaptability")
+CSV_FIELDS = ("session_id", "persona_id", "turns") + SCORE_KEYS + ("error",)
+
+KINDS = {
+    "classic": evaluate_conversation,
+    "structured": evaluate_conversation_structured,
+    "combined": evaluate_conversation_combined,
+}
+
+# Set in each pool worker by _init_worker
+_KIND = "classic"
+_MUST_SAY: Optional[List[str]] = None
+_MUST_NOT_SAY: Optional[List[str]] = None
+
+
+# ===================== Input =====================
+
+def iter_session_files(storage_dir: str) -> Iterator[str]:
+    """Stream transcript paths (flat and sharded layouts) without listing everything up front."""
+    return transcript_service.iter_snapshot_paths(storage_dir)
+
+
+def _session_id_from_path(path: str) -> str:
+    return os.path.basename(path)[: -len(".json")]
+
+
+# ===================== Worker =====================
+
+def _init_worker(kind: str, must_say: Optional[List[str]], must_not_say: Optional[List[str]]) -> None:
+    global _KIND, _MUST_SAY, _MUST_NOT_SAY
+    _KIND, _MUST_SAY, _MUST_NOT_SAY = kind, must_say, must_not_say
+
+
+def _scores_of(result: Dict[str, Any]) -> Dict[str, Any]:
+    if "classic" in result:  # combined
+        result = result["classic"]
+    return result.get("scores") or {}
+
+
+def evaluate_file(path: str) -> Dict[str, Any]:
+    """Evaluate one stored session; never raises so one bad file can't stop the run."""
+    row: Dict[str, Any] = {"session_id": _session_id_from_path(path), "persona_id": None, "turns": 0}
+    try:
+        record = transcript_service.load_transcript_file(path)
+        payload = record.get("payload", {})
+        messages = payload.get("messages", [])
+        row["persona_id"] = payload.get("persona_id")
+        row["turns"] = len(messages)
+        must_say = _MUST_SAY if _MUST_SAY is not None else payload.get("must_say")
+        must_not_say = _MUST_NOT_SAY if _MUST_NOT_SAY is not None else payload.get("must_not_say")
+        result = KINDS[_KIND](messages, row["persona_id"] or "", must_say, must_not_say)
+        if "error" in result:
+            row["error"] = result["error"]
+        row["scores"] = _scores_of(result)
+        row["evaluation"] = result
+    except Exception as exc:
+        row["error"] = f"{type(exc).__name__}: {exc}"
+    return row
+
+
+# ===================== Output =====================
+
+class RowWriter:
+    """Appends rows to NDJSON or CSV and flushes after each one."""
+
+    def __init__(self, path: str, fmt: str, full: bool):
+        self.fmt = fmt
+        self.full = full
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.fh = open(path, "a", encoding="utf-8", newline="")
+        self.csv = None
+        if fmt == "csv":
+            self.csv = csv.DictWriter(self.fh, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            if new_file:
+                self.csv.writeheader()
+
+    def write(self, row: Dict[str, Any]) -> None:
+        if self.csv:
+            flat = {k: row.get(k) for k in ("session_id", "persona_id", "turns", "error")}
+            flat.update({k: (row.get("scores") or {}).get(k) for k in SCORE_KEYS})
+            self.csv.writerow(flat)
+        else:
+            out = row if self.full else {k: v for k, v in row.items() if k != "evaluation"}
+            self.fh.write(json.dumps(out, ensure_ascii=False) + "\n")
+        self.fh.flush()
+
+    def close(self) -> None:
+        self.fh.close()
+
+
+def read_rows(path: str, fmt: str) -> Iterator[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8", newline="") as fh:
+        if fmt == "csv":
+            for rec in csv.DictReader(fh):
+                scores = {k: float(rec[k]) for k in SCORE_KEYS if rec.get(k) not in (None, "")}
+                yield {"session_id": rec["session_id"], "persona_id": rec["persona_id"] or None,
+                       "error": rec.get("error") or None, "scores": scores}
+        else:
+            for line in fh:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # torn last line from an interrupted run
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as fh:
+        return {line.strip() for line in fh if line.endswith("\n") and line.strip()}
+
+
+def aggregate(rows: Iterator[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per-persona session count, error count and mean scores (deduplicated by session id)."""
+    seen: Set[str] = set()
+    acc: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        sid = row.get("session_id")
+        if sid in seen:
+            continue
+        seen.add(sid)
+        bucket = acc.setdefault(row.get("persona_id") or "unknown", {"sessions": 0, "errors": 0, "sums": {}, "scored": 0})
+        bucket["sessions"] += 1
+        if row.get("error"):
+            bucket["errors"] += 1
+            continue
+        scores = row.get("scores") or {}
+        if scores:
+            bucket["scored"] += 1
+            for k in SCORE_KEYS:
+                bucket["sums"][k] = bucket["sums"].get(k, 0) + float(scores.get(k, 0))
+    return {
+        persona: {
+            "sessions": b["sessions"],
+            "errors": b["errors"],
+            "mean_scores": {k: round(v / b["scored"], 2) for k, v in b["sums"].items()} if b["scored"] else {},
+        }
+        for persona, b in sorted(acc.items())
+    }
+
+
+# ===================== CLI =====================
+
+def run(storage_dir: str, out: str, fmt: str = "ndjson", kind: str = "classic", workers: int = 0,
+        chunk_size: int = 16, checkpoint: Optional[str] = None, restart: bool = False, full: bool = False,
+        must_say: Optional[List[str]] = None, must_not_say: Optional[List[str]] = None,
+        progress_every: int = 500) -> Dict[str, Any]:
+    checkpoint = checkpoint or out + ".checkpoint"
+    if restart:
+        for path in (out, checkpoint):
+            if os.path.exists(path):
+                os.remove(path)
+
+    done = load_checkpoint(checkpoint)
+    todo = (p for p in iter_session_files(storage_dir) if _session_id_from_path(p) not in done)
+
+    writer = RowWriter(out, fmt, full)
+    processed = errors = 0
+    start = time.perf_counter()
+    try:
+        with open(checkpoint, "a", encoding="utf-8") as ckpt, multiprocessing.Pool(
+            processes=workers or None,
+            initializer=_init_worker,
+            initargs=(kind, must_say, must_not_say),
+        ) as pool:
+            for row in pool.imap_unordered(evaluate_file, todo, chunksize=chunk_size):
+                writer.write(row)
+                ckpt.write(row["session_id"] + "\n")
+                ckpt.flush()
+                processed += 1
+                errors += 1 if row.get("error") else 0
+                if progress_every and processed % progress_every == 0:
+                    rate = processed / (time.perf_counter() - start)
+                    print(f"{processed} sessions, {rate:.1f} sessions/s", file=sys.stderr)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    aggregates = aggregate(read_rows(out, fmt))
+    with open(out + ".aggregates.json", "w", encoding="utf-8") as fh:
+        json.dump(aggregates, fh, ensure_ascii=False, indent=2)
+
+    return {
+        "processed": processed,
+        "skipped_from_checkpoint": len(done),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "sessions_per_second": round(processed / elapsed, 1) if elapsed > 0 else None,
+        "aggregates": aggregates,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Re-evaluate every stored session in parallel.")
+    parser.add_argument("--storage", default=transcript_service.BASE_DIR, help="transcript directory")
+    parser.add_argument("--out", default="bulk_evaluation.ndjson", help="output file (appended to)")
+    parser.add_argument("--format", choices=("ndjson", "csv"), default=None, help="default: from --out extension")
+    parser.add_argument("--kind", choices=sorted(KINDS), default="classic")
+    parser.add_argument("--workers", type=int, default=0, help="processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=16, help="sessions per pool task")
+    parser.add_argument("--checkpoint", default=None, help="default: <out>.checkpoint")
+    parser.add_argument("--restart", action="store_true", help="ignore and overwrite previous progress")
+    parser.add_argument("--full", action="store_true", help="NDJSON only: include the full evaluation")
+    parser.add_argument("--must-say", action="append", default=None, help="override stored must-say (repeatable)")
+    parser.add_argument("--must-not-say", action="append", default=None, help="override stored must-not-say")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.out.endswith(".csv") else "ndjson")
+    summary = run(
+        storage_dir=args.storage, out=args.out, fmt=fmt, kind=args.kind, workers=args.workers,
+        chunk_size=args.chunk_size, checkpoint=args.checkpoint, restart=args.restart, full=args.full,
+        must_say=args.must_say, must_not_say=args.must_not_say,
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
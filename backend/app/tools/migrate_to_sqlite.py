@@ -0,0 +1,68 @@
+# backend/app/tools/migrate_to_sqlite.py
+"""
+One-shot copy of the file store (snapshots, logs, evaluation results) into the
+SQLite store used when TRANSCRIPT_BACKEND=sqlite.
+
+    cd backend
+    python -m app.tools.migrate_to_sqlite --db storage/transcripts.db
+
+Sessions are read with their logs replayed and inserted in batches, one
+transaction per batch. Re-running is safe: rows are upserted by session id.
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.services import transcript_service
+from app.services.sqlite_store import SqliteTranscriptStore
+
+
+def iter_records(storage_dir: str) -> Iterator[Dict[str, Any]]:
+    for path in transcript_service.iter_snapshot_paths(storage_dir):
+        record = transcript_service.load_transcript_file(path)
+        if record and record.get("session_id"):
+            yield record
+
+
+def iter_evaluations(storage_dir: str) -> Iterator[tuple]:
+    for entry in transcript_service.iter_storage_files(storage_dir):
+        if entry.name.endswith(".evaluation.json"):
+            with open(entry.path, "r", encoding="utf-8") as fh:
+                yield entry.name[: -len(".evaluation.json")], json.load(fh)
+
+
+def migrate(storage_dir: str, db_path: str, batch_size: int = 500) -> Dict[str, Any]:
+    store = SqliteTranscriptStore(db_path)
+    start = time.perf_counter()
+    sessions = 0
+    batch: List[Dict[str, Any]] = []
+    for record in iter_records(storage_dir):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            sessions += store.import_records(batch)
+            batch = []
+    if batch:
+        sessions += store.import_records(batch)
+    evaluations = 0
+    for session_id, evaluation in iter_evaluations(storage_dir):
+        store.save_evaluation(session_id, evaluation)
+        evaluations += 1
+    stats = store.stats()
+    store.close()
+    return {"sessions": sessions, "evaluations": evaluations, "seconds": round(time.perf_counter() - start, 2),
+            "db": stats}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Copy file-stored sessions into the SQLite store.")
+    parser.add_argument("--storage", default=transcript_service.BASE_DIR, help="transcript directory")
+    parser.add_argument("--db", default=transcript_service.TRANSCRIPT_DB, help="SQLite database path")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args(argv)
+    print(json.dumps(migrate(args.storage, args.db, args.batch_size), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# backend/app/tools/search_transcripts.py
+"""
+Phrase search over stored transcripts (see app/services/search_index.py).
+
+    cd backend
+    python -m app.tools.search_transcripts "no side effects" revolutionary --role rep --since 2026-10-01
+    python -m app.tools.search_transcripts "off-label" --sessions
+    python -m app.tools.search_transcripts --rebuild     # index everything stored (live and archived)
+
+The server keeps the index current on every save; --rebuild is for the first
+run on existing storage, or after index errors show up in /api/storage/stats.
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from app.services import transcript_service
+
+
+def rebuild() -> Dict[str, Any]:
+    start = time.perf_counter()
+    index = transcript_service.search_index()
+    path = index.path
+    index.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    transcript_service._SEARCH = None
+    index = transcript_service.search_index()
+    sessions = turns = 0
+    for entry in transcript_service.list_sessions():
+        record = transcript_service._load_stored(entry["session_id"])
+        if record is not None:
+            payload = record["payload"]
+            turns += index.index_session(record["session_id"], payload.get("messages") or [],
+                                         payload.get("persona_id"), record.get("created_at"))
+            sessions += 1
+    for record in transcript_service.archive().iter_records():
+        payload = record["payload"]
+        turns += index.index_session(record["session_id"], payload.get("messages") or [],
+                                     payload.get("persona_id"), record.get("created_at"))
+        sessions += 1
+    index.optimize()
+    return {"sessions": sessions, "turns": turns, "seconds": round(time.perf_counter() - start, 2)}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Search stored transcripts for phrases.")
+    parser.add_argument("phrases", nargs="*", help="phrases to look for (any of them matches)")
+    parser.add_argument("--storage", default=transcript_service.BASE_DIR, help="transcript directory")
+    parser.add_argument("--role", help="only turns by this role (e.g. rep, doctor)")
+    parser.add_argument("--persona", help="only sessions with this persona_id")
+    parser.add_argument("--since", help="sessions created at or after (ISO)")
+    parser.add_argument("--until", help="sessions created before (ISO)")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--sessions", action="store_true", help="one line per session instead of per turn")
+    parser.add_argument("--rebuild", action="store_true", help="re-index all live and archived sessions")
+    args = parser.parse_args(argv)
+    transcript_service.BASE_DIR = args.storage
+    if transcript_service.search_index() is None:
+        parser.error("search is disabled (TRANSCRIPT_SEARCH=off)")
+
+    if args.rebuild:
+        print(json.dumps(rebuild(), indent=2))
+        return
+    if not args.phrases:
+        parser.error("give at least one phrase, or --rebuild")
+    index = transcript_service.search_index()
+    query = index.sessions if args.sessions else index.search
+    start = time.perf_counter()
+    results = query(args.phrases, args.role, args.since, args.until, args.persona, args.limit)
+    took = (time.perf_counter() - start) * 1e3
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+    print(f"# {len(results)} results in {took:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# backend/app/tools/shard_storage.py
+"""
+Move flat-layout sessions (storage/{session_id}.json/.log/.evaluation.json)
+into the sharded layout and index them, or rebuild the manifest from the shards.
+
+    cd backend
+    python -m app.tools.shard_storage             # migrate everything now
+    python -m app.tools.shard_storage --rebuild   # re-index from the shard directories
+
+The server also migrates each flat session the first time it is touched, so
+running this is optional.
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from app.services import transcript_service
+
+
+def migrate(storage_dir: str) -> Dict[str, Any]:
+    transcript_service.BASE_DIR = storage_dir
+    start = time.perf_counter()
+    session_ids = set()
+    with os.scandir(storage_dir) as entries:
+        for entry in entries:
+            if entry.is_file():
+                for suffix in (".evaluation.json", ".json", ".log"):
+                    if entry.name.endswith(suffix):
+                        session_ids.add(entry.name[: -len(suffix)])
+                        break
+    for session_id in session_ids:
+        with transcript_service._lock(session_id):
+            transcript_service._migrate_legacy(session_id)
+    transcript_service._LEGACY[storage_dir] = False
+    return {"migrated": len(session_ids), "seconds": round(time.perf_counter() - start, 2)}
+
+
+def rebuild(storage_dir: str) -> Dict[str, Any]:
+    transcript_service.BASE_DIR = storage_dir
+    start = time.perf_counter()
+    path = os.path.join(storage_dir, "manifest.jsonl")
+    if os.path.exists(path):
+        os.replace(path, path + ".bak")
+    transcript_service._MANIFEST = None
+    indexed = 0
+    for snapshot in transcript_service.iter_snapshot_paths(storage_dir):
+        record = transcript_service.load_transcript_file(snapshot)
+        if record and record.get("session_id") and os.path.normpath(os.path.dirname(snapshot)) != os.path.normpath(storage_dir):
+            transcript_service._index(record["session_id"], record)
+            indexed += 1
+    return {"indexed": indexed, "seconds": round(time.perf_counter() - start, 2)}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Shard flat session storage and maintain its manifest.")
+    parser.add_argument("--storage", default=transcript_service.BASE_DIR, help="transcript directory")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild manifest.jsonl from the shards")
+    args = parser.parse_args(argv)
+    result = rebuild(args.storage) if args.rebuild else migrate(args.storage)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# backend/app/tools/simulate_personas.py
+"""
+Monte Carlo simulation of the persona-engine state rules (update_state /
+transition_mood) over large batches of synthetic sessions. Needs NumPy
+(offline tool only; not a server dependency).
+
+    cd backend
+    python -m app.tools.simulate_personas --sessions 100000 --verify 500
+
+Each session samples one relevancy (-1/0/1) per rep turn. The doctor side is a
+fixed synthetic policy standing in for the LLM: it never overrides the mood,
+moves Introduction -> Discussion after the first turn, and goes to Closure when
+an irrelevant message arrives while time pressure is above 3 (the constraint the
+system prompt gives the model). A session ends at Closure or when
+availableTimeSeconds runs out.
+
+State is held as NumPy arrays across sessions and stepped turn by turn; the
+skepticism window sum comes from a cumulative sum over the relevancy matrix.
+--verify N replays N sampled sessions through the scalar update_state and
+requires identical per-turn trajectories.
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - offline tool
+    sys.exit("simulate_personas needs NumPy: pip install numpy")
+
+from app.models.doctor_persona import PERSONA_REGISTRY, Persona
+from app.services.persona_engine import (
+    MOODS, SKEPTICISM_LEVELS, SKEPTICISM_WINDOW, STAGES, DoctorState, update_state,
+)
+
+TURN_SECONDS = 30  # what /conversation/turn advances per exchange
+CLOSURE_PRESSURE = 3
+
+_NEUTRAL, _ENGAGED, _DISMISSIVE = (MOODS.index(m) for m in ("Neutral", "Engaged", "Dismissive"))
+_INTRODUCTION, _DISCUSSION, _CLOSURE = (STAGES.index(s) for s in ("Introduction", "Discussion", "Closure"))
+_BASELINE_NUMERIC = {"Low": 1, "Medium": 2, "High": 3}
+
+
+def max_turns(persona: Persona, turn_seconds: int = TURN_SECONDS) -> int:
+    return max(1, -(-int(persona["availableTimeSeconds"]) // turn_seconds))
+
+
+def sample_relevancy(sessions: int, turns: int, probs: Sequence[float], rng: "np.random.Generator") -> "np.ndarray":
+    """(sessions, turns) matrix of -1/0/1 drawn with probabilities (p_irrelevant, p_neutral, p_relevant)."""
+    return rng.choice(np.array([-1, 0, 1], dtype=np.int8), size=(sessions, turns), p=list(probs))
+
+
+def synthetic_llm(state: DoctorState, relevancy: int) -> Dict[str, Any]:
+    """The doctor-side policy used by both simulators (scalar form)."""
+    closing = state.time_pressure_level > CLOSURE_PRESSURE and relevancy == -1
+    return {"relevancy": relevancy, "nextConversationStage": "Closure" if closing else "Discussion"}
+
+
+# ===================== Vectorized =====================
+
+def simulate(persona: Persona, relevancy: "np.ndarray", turn_seconds: int = TURN_SECONDS) -> Dict[str, "np.ndarray"]:
+    """
+    Step every session at once. Returns per-turn state arrays of shape
+    (turns + 1, sessions) (row 0 is the initial state) plus `turns_played`.
+    """
+    n, turns = relevancy.shape
+    baseline = persona.get("skepticism_level", "Medium")
+    b = _BASELINE_NUMERIC[baseline]
+    available = int(persona["availableTimeSeconds"])
+
+    # running window sums: window[:, t] = sum of relevancy[:, t-4 .. t]
+    csum = np.zeros((n, turns + 1), dtype=np.int32)
+    np.cumsum(relevancy, axis=1, out=csum[:, 1:])
+    idx = np.arange(1, turns + 1)
+    window = csum[:, idx] - csum[:, np.maximum(0, idx - SKEPTICISM_WINDOW)]
+
+    shape = (turns + 1, n)
+    trust = np.empty(shape, dtype=np.int16)
+    pressure = np.empty(shape, dtype=np.int8)
+    seconds = np.empty(shape, dtype=np.int32)
+    mood = np.empty(shape, dtype=np.int8)
+    stage = np.empty(shape, dtype=np.int8)
+    level = np.empty(shape, dtype=np.int8)
+    trust[0], pressure[0], seconds[0] = 50, 1, 0
+    mood[0], stage[0], level[0] = _NEUTRAL, _INTRODUCTION, SKEPTICISM_LEVELS.index(baseline)
+    active = np.ones(n, dtype=bool)
+    turns_played = np.zeros(n, dtype=np.int16)
+
+    for t in range(turns):
+        r = relevancy[:, t]
+        p, s = pressure[t], seconds[t]
+        closing = (p > CLOSURE_PRESSURE) & (r == -1)
+
+        new_trust = np.clip(trust[t] + 10 * r, 0, 100)
+        started = s > 0
+        new_p = np.where(started & (r == 1), np.maximum(0, p - 1),
+                         np.where(started & (r <= 0), np.minimum(5, p + 1), p))
+        w = window[:, t]
+        new_level = np.where(w >= b + 1, SKEPTICISM_LEVELS.index("Low"),
+                             np.where(w <= b - 1, SKEPTICISM_LEVELS.index("High"), SKEPTICISM_LEVELS.index("Medium")))
+        new_mood = np.where(new_p >= 4, _DISMISSIVE,
+                            np.where(r == 1, _ENGAGED, np.where(r == -1, _DISMISSIVE, mood[t])))
+        new_stage = np.where(closing, _CLOSURE, _DISCUSSION)
+
+        # finished sessions keep their last state
+        trust[t + 1] = np.where(active, new_trust, trust[t])
+        pressure[t + 1] = np.where(active, new_p, p)
+        seconds[t + 1] = np.where(active, s + turn_seconds, s)
+        level[t + 1] = np.where(active, new_level, level[t])
+        mood[t + 1] = np.where(active, new_mood, mood[t])
+        stage[t + 1] = np.where(active, new_stage, stage[t])
+        turns_played += active
+        active &= (stage[t + 1] != _CLOSURE) & (seconds[t + 1] < available)
+
+    return {"trust": trust, "pressure": pressure, "seconds": seconds, "mood": mood,
+            "stage": stage, "level": level, "turns_played": turns_played}
+
+
+# ===================== Scalar reference =====================
+
+def simulate_scalar(persona: Persona, relevancy_row: Sequence[int], turn_seconds: int = TURN_SECONDS) -> List[tuple]:
+    """One session through the real update_state; one (trust, pressure, seconds, mood, stage, level) per turn."""
+    baseline = persona.get("skepticism_level", "Medium")
+    available = int(persona["availableTimeSeconds"])
+    state = DoctorState(current_skepticism_level=baseline)
+    trajectory = []
+    for r in relevancy_row:
+        state = update_state(state, synthetic_llm(state, int(r)), turn_seconds, baseline)
+        trajectory.append((state.trust, state.time_pressure_level, state.seconds_elapsed, MOODS.index(state.mood),
+                           STAGES.index(state.stage), SKEPTICISM_LEVELS.index(state.current_skepticism_level)))
+        if state.stage == "Closure" or state.seconds_elapsed >= available:
+            break
+    return trajectory
+
+
+def verify(persona: Persona, relevancy: "np.ndarray", result: Dict[str, "np.ndarray"], sample: int,
+           rng: "np.random.Generator", turn_seconds: int = TURN_SECONDS) -> int:
+    """Compare `sample` random sessions against the scalar rules; returns the number of mismatches."""
+    fields = ("trust", "pressure", "seconds", "mood", "stage", "level")
+    mismatches = 0
+    for i in rng.choice(relevancy.shape[0], size=min(sample, relevancy.shape[0]), replace=False):
+        expected = simulate_scalar(persona, relevancy[i], turn_seconds)
+        played = int(result["turns_played"][i])
+        got = [tuple(int(result[f][t + 1, i]) for f in fields) for t in range(played)]
+        mismatches += got != expected
+    return mismatches
+
+
+# ===================== Summaries =====================
+
+def _percentiles(values: "np.ndarray") -> Dict[str, float]:
+    if values.size == 0:
+        return {}
+    p10, p50, p90 = np.percentile(values, [10, 50, 90])
+    return {"mean": round(float(values.mean()), 2), "p10": float(p10), "p50": float(p50), "p90": float(p90)}
+
+
+def _distribution(codes: "np.ndarray", labels: Sequence[str]) -> Dict[str, float]:
+    counts = np.bincount(codes.astype(np.int64), minlength=len(labels))
+    return {label: round(float(c) / codes.size, 4) for label, c in zip(labels, counts) if c}
+
+
+def summarize(persona: Persona, result: Dict[str, "np.ndarray"]) -> Dict[str, Any]:
+    n = result["turns_played"].size
+    last = result["turns_played"].astype(np.int64)
+    cols = np.arange(n)
+    final = {f: result[f][last, cols] for f in ("trust", "pressure", "seconds", "mood", "stage", "level")}
+    closed = final["stage"] == _CLOSURE
+    return {
+        "persona": persona.id,
+        "skepticism_level": persona.get("skepticism_level"),
+        "available_seconds": int(persona["availableTimeSeconds"]),
+        "sessions": n,
+        "closure_rate": round(float(closed.mean()), 4),
+        "timeout_rate": round(float((~closed).mean()), 4),
+        "turns_to_closure": _percentiles(last[closed]),
+        "seconds_at_closure": _percentiles(final["seconds"][closed]),
+        "final_trust": _percentiles(final["trust"]),
+        "final_time_pressure": _distribution(final["pressure"], [str(i) for i in range(6)]),
+        "final_mood": _distribution(final["mood"], MOODS),
+        "final_skepticism": _distribution(final["level"], SKEPTICISM_LEVELS),
+    }
+
+
+# ===================== CLI =====================
+
+def run(persona_ids: Optional[List[str]] = None, sessions: int = 10_000, probs: Sequence[float] = (1 / 3, 1 / 3, 1 / 3),
+        turn_seconds: int = TURN_SECONDS, seed: int = 0, verify_sample: int = 0) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(seed)
+    personas = [PERSONA_REGISTRY.get(pid) for pid in persona_ids] if persona_ids else list(PERSONA_REGISTRY.all())
+    reports = []
+    for persona in personas:
+        if persona is None:
+            raise SystemExit("Unknown persona id")
+        relevancy = sample_relevancy(sessions, max_turns(persona, turn_seconds), probs, rng)
+        result = simulate(persona, relevancy, turn_seconds)
+        report = summarize(persona, result)
+        if verify_sample:
+            mismatches = verify(persona, relevancy, result, verify_sample, rng, turn_seconds)
+            report["verified_sessions"] = min(verify_sample, sessions)
+            report["verify_mismatches"] = mismatches
+        reports.append(report)
+    return reports
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of persona state dynamics.")
+    parser.add_argument("--persona", action="append", default=None, help="persona id (repeatable; default all)")
+    parser.add_argument("--sessions", type=int, default=10_000, help="synthetic sessions per persona")
+    parser.add_argument("--probs", default="0.333,0.334,0.333",
+                        help="relevancy probabilities p(-1),p(0),p(1)")
+    parser.add_argument("--turn-seconds", type=int, default=TURN_SECONDS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verify", type=int, default=0, help="check N sampled sessions against update_state")
+    args = parser.parse_args(argv)
+
+    probs = [float(x) for x in args.probs.split(",")]
+    if len(probs) != 3 or abs(sum(probs) - 1) > 1e-6:
+        parser.error("--probs needs three probabilities summing to 1")
+    reports = run(args.persona, args.sessions, probs, args.turn_seconds, args.seed, args.verify)
+    print(json.dumps(reports, indent=2))
+    if any(r.get("verify_mismatches") for r in reports):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# backend/app/tools/stub_llm.py
+"""
+Local stand-in for an OpenAI-compatible API, for running the LLM turn analysis
+and Realtime session minting without network access or API cost.
+
+    cd backend
+    python -m app.tools.stub_llm --port 9100 --latency 0.3
+    OPENAI_BASE_URL=http://127.0.0.1:9100/v1 ...
+
+It answers POST /v1/chat/completions with a deterministic critique for every
+item in the request's last user message ({"items": [{"turn_index", "context"}]})
+or, for any other prompt, a doctor-turn JSON answer; with "stream": true the
+answer arrives as chat.completion.chunk server-sent events. POST
+/v1/realtime/sessions returns a fake ephemeral session. --latency delays each
+response (the first token, when streaming); --token-latency spaces out the
+tokens (a non-streamed answer waits for all of them); --fail-every N returns
+HTTP 500 on every Nth request, to exercise the fallback path; --certfile/--keyfile
+serve HTTPS.
+"""
+
+import argparse
+import itertools
+import json
+import ssl
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+
+def critique_items(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    turns = []
+    for item in items:
+        last_line = (item.get("context") or "").splitlines()[-1:] or [""]
+        evidence = any(w in last_line[0].lower() for w in ("trial", "data", "study", "n="))
+        turns.append({
+            "turn_index": item.get("turn_index"),
+            "critique": f"[stub] {'Good use of evidence.' if evidence else 'Be more specific.'}",
+            "sentiment": "positive" if evidence else "neutral",
+            "could_have_said": [] if evidence else ["Cite the primary endpoint and n-size"],
+            "justification": "Stub model response.",
+        })
+    return {"turns": turns}
+
+
+DOCTOR_REPLY = {
+    "doctorReply": "I have read the headline numbers. What I need is the safety data in patients "
+                   "over sixty-five with renal impairment, and how that compares with what I prescribe now.",
+    "relevancy": 1,
+    "nextConversationStage": "Discussion",
+    "nextMood": "Engaged",
+    "signals": ["asks_for_evidence"],
+}
+
+
+def tokens(text: str, size: int = 4) -> List[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def realtime_session(request: Dict[str, Any], ttl: int = 60) -> Dict[str, Any]:
+    return {
+        "id": f"sess_{uuid.uuid4().hex[:24]}",
+        "object": "realtime.session",
+        "model": request.get("model", "stub"),
+        "voice": request.get("voice", "verse"),
+        "expires_at": int(time.time()) + 1800,
+        "client_secret": {"value": f"ek_{uuid.uuid4().hex}", "expires_at": int(time.time()) + ttl},
+    }
+
+
+def make_handler(latency: float, fail_every: int, token_latency: float = 0.0):
+    counter = itertools.count(1)
+    lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so clients can reuse connections
+        disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+        def log_message(self, fmt, *args):  # keep the console quiet
+            pass
+
+        def _reply(self, status: int, body: Dict[str, Any]) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            try:
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client gave up (e.g. deadline reached)
+
+        def _stream(self, n: int, model: str, content: str) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            pieces = [{"role": "assistant", "content": ""}] + [{"content": t} for t in tokens(content)]
+            try:
+                for i, delta in enumerate(pieces):
+                    if i > 1 and token_latency:
+                        time.sleep(token_latency)
+                    chunk = {"id": f"stub-{n}", "object": "chat.completion.chunk", "model": model,
+                             "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                    self._chunk(f"data: {json.dumps(chunk)}\n\n")
+                self._chunk("data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def _chunk(self, text: str) -> None:
+            data = text.encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+        def do_POST(self):
+            with lock:
+                n = next(counter)
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if latency:
+                time.sleep(latency)
+            if fail_every and n % fail_every == 0:
+                self._reply(500, {"error": {"message": "stub failure"}})
+                return
+            if self.path.rstrip("/").endswith("/realtime/sessions"):
+                self._reply(200, realtime_session(request))
+                return
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._reply(404, {"error": {"message": f"unknown path {self.path}"}})
+                return
+            user = next((m for m in reversed(request.get("messages", [])) if m.get("role") == "user"), {})
+            try:
+                items = json.loads(user.get("content") or "{}").get("items")
+            except (ValueError, AttributeError):
+                items = None
+            content = json.dumps(critique_items(items) if items is not None else DOCTOR_REPLY)
+            if request.get("stream"):
+                self._stream(n, request.get("model", "stub"), content)
+                return
+            if token_latency:
+                time.sleep(token_latency * len(tokens(content)))
+            self._reply(200, {
+                "id": f"stub-{n}",
+                "object": "chat.completion",
+                "model": request.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }],
+            })
+
+    return StubHandler
+
+
+class StubServer(ThreadingHTTPServer):
+    request_queue_size = 128  # bursts of new connections must not overflow the listen backlog
+    daemon_threads = True
+
+
+def _server(host: str, port: int, latency: float, fail_every: int,
+            certfile: Optional[str], keyfile: Optional[str], token_latency: float = 0.0) -> ThreadingHTTPServer:
+    server = StubServer((host, port), make_handler(latency, fail_every, token_latency))
+    if certfile:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        # handshake in the handler thread, not in the accept loop
+        server.socket = context.wrap_socket(server.socket, server_side=True, do_handshake_on_connect=False)
+    return server
+
+
+def serve(host: str = "127.0.0.1", port: int = 9100, latency: float = 0.0, fail_every: int = 0,
+          certfile: Optional[str] = None, keyfile: Optional[str] = None,
+          token_latency: float = 0.0) -> ThreadingHTTPServer:
+    """Start the stub in a background thread; call .shutdown() on the result to stop it."""
+    server = _server(host, port, latency, fail_every, certfile, keyfile, token_latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible API server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per response")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds between generated tokens")
+    parser.add_argument("--fail-every", type=int, default=0, help="return HTTP 500 on every Nth request")
+    parser.add_argument("--certfile", help="serve HTTPS with this certificate (PEM)")
+    parser.add_argument("--keyfile", help="private key for --certfile")
+    args = parser.parse_args()
+    server = _server(args.host, args.port, args.latency, args.fail_every, args.certfile, args.keyfile,
+                     args.token_latency)
+    print(f"stub LLM on {'https' if args.certfile else 'http'}://{args.host}:{args.port}/v1", flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# backend/benchmarks/bench_archive.py
+"""
+Archived sessions: one compact JSON file per session vs compressed segments.
+Measures bytes on disk, random single-session reads and a full scan. Run from backend/:
+    python -m benchmarks.bench_archive
+"""
+
+import json
+import os
+import random
+import tempfile
+import time
+
+from app.services.archive import SessionArchive
+
+SESSIONS = 5000
+TURNS = 20
+REP = "Our phase III trial (n=1,200) met its primary endpoint with p<0.01; discontinuation was 4%."
+DOC = "What about safety in patients over 65 with renal impairment? Keep it brief, I have a clinic."
+
+
+def _record(i: int) -> dict:
+    day = f"2026-05-{1 + i % 28:02d}"
+    messages = []
+    for t in range(TURNS):
+        messages.append({"role": "rep", "content": f"{REP} ({t})", "timestamp": f"{day}T10:{t:02d}:00Z"})
+        messages.append({"role": "doctor", "content": f"{DOC} ({t})", "timestamp": f"{day}T10:{t:02d}:30Z"})
+    return {"session_id": f"s-{i:06d}", "created_at": f"{day}T10:00:00Z",
+            "payload": {"persona_id": "doc_001", "messages": messages,
+                        "state": {"mood": "Engaged", "stage": "Discussion", "trust": 60}},
+            "evaluation": {"scores": {"clarity": 4, "compliance": 5}}}
+
+
+def _dir_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def main() -> None:
+    records = [_record(i) for i in range(SESSIONS)]
+    sample = random.Random(0).sample(range(SESSIONS), 500)
+
+    files = tempfile.mkdtemp()
+    for record in records:
+        with open(os.path.join(files, record["session_id"] + ".json"), "w", encoding="utf-8") as fh:
+            json.dump(record, fh, ensure_ascii=False)
+    start = time.perf_counter()
+    for i in sample:
+        with open(os.path.join(files, f"s-{i:06d}.json"), "r", encoding="utf-8") as fh:
+            json.load(fh)
+    files_get = (time.perf_counter() - start) / len(sample) * 1e6
+    start = time.perf_counter()
+    for entry in os.scandir(files):
+        with open(entry.path, "r", encoding="utf-8") as fh:
+            json.load(fh)
+    files_scan = time.perf_counter() - start
+
+    segments = tempfile.mkdtemp()
+    archive = SessionArchive(segments)
+    archive.pack(records)
+    archive.get("s-000000")  # open the segments once
+    start = time.perf_counter()
+    for i in sample:
+        archive.get(f"s-{i:06d}")
+    segment_get = (time.perf_counter() - start) / len(sample) * 1e6
+    start = time.perf_counter()
+    assert sum(1 for _ in archive.iter_records()) == SESSIONS
+    segment_scan = time.perf_counter() - start
+
+    print(f"{SESSIONS} sessions x {TURNS} turns, {len(archive.segments())} daily segments")
+    print(f"{'':>10} {'bytes':>12} {'get us':>8} {'scan s':>8}")
+    print(f"{'json':>10} {_dir_bytes(files):>12} {files_get:>8.1f} {files_scan:>8.2f}")
+    print(f"{'segments':>10} {_dir_bytes(segments):>12} {segment_get:>8.1f} {segment_scan:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
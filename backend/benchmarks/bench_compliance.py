@@ -0,0 +1,74 @@
+# backend/benchmarks/bench_compliance.py
+"""
+Compliance scan cost as rule lists grow: compiled rule set vs. one `phrase in text`
+check per rule (transcript-level plus a must-not-say pass per MR turn).
+Run from backend/:  python -m benchmarks.bench_compliance
+"""
+
+import random
+import string
+import time
+
+from app.services.compliance import ComplianceRuleSet, compile_rules
+
+TURNS = 200
+
+
+def _phrases(count: int, rng: random.Random) -> list:
+    return [
+        " ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8))) for _ in range(rng.randint(1, 4)))
+        for _ in range(count)
+    ]
+
+
+def _transcript(rng: random.Random, phrases: list) -> list:
+    turns = []
+    for i in range(TURNS):
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(30)]
+        if phrases and i % 10 == 0:
+            words.insert(rng.randrange(len(words)), rng.choice(phrases))
+        turns.append({"role": "rep" if i % 2 == 0 else "doctor", "content": " ".join(words)})
+    return turns
+
+
+def _old_scan(transcript: list, must_say: list, must_not_say: list) -> None:
+    full_text = " ".join(msg["content"].lower() for msg in transcript)
+    [p for p in must_say if p.lower() in full_text]
+    [p for p in must_not_say if p.lower() in full_text]
+    for msg in transcript:
+        if msg["role"] == "rep":
+            text = msg["content"].lower()
+            [p for p in must_not_say if p.lower() in text]
+
+
+def main() -> None:
+    rng = random.Random(3)
+    print(f"{'rules':>7} {'compile ms':>11} {'old ms':>9} {'compiled ms':>12} {'cached lookup us':>17}")
+    for count in (10, 100, 1_000, 5_000):
+        phrases = _phrases(count, rng)
+        must_say, must_not_say = phrases[: count // 2], phrases[count // 2:]
+        transcript = _transcript(rng, phrases)
+
+        t0 = time.perf_counter()
+        rules = ComplianceRuleSet(must_say, must_not_say)
+        compile_ms = (time.perf_counter() - t0) * 1e3
+
+        t0 = time.perf_counter()
+        _old_scan(transcript, must_say, must_not_say)
+        old_ms = (time.perf_counter() - t0) * 1e3
+
+        t0 = time.perf_counter()
+        rules.scan(transcript).summary()
+        new_ms = (time.perf_counter() - t0) * 1e3
+
+        compile_rules(must_say, must_not_say)
+        t0 = time.perf_counter()
+        for _ in range(100):
+            compile_rules(must_say, must_not_say)
+        lookup_us = (time.perf_counter() - t0) / 100 * 1e6
+
+        print(f"{len(rules):>7} {compile_ms:>11.1f} {old_ms:>9.2f} {new_ms:>12.2f} {lookup_us:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
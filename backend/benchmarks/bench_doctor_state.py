@@ -0,0 +1,79 @@
+# backend/benchmarks/bench_doctor_state.py
+"""
+Per-turn state round trip: client dict -> DoctorState -> update -> payload, old vs new.
+Old: list-backed skepticism window (pop(0) + sum()), state rebuilt field by field from
+a dict and returned as a nested __dict__ JSON. New: slotted ring-buffer state carried
+as a signed token. Run from backend/:  python -m benchmarks.bench_doctor_state
+"""
+
+import dataclasses
+import json
+import time
+
+from app.services.persona_engine import DoctorState, decode_state, encode_state, update_state
+
+TURNS = 20_000
+SESSION = "bench-session"
+LLM = {"relevancy": 1, "nextConversationStage": "Discussion", "nextMood": "Engaged", "justification": "ok"}
+
+
+@dataclasses.dataclass
+class _ListSkepticism:
+    scores: list = dataclasses.field(default_factory=list)
+
+    def update(self, latest, max_window=5):
+        self.scores.append(latest)
+        if len(self.scores) > max_window:
+            self.scores.pop(0)
+
+    def level(self, baseline):
+        total = sum(self.scores)
+        base = {"Low": 1, "Medium": 2, "High": 3}[baseline]
+        return "Low" if total >= base + 1 else "High" if total <= base - 1 else "Medium"
+
+
+@dataclasses.dataclass
+class _DictState:
+    mood: str = "Neutral"
+    time_pressure_level: int = 1
+    stage: str = "Introduction"
+    seconds_elapsed: int = 0
+    trust: int = 50
+    skepticism_state: _ListSkepticism = dataclasses.field(default_factory=_ListSkepticism)
+    current_skepticism_level: str = "Medium"
+    notes: str = None
+
+
+def _old_turn(payload: str) -> str:
+    data = json.loads(payload)
+    state = _DictState(**{k: data[k] for k in ("mood", "time_pressure_level", "stage", "seconds_elapsed", "trust",
+                                                "current_skepticism_level")})
+    state.skepticism_state = _ListSkepticism(list(data["skepticism_state"]["scores"]))
+    state.skepticism_state.update(LLM["relevancy"])
+    state.current_skepticism_level = state.skepticism_state.level("High")
+    state.seconds_elapsed += 30
+    state.notes = LLM["justification"]
+    return json.dumps(dataclasses.asdict(state))
+
+
+def _new_turn(token: str) -> str:
+    return encode_state(update_state(decode_state(token, SESSION), LLM, 30, "High"), SESSION)
+
+
+def _run(fn, payload):
+    start = time.perf_counter()
+    for _ in range(TURNS):
+        payload = fn(payload)
+    return (time.perf_counter() - start) / TURNS * 1e6, payload
+
+
+def main() -> None:
+    old_us, old_payload = _run(_old_turn, json.dumps(dataclasses.asdict(_DictState())))
+    new_us, new_payload = _run(_new_turn, encode_state(DoctorState(), SESSION))
+    print(f"{'':>6} {'us/turn':>9} {'payload bytes':>14}")
+    print(f"{'old':>6} {old_us:>9.2f} {len(old_payload):>14}")
+    print(f"{'new':>6} {new_us:>9.2f} {len(new_payload):>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# backend/benchmarks/bench_evaluation.py
+"""
+Scaling of evaluate_conversation with transcript length (stitched multi-visit days).
+Run from backend/:  python -m benchmarks.bench_evaluation
+"""
+
+import random
+import time
+
+from app.services.evaluation import evaluate_conversation
+
+REP_LINES = [
+    "Our drug is the best option for your patients.",
+    "The randomized trial enrolled n=420 and showed a p-value below 0.01.",
+    "Safety data from the registry looks consistent.",
+    "I understand your concern about cost.",
+]
+DOCTOR_LINES = ["Go on.", "What's the evidence?", "I have two minutes.", "Send me the study."]
+MUST_SAY = ["evidence", "trial", "study", "patient outcomes"]
+MUST_NOT_SAY = ["best", "revolutionary", "amazing", "unbelievable"]
+
+
+def _transcript(turns: int, seed: int = 5) -> list:
+    rng = random.Random(seed)
+    return [
+        {"role": "rep" if i % 2 == 0 else "doctor", "content": f"{rng.choice(REP_LINES if i % 2 == 0 else DOCTOR_LINES)} ({i})"}
+        for i in range(turns)
+    ]
+
+
+def main() -> None:
+    print(f"{'turns':>8} {'ms':>9} {'us/turn':>9}")
+    for turns in (1_000, 5_000, 10_000, 20_000, 50_000):
+        transcript = _transcript(turns)
+        start = time.perf_counter()
+        evaluate_conversation(transcript, "doc_001", MUST_SAY, MUST_NOT_SAY)
+        elapsed = time.perf_counter() - start
+        print(f"{turns:>8} {elapsed * 1e3:>9.2f} {elapsed / turns * 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# backend/benchmarks/bench_lexicon.py
+"""
+Per-utterance cost of the compiled lexicon matcher vs. the old `any(p in text)` scan
+as the lexicon grows. Run from backend/:  python -m benchmarks.bench_lexicon
+"""
+
+import random
+import string
+import time
+
+from app.services.lexicon import EVIDENCE_TERMS, HYPE_TERMS, REPETITION_TERMS, LexiconMatcher
+
+UTTERANCE = (
+    "Doctor, in the phase three randomized trial with n=420 patients the primary endpoint "
+    "improved and the hazard ratio was 0.72, with a safety profile comparable to standard of care."
+)
+
+
+def _synthetic_terms(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        " ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(rng.randint(1, 3)))
+        for _ in range(count)
+    ]
+
+
+def _per_call_us(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> None:
+    print(f"{'terms':>8} {'compile ms':>11} {'matcher us':>11} {'substring us':>13}")
+    for extra in (0, 100, 1_000, 5_000, 20_000):
+        evidence = list(EVIDENCE_TERMS) + _synthetic_terms(extra)
+        t0 = time.perf_counter()
+        matcher = LexiconMatcher({"evidence": evidence, "hype": HYPE_TERMS, "repetition": REPETITION_TERMS})
+        compile_ms = (time.perf_counter() - t0) * 1e3
+
+        patterns = evidence + list(HYPE_TERMS) + list(REPETITION_TERMS)
+        text = UTTERANCE.lower()
+        matcher_us = _per_call_us(lambda: matcher.categories(UTTERANCE), 2_000)
+        # worst case for the old approach: every pattern is checked (no early exit)
+        substring_us = _per_call_us(lambda: [p for p in patterns if p in text], 200)
+        print(f"{len(matcher):>8} {compile_ms:>11.1f} {matcher_us:>11.2f} {substring_us:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# backend/benchmarks/bench_prompt_builder.py
+"""
+Per-turn system prompt size and build time: incremental PromptBuilder vs. re-rendering
+the persona block and whole transcript every turn (the old create_system_prompt).
+Run from backend/:  python -m benchmarks.bench_prompt_builder
+"""
+
+import time
+
+from app.models.doctor_persona import PERSONA_REGISTRY
+from app.services.persona_engine import DoctorState, PromptBuilder, render_persona_prefix, render_transcript_line
+
+TURNS = 1_000
+LINE = "we saw the phase three randomized trial hit its primary endpoint with n=420 "
+
+
+def _full_rerender(persona, transcript, last_rep):
+    # what every turn used to cost: persona block + every transcript line, again
+    return render_persona_prefix(persona) + "".join(render_transcript_line(m) for m in transcript) + last_rep
+
+
+def main() -> None:
+    persona, state = PERSONA_REGISTRY.all()[0], DoctorState()
+    builder = PromptBuilder(persona)
+    transcript = []
+    print(f"{'turn':>6} {'old chars':>10} {'old ms':>8} {'new chars':>10} {'new ms':>8} {'summarized':>11}")
+    for i in range(TURNS):
+        msg = {"role": "rep" if i % 2 == 0 else "doctor", "content": f"({i}) {LINE}", "timestamp": f"t{i}"}
+        transcript.append(msg)
+        builder.add(msg)
+        if i % 2:
+            continue
+        t0 = time.perf_counter()
+        old = _full_rerender(persona, transcript, msg["content"])
+        old_ms = (time.perf_counter() - t0) * 1e3
+        builder.render(state, 120, msg["content"])
+        stats = builder.last_stats
+        if i in (10, 100, 500, TURNS - 2):
+            print(f"{i:>6} {len(old):>10} {old_ms:>8.3f} {stats['chars']:>10} {stats['build_ms']:>8.3f} "
+                  f"{stats['summarized_turns']:>11}")
+
+
+if __name__ == "__main__":
+    main()
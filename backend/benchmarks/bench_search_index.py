@@ -0,0 +1,78 @@
+# backend/benchmarks/bench_search_index.py
+"""
+Phrase queries against the transcript search index at a million turns, next to
+the scan it replaces (load every stored session and look for the phrase).
+Run from backend/:
+    python -m benchmarks.bench_search_index
+"""
+
+import json
+import os
+import random
+import tempfile
+import time
+
+from app.services.search_index import TranscriptSearchIndex
+
+SESSIONS = 20_000
+TURNS = 50  # 1M turns
+SCAN_SESSIONS = 2_000  # the scan is timed on a slice and scaled up
+QUERIES = [
+    (["no side effects"], None),
+    (["revolutionary", "no side effects"], "rep"),
+    (["renal impairment"], "doctor"),
+    (["phase III trial"], None),
+]
+
+WORDS = ("patients dose trial safety efficacy data study results label week renal hepatic elderly adverse "
+         "events response rate placebo outcome clinic guideline approval indication monitoring").split()
+SPICE = ["there are no side effects", "a revolutionary therapy", "with renal impairment", "our phase III trial"]
+
+
+def _message(rng: random.Random, role: str) -> dict:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+    if rng.random() < 0.01:
+        words.insert(rng.randint(0, len(words)), rng.choice(SPICE))
+    return {"role": role, "content": " ".join(words)}
+
+
+def main() -> None:
+    rng = random.Random(0)
+    base = tempfile.mkdtemp()
+    index = TranscriptSearchIndex(os.path.join(base, "search.db"))
+    files = os.path.join(base, "sessions")
+    os.makedirs(files)
+
+    start = time.perf_counter()
+    for i in range(SESSIONS):
+        messages = [_message(rng, "rep" if t % 2 == 0 else "doctor") for t in range(TURNS)]
+        session_id = f"s-{i:06d}"
+        index.index_session(session_id, messages, "doc_001", f"2026-{1 + i % 12:02d}-01T00:00:00Z")
+        if i < SCAN_SESSIONS:
+            with open(os.path.join(files, session_id + ".json"), "w", encoding="utf-8") as fh:
+                json.dump({"session_id": session_id, "payload": {"messages": messages}}, fh)
+    index.optimize()
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for entry in os.scandir(files):
+        with open(entry.path, "r", encoding="utf-8") as fh:
+            record = json.load(fh)
+        [m for m in record["payload"]["messages"] if "no side effects" in m["content"]]
+    scan_ms = (time.perf_counter() - start) * 1e3 * SESSIONS / SCAN_SESSIONS
+
+    print(f"{SESSIONS * TURNS} turns indexed in {build:.1f}s ({os.path.getsize(index.path) / 1e6:.0f} MB)")
+    print(f"full scan (extrapolated): {scan_ms:.0f} ms")
+    for phrases, role in QUERIES:
+        for group in ("turns", "sessions"):
+            query = index.sessions if group == "sessions" else index.search
+            query(phrases, role, limit=100)  # warm
+            start = time.perf_counter()
+            for _ in range(10):
+                results = query(phrases, role, limit=100)
+            took = (time.perf_counter() - start) / 10 * 1e3
+            print(f"{' | '.join(phrases):>34} {role or '-':>7} {group:>9} {len(results):>4} hits {took:>7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# backend/benchmarks/bench_session_token.py
+"""
+/session-token latency, old vs new, against the local stub over HTTPS.
+Old: a new httpx.AsyncClient (fresh TCP + TLS handshake) per request, as
+session_token used to do. New: session_token on the shared pooled client.
+Needs the openssl CLI for a throwaway certificate. The stub is a thread-per-
+connection server, so keep CONCURRENCY near the core count or it measures the
+stub's own GIL contention rather than the client. Run from backend/:
+    OPENAI_API_KEY=x python -m benchmarks.bench_session_token
+"""
+
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from app import main as app_main
+from app.services import http_client, token_pool
+
+REQUESTS = 1000
+CONCURRENCY = 4
+PORT = 9181
+
+
+def _certificate() -> tuple:
+    directory = tempfile.mkdtemp()
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-keyout", key, "-out", cert, "-subj", "/CN=127.0.0.1",
+                    "-addext", "subjectAltName=IP:127.0.0.1"], check=True, capture_output=True)
+    return cert, key
+
+
+async def _old_session_token(url: str) -> dict:
+    async with httpx.AsyncClient(timeout=10.0, verify=False) as client:
+        resp = await client.post(url, headers={"Authorization": "Bearer x"}, json={"model": "m", "voice": "verse"})
+    return resp.json()
+
+
+async def _measure(call, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append((time.perf_counter() - start) * 1e3)
+
+    await asyncio.gather(*(one() for _ in range(REQUESTS)))
+    return latencies
+
+
+def _row(name: str, latencies: list) -> str:
+    q = statistics.quantiles(latencies, n=100)
+    return f"{name:>18} {q[49]:>8.2f} {q[98]:>8.2f}"
+
+
+async def _run(url: str) -> None:
+    print(f"{REQUESTS} requests, p50 / p99 ms")
+    for concurrency in (1, CONCURRENCY):
+        old = await _measure(lambda: _old_session_token(url), concurrency)
+        http_client.OPENAI_HTTP.start()
+        await asyncio.gather(*(app_main.session_token() for _ in range(concurrency)))  # warm the pool
+        new = await _measure(app_main.session_token, concurrency)
+        await http_client.OPENAI_HTTP.close()
+        print(f"concurrency {concurrency}")
+        print(_row("new client/request", old))
+        print(_row("shared pool", new))
+
+
+def main() -> None:
+    cert, key = _certificate()
+    # the stub runs in its own process so it doesn't share the GIL with the client
+    server = subprocess.Popen([sys.executable, "-m", "app.tools.stub_llm", "--port", str(PORT),
+                               "--certfile", cert, "--keyfile", key], stdout=subprocess.PIPE)
+    server.stdout.readline()  # listening
+    base = f"https://127.0.0.1:{PORT}/v1"
+    token_pool.OPENAI_BASE_URL = base
+    http_client.OPENAI_CA_BUNDLE = cert  # the pool verifies the stub's certificate
+    try:
+        asyncio.run(_run(f"{base}/realtime/sessions"))
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
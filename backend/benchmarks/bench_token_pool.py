@@ -0,0 +1,70 @@
+# backend/benchmarks/bench_token_pool.py
+"""
+Start-of-block burst on /session-token, with and without the pre-minted pool.
+BURST reps press "Start" within a second against the local stub, which takes
+UPSTREAM_LATENCY seconds per session (tokens live TTL seconds). Run from backend/:
+    OPENAI_API_KEY=x python -m benchmarks.bench_token_pool
+"""
+
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from app.services import token_pool
+from app.services.http_client import OPENAI_HTTP
+from app.tools import stub_llm
+
+BURST = 30
+POOL_SIZE = 24
+UPSTREAM_LATENCY = 0.4
+TTL = 60
+PORT = 9184
+
+
+async def _burst(pool: token_pool.SessionTokenPool) -> list:
+    rng = random.Random(0)
+    latencies = []
+
+    async def rep():
+        await asyncio.sleep(rng.random())
+        start = time.perf_counter()
+        session = await pool.get()
+        assert session["client_secret"]["expires_at"] - time.time() > pool.margin
+        latencies.append((time.perf_counter() - start) * 1e3)
+
+    await asyncio.gather(*(rep() for _ in range(BURST)))
+    return latencies
+
+
+async def _run() -> None:
+    print(f"{BURST} reps within 1s, upstream {UPSTREAM_LATENCY * 1e3:.0f} ms per session")
+    print(f"{'':>12} {'p50 ms':>8} {'p99 ms':>8} {'hit rate':>9}")
+    for size in (0, POOL_SIZE):
+        OPENAI_HTTP.start()
+        pool = token_pool.SessionTokenPool(size=size)
+        pool.start()
+        while size and sum(p["ready"] for p in pool.stats()["pools"]) < size:
+            await asyncio.sleep(0.05)  # the pool fills before the block starts
+        latencies = await _burst(pool)
+        stats = pool.stats()
+        await pool.close()
+        await OPENAI_HTTP.close()
+        q = statistics.quantiles(latencies, n=100)
+        name = f"pool {size}" if size else "no pool"
+        print(f"{name:>12} {q[49]:>8.1f} {q[98]:>8.1f} {stats['hit_rate']:>9}")
+    print(json.dumps({k: stats[k] for k in ("minted", "discarded_near_expiry", "time_to_token_ms")}))
+
+
+def main() -> None:
+    server = stub_llm.serve(port=PORT, latency=UPSTREAM_LATENCY)
+    token_pool.OPENAI_BASE_URL = f"http://127.0.0.1:{PORT}/v1"
+    try:
+        asyncio.run(_run())
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# backend/benchmarks/bench_tone_trajectory.py
+"""
+Cost of replaying a transcript through the tone rules in one pass.
+Run from backend/:  python -m benchmarks.bench_tone_trajectory
+"""
+
+import random
+import time
+
+from app.services.tone import tone_trajectory
+
+REP_LINES = [
+    "Our drug is the best option available.",
+    "In the randomized phase three trial, n=420, the primary endpoint improved.",
+    "As I said, it works well for most patients.",
+    "Let me walk you through the full story of how this product came to be developed, "
+    "who funded it, where it was studied and why we believe it will matter to your practice in the long run.",
+    "The safety profile was comparable to standard of care.",
+]
+DOCTOR_LINES = ["Go on.", "I have two minutes.", "What's the data?", "Bottom line?"]
+
+
+def _transcript(turns: int, seed: int = 3) -> list:
+    rng = random.Random(seed)
+    out = []
+    for i in range(turns):
+        lines, role = (REP_LINES, "rep") if i % 2 == 0 else (DOCTOR_LINES, "doctor")
+        out.append({"role": role, "content": rng.choice(lines)})
+    return out
+
+
+def main() -> None:
+    print(f"{'turns':>8} {'ms':>9} {'us/turn':>9}")
+    for turns in (100, 1_000, 5_000, 20_000):
+        transcript = _transcript(turns)
+        start = time.perf_counter()
+        tone_trajectory(transcript)
+        elapsed = time.perf_counter() - start
+        print(f"{turns:>8} {elapsed * 1e3:>9.2f} {elapsed / turns * 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# backend/benchmarks/bench_transcript_store.py
+"""
+Per-turn session persistence, old vs new, over one long session.
+Old: load the whole {session_id}.json, append two messages, rewrite it with indent=2.
+New: append two message events plus a state event to {session_id}.log (load_transcript
+still runs each turn, as process_turn does). Run from backend/:
+    python -m benchmarks.bench_transcript_store
+"""
+
+import json
+import os
+import tempfile
+import time
+
+from app.services import transcript_service
+
+TURNS = 200
+REP = {"role": "rep", "content": "Our phase III trial (n=1,200) met its primary endpoint with p<0.01.", "timestamp": "t"}
+DOC = {"role": "doctor", "content": "What about safety in patients over 65? Keep it brief.", "timestamp": "t"}
+STATE = {"mood": "Engaged", "time_pressure_level": 2, "stage": "Discussion", "seconds_elapsed": 60, "trust": 60}
+
+
+def _old_turn(base: str, sid: str) -> int:
+    path = transcript_service._snapshot_path(sid)
+    with open(path, "r", encoding="utf-8") as fh:
+        record = json.load(fh)
+    record["payload"]["messages"] += [REP, DOC]
+    record["payload"]["state"] = STATE
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(record, fh, ensure_ascii=False, indent=2)
+    return os.path.getsize(path)
+
+
+def _new_turn(base: str, sid: str) -> int:
+    transcript_service.load_transcript(sid)
+    transcript_service.append_turn(sid, [REP, DOC], state=STATE, state_token="x" * 40)
+    log = transcript_service._log_path(transcript_service._snapshot_path(sid))
+    return os.path.getsize(log) if os.path.exists(log) else 0
+
+
+def _run(turn) -> tuple:
+    base = tempfile.mkdtemp()
+    transcript_service.BASE_DIR = base
+    sid = transcript_service.save_transcript({"messages": [], "persona_id": "doc_001"})
+    written, last = 0, 0
+    start = time.perf_counter()
+    for _ in range(TURNS):
+        size = turn(base, sid)
+        written += size if turn is _old_turn else max(0, size - last)
+        last = size
+    elapsed = (time.perf_counter() - start) / TURNS * 1e3
+    return elapsed, written
+
+
+def main() -> None:
+    old_ms, old_bytes = _run(_old_turn)
+    new_ms, new_bytes = _run(_new_turn)
+    print(f"{TURNS} turns, one session")
+    print(f"{'':>6} {'ms/turn':>9} {'bytes written':>14}")
+    print(f"{'old':>6} {old_ms:>9.3f} {old_bytes:>14}")
+    print(f"{'new':>6} {new_ms:>9.3f} {new_bytes:>14}")
+
+
+if __name__ == "__main__":
+    main()
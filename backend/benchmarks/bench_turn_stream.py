@@ -0,0 +1,91 @@
+# backend/benchmarks/bench_turn_stream.py
+"""
+/conversation/turn time-to-first-byte and concurrency, against the local stub
+(FIRST_TOKEN seconds to the first token, then TOKEN seconds per token):
+  blocking  the old handler: a synchronous OpenAI client inside async def
+  async     /conversation/turn on the shared AsyncOpenAI client
+  stream    /conversation/turn/stream, first byte = first "reply" event
+Each runs CONCURRENT turns at once on app.main served by uvicorn. Run from backend/:
+    OPENAI_API_KEY=x python -m benchmarks.bench_turn_stream
+"""
+
+import asyncio
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from openai import OpenAI
+
+from app import main as app_main
+from app.api import routes
+from app.models.doctor_persona import PERSONA_REGISTRY
+from app.services import http_client, transcript_service
+from app.tools import stub_llm
+
+FIRST_TOKEN = 0.3
+TOKEN = 0.01
+CONCURRENT = 8
+STUB_PORT, APP_PORT = 9191, 9192
+
+
+async def _blocking_turn(payload: routes.TurnIn):
+    turn = await routes._begin_turn(payload)
+    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"), base_url=http_client.OPENAI_BASE_URL)
+    completion = client.chat.completions.create(**turn.completion_args())
+    return await routes._finish_turn(turn, turn.parse(completion.choices[0].message.content))
+
+
+def _app() -> FastAPI:
+    # the production app, plus the old blocking handler for comparison
+    app_main.app.post("/api/conversation/turn-blocking")(_blocking_turn)
+    return app_main.app
+
+
+async def _turn(client: httpx.AsyncClient, path: str, persona_id: str) -> tuple:
+    started = await client.post("/api/conversation/start", json={"persona_id": persona_id})
+    body = {"session_id": started.json()["session_id"], "persona_id": persona_id,
+            "state_token": started.json()["state_token"],
+            "rep_message": {"role": "rep", "content": "Our phase III trial met its primary endpoint."}}
+    start = time.perf_counter()
+    first = None
+    async with client.stream("POST", path, json=body) as resp:
+        async for chunk in resp.aiter_bytes():
+            if first is None and chunk.strip():
+                first = time.perf_counter() - start
+    return first * 1e3, (time.perf_counter() - start) * 1e3
+
+
+async def _run(persona_id: str) -> None:
+    print(f"{CONCURRENT} concurrent turns; stub: {FIRST_TOKEN * 1e3:.0f} ms to first token, {TOKEN * 1e3:.0f} ms/token")
+    print(f"{'':>9} {'ttfb p50':>9} {'ttfb max':>9} {'total max':>10}")
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{APP_PORT}", timeout=60) as client:
+        for name, path in (("blocking", "/api/conversation/turn-blocking"), ("async", "/api/conversation/turn"),
+                           ("stream", "/api/conversation/turn/stream")):
+            await _turn(client, path, persona_id)  # warm up
+            results = await asyncio.gather(*(_turn(client, path, persona_id) for _ in range(CONCURRENT)))
+            ttfb = [r[0] for r in results]
+            print(f"{name:>9} {statistics.median(ttfb):>9.0f} {max(ttfb):>9.0f} {max(r[1] for r in results):>10.0f}")
+
+
+def main() -> None:
+    transcript_service.BASE_DIR = tempfile.mkdtemp()
+    stub = stub_llm.serve(port=STUB_PORT, latency=FIRST_TOKEN, token_latency=TOKEN)
+    http_client.OPENAI_BASE_URL = f"http://127.0.0.1:{STUB_PORT}/v1"
+    server = uvicorn.Server(uvicorn.Config(_app(), port=APP_PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    try:
+        asyncio.run(_run(PERSONA_REGISTRY.all()[0].to_dict()["id"]))
+    finally:
+        server.should_exit = True
+        stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
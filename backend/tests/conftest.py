@@ -0,0 +1,22 @@
+# backend/tests/conftest.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """transcript_service on a scratch directory (file backend, fresh cache)."""
+    from app.services import transcript_service
+    from app.services.session_cache import SESSION_CACHE
+
+    base = tmp_path / "store"
+    base.mkdir()
+    monkeypatch.setattr(transcript_service, "BASE_DIR", str(base))
+    SESSION_CACHE.clear()
+    yield base
+    SESSION_CACHE.clear()
@@ -0,0 +1,25 @@
+import threading
+
+from app.services import jobs
+from app.services.eval_cache import EvaluationCache
+
+
+def test_disk_tier_is_read_by_the_worker(tmp_path, monkeypatch):
+    cache = EvaluationCache(disk_dir=str(tmp_path))
+    queue = jobs.EvaluationJobQueue(workers=1)
+    probe = jobs.EvaluationJob("combined", jobs.PRIORITY_INTERACTIVE, None, ([], "unknown", None, None))
+    cache.put(probe.cache_key, {"score": 1})
+    cache.clear()  # memory tier empty, disk tier still has it
+
+    readers = []
+    read_disk = cache._read_disk
+    monkeypatch.setattr(cache, "_read_disk", lambda key: readers.append(threading.current_thread()) or read_disk(key))
+    monkeypatch.setattr(jobs, "EVALUATION_CACHE", cache)
+    try:
+        job = queue.submit("combined", [], "unknown")
+        assert job.future.result(timeout=5) == {"score": 1}
+    finally:
+        queue.shutdown()
+    assert job.cached
+    assert readers and threading.current_thread() not in readers
+    assert cache.stats()["disk_hits"] == 1
@@ -0,0 +1,19 @@
+# backend/tests/test_lexicon.py
+from app.services.lexicon import LexiconMatcher
+
+
+def test_partly_overlapping_terms_both_count():
+    matcher = LexiconMatcher({"a": ["abc d"], "b": ["d e"]})
+    assert matcher.categories("abc d e") == {"a", "b"}
+
+
+def test_overlap_across_categories():
+    matcher = LexiconMatcher({"hype": ["best in class"], "evidence": ["class iii trial"]})
+    assert matcher.categories("our best in class iii trial data") == {"hype", "evidence"}
+
+
+def test_nested_terms_and_word_boundaries():
+    matcher = LexiconMatcher({"evidence": ["trial", "phase iii trial"], "hype": ["best"]})
+    assert matcher.categories("the phase iii trials") == {"evidence"}
+    assert matcher.categories("bestseller") == frozenset()
+    assert matcher.terms("phase iii trial, best") == ["phase iii trial", "trial", "best"]
@@ -0,0 +1,33 @@
+# backend/tests/test_session_ids.py
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import transcript_service
+
+UNSAFE = ["../../../escaped", "a/b", "..", "a\x00b", "x" * 65]
+
+
+@pytest.mark.parametrize("session_id", UNSAFE)
+def test_service_rejects_unsafe_ids(store, session_id):
+    with pytest.raises(transcript_service.InvalidSessionIdError):
+        transcript_service.save_transcript({"session_id": session_id, "messages": []})
+    with pytest.raises(transcript_service.InvalidSessionIdError):
+        transcript_service.append_turn(session_id, [{"role": "rep", "content": "hi"}])
+    with pytest.raises(transcript_service.InvalidSessionIdError):
+        transcript_service.load_transcript(session_id)
+
+
+def test_routes_never_write_outside_the_store(store, tmp_path):
+    with TestClient(app) as client:
+        resp = client.post("/api/transcripts", json={"session_id": "../../../escaped", "messages": []})
+        assert resp.status_code == 400
+        resp = client.post("/api/conversation/turn", json={
+            "session_id": "../escaped", "persona_id": "x", "rep_message": {"role": "rep", "content": "hi"}})
+        assert resp.status_code == 404
+        resp = client.post("/api/conversation/end", json={"session_id": "../escaped", "persona_id": "x"})
+        assert resp.status_code == 404
+        resp = client.post("/api/transcripts", json={"session_id": "abc-123_x", "messages": []})
+        assert resp.status_code == 200
+    assert not list(tmp_path.rglob("escaped*"))
+    assert transcript_service.load_transcript("abc-123_x") is not None
@@ -0,0 +1,20 @@
+import pytest
+
+from app.services.persona_engine import DoctorState, StateTokenError, decode_state, encode_state
+
+
+def test_round_trip():
+    state = DoctorState(current_skepticism_level="High")
+    assert decode_state(encode_state(state, "s1"), "s1").current_skepticism_level == "High"
+
+
+def test_token_is_bound_to_its_session():
+    token = encode_state(DoctorState(), "s1")
+    with pytest.raises(StateTokenError):
+        decode_state(token, "s2")
+
+
+@pytest.mark.parametrize("value", ["x", 3, ["a"]])
+def test_legacy_dict_tolerates_malformed_skepticism_state(value):
+    state = DoctorState.from_dict({"skepticism_state": value})
+    assert state.skepticism_state.scores == []
@@ -0,0 +1,31 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.token_pool import SessionTokenPool
+
+
+def test_margin_must_be_below_the_session_lifetime():
+    with pytest.raises(ValueError):
+        SessionTokenPool(size=2, margin=60, configs=[("m", "v")])
+    SessionTokenPool(size=0, margin=60, configs=[("m", "v")])  # disabled pool never uses it
+
+
+def test_session_expiring_on_arrival_backs_off():
+    calls = []
+
+    async def mint(model, voice):
+        calls.append(time.time())
+        return {"client_secret": {"expires_at": time.time() + 5}}
+
+    async def scenario():
+        pool = SessionTokenPool(mint=mint, size=2, margin=20, configs=[("m", "v")])
+        pool.start()
+        await asyncio.sleep(0.3)
+        await pool.close()
+        return pool
+
+    pool = asyncio.run(scenario())
+    assert len(calls) <= 2  # one refill round, then backing off
+    assert pool.failures == len(calls) and pool.minted == 0
@@ -16,8 +16,9 @@ export class RealtimeClient {
   private mood: "Neutral" | "Engaged" | "Dismissive" = "Neutral";
   private timePressureLevel: number = 4; // start very high: busy senior doctor
   private skepticismLevel: number = 4; // start very skeptical
-  private lastToneUpdateAt: number = 0;
-  private minToneUpdateMs: number = 900;
+  private toneSocket: WebSocket | null = null;
+  private toneSessionId: string | null = null;
+  private toneSynced: { mood: string; timePressure: number; skepticism: number } | null = null;
   private patienceScore: number = 1; // start with very low patience (0-5)
   private engagementScore: number = 1; // start with very low engagement (0-5)
   private hypeCount: number = 0; // track hype phrases
@@ -55,6 +56,10 @@ export class RealtimeClient {
     this.ephemeralToken = sess?.client_secret?.value || "";
     if (!this.ephemeralToken) throw new Error("Missing ephemeral token from /session-token");
 
+    // Open the tone-control channel (server holds doctor state)
+    this.toneSessionId = this.sessionId || crypto.randomUUID();
+    this.openToneChannel();
+
     // 2) Get microphone with improved constraints
     this.micStream = await navigator.mediaDevices.getUserMedia({
       audio: {
@@ -133,8 +138,8 @@ export class RealtimeClient {
 
           // Update tone heuristically and nudge the session
           this.updateToneAndNudge(signals, content);
-          // Also call backend tone-decide with rate limiting
-          this.requestBackendToneUpdate(content).catch(() => {});
+          // Stream the doctor utterance to the tone channel; server replies with a decision delta
+          this.sendToneEvent({ type: "doctor", text: content, set: this.localToneChanges() });
         }
         
         // Handle MR input messages (for tracking hype/monologue)
@@ -181,6 +186,7 @@ export class RealtimeClient {
       this.detachHotkeys();
       if (this.rafId) { cancelAnimationFrame(this.rafId); this.rafId = null; }
       if (this.hangupTimer) { clearTimeout(this.hangupTimer); this.hangupTimer = null; }
+      if (this.toneSocket) { try { this.toneSocket.close(); } catch {} this.toneSocket = null; }
       if (this.audioCtx) { try { this.audioCtx.close(); } catch {} this.audioCtx = null; }
       if (this.dc) {
         try { this.dc.close(); } catch {}
@@ -345,112 +351,122 @@ export class RealtimeClient {
     return lines.join("\n");
   }
 
-  private async requestBackendToneUpdate(lastDoctorMessage: string): Promise<void> {
-    const now = Date.now();
-    if (now - this.lastToneUpdateAt < this.minToneUpdateMs) return; // rate limit
-    this.lastToneUpdateAt = now;
+  // ===== Tone-control channel (WebSocket, server-held state) =====
+  private openToneChannel(): void {
+    if (!this.toneSessionId) return;
+    const url = this.apiBase.replace(/\/api$/, "").replace(/^http/, "ws") + `/ws/tone/${this.toneSessionId}`;
+    const ws = new WebSocket(url);
+    ws.onopen = () => {
+      // Seed (or re-seed after reconnect) the server with our current state
+      ws.send(JSON.stringify({ type: "init", state: this.currentToneState() }));
+    };
+    ws.onmessage = (event) => {
+      try {
+        this.applyToneMessage(JSON.parse(event.data));
+      } catch (e) {
+        console.warn("Failed to parse tone channel message", e);
+      }
+    };
+    ws.onclose = () => {
+      if (this.toneSocket === ws) this.toneSocket = null;
+    };
+    this.toneSocket = ws;
+  }
 
-    const lastMr = this.getLastRepUtterance();
-    const payload = {
-      current_state: {
-        mood: this.mood,
-        timePressure: this.timePressureLevel,
-        skepticism: this.skepticismLevel,
-        patience: this.patienceScore,
-        engagement: this.engagementScore,
-        hypeCount: this.hypeCount,
-        evidenceCount: this.evidenceCount,
-        monologueCount: this.monologueCount,
-      },
-      last_doctor: lastDoctorMessage || "",
-      last_mr: lastMr || "",
+  private sendToneEvent(event: any): void {
+    if (!this.pc) return; // session stopped
+    if (!this.toneSocket || this.toneSocket.readyState > WebSocket.OPEN) {
+      this.openToneChannel();
+    }
+    const ws = this.toneSocket;
+    if (!ws) return;
+    const payload = JSON.stringify(event);
+    if (ws.readyState === WebSocket.OPEN) {
+      ws.send(payload);
+    } else {
+      ws.addEventListener("open", () => ws.send(payload), { once: true });
+    }
+  }
+
+  private currentToneState() {
+    return {
+      mood: this.mood,
+      timePressure: this.timePressureLevel,
+      skepticism: this.skepticismLevel,
+      patience: this.patienceScore,
+      engagement: this.engagementScore,
+      hypeCount: this.hypeCount,
+      evidenceCount: this.evidenceCount,
+      monologueCount: this.monologueCount,
     };
+  }
 
-    try {
-      const res = await fetch(this.apiBase + "/tone-decide", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify(payload),
-      });
-      if (!res.ok) return;
-      const upd = await res.json();
-      const significant = this.isSignificantToneChange(upd);
-      if (!significant) return;
-
-      // Update local state with backend response
-      this.mood = upd.mood;
-      this.timePressureLevel = upd.timePressure;
-      this.skepticismLevel = upd.skepticism;
-      this.patienceScore = upd.patience || this.patienceScore;
-      this.engagementScore = upd.engagement || this.engagementScore;
-      this.hypeCount = upd.hypeCount || this.hypeCount;
-      this.evidenceCount = upd.evidenceCount || this.evidenceCount;
-      this.monologueCount = upd.monologueCount || this.monologueCount;
-
-      // Check for cutNow trigger (doctor wants to end call)
-      if (upd.cutNow && !this.cutNowTriggered) {
-        this.cutNowTriggered = true;
-        console.log("Doctor triggered cutNow - will auto-hangup in 2 seconds");
-        
-        // Set auto-hangup timer
-        this.hangupTimer = window.setTimeout(() => {
-          this.handleAutoHangup("Call ended due to patience exhaustion");
-        }, 2000); // 2 second delay to let doctor finish speaking
-      }
+  // Local heuristic tweaks (updateToneAndNudge) the server has not seen yet
+  private localToneChanges(): any {
+    const synced = this.toneSynced;
+    const changes: any = {};
+    if (!synced || synced.mood !== this.mood) changes.mood = this.mood;
+    if (!synced || synced.timePressure !== this.timePressureLevel) changes.timePressure = this.timePressureLevel;
+    if (!synced || synced.skepticism !== this.skepticismLevel) changes.skepticism = this.skepticismLevel;
+    return Object.keys(changes).length ? changes : undefined;
+  }
 
-      this.sendEvent({
-        type: "session.update",
-        tone: {
-          mood: this.mood,
-          timePressure: this.timePressureLevel,
-          skepticism: this.skepticismLevel,
-        },
-        hint: String(upd.action || "").slice(0, 200),
-        pauseReply: Boolean(upd.pauseReply),
-      });
-    } catch {}
+  private markToneSynced(): void {
+    this.toneSynced = { mood: this.mood, timePressure: this.timePressureLevel, skepticism: this.skepticismLevel };
   }
 
-  private trackMrPatterns(content: string): void {
-    const contentLower = content.toLowerCase();
-    
-    // Track hype phrases
-    const hypeWords = ["best", "revolutionary", "amazing", "unbelievable", "game-changing", "breakthrough", "incredible"];
-    if (hypeWords.some(word => contentLower.includes(word))) {
-      this.hypeCount++;
-      console.log(`Hype detected (count: ${this.hypeCount}): ${content}`);
+  private applyToneMessage(msg: any): void {
+    if (msg.type === "state") {
+      this.markToneSynced();
+      return;
     }
-    
-    // Track evidence phrases - comprehensive medical criteria
-    const evidencePatterns = [
-      // Statistical evidence
-      "n=", "p=", "p-value", "confidence interval", "ci", "hazard ratio", "hr", "odds ratio", "or",
-      // Clinical endpoints
-      "primary endpoint", "secondary endpoint", "efficacy", "response rate", "remission rate", 
-      "progression-free survival", "pfs", "overall survival", "os", "disease-free survival", "dfs",
-      // Trial design
-      "randomized", "rct", "double-blind", "placebo-controlled", "phase", "multicenter",
-      // Safety data
-      "adverse events", "ae", "serious adverse events", "sae", "toxicity", "safety profile",
-      // Biomarkers
-      "biomarker", "genetic", "mutation", "expression", "receptor", "pathway",
-      // Real-world evidence
-      "real-world", "registry", "observational", "post-marketing", "surveillance",
-      // Guidelines/standards
-      "guidelines", "consensus", "recommendation", "standard of care", "treatment algorithm"
-    ];
-    
-    if (evidencePatterns.some(pattern => contentLower.includes(pattern))) {
-      this.evidenceCount++;
-      console.log(`Medical evidence detected (count: ${this.evidenceCount}): ${content}`);
+    if (msg.type === "error") {
+      console.warn("Tone channel error:", msg.detail);
+      return;
     }
-    
-    // Track monologues (long messages)
-    const wordCount = content.split(/\s+/).length;
-    if (wordCount > 25) {
-      this.monologueCount++;
-      console.log(`Monologue detected (count: ${this.monologueCount}, words: ${wordCount}): ${content}`);
+    if (msg.type !== "decision") return;
+
+    const upd = msg.state || {};
+    const significant = this.isSignificantToneChange(upd);
+
+    // Apply the delta: only changed fields are sent
+    if (upd.mood !== undefined) this.mood = upd.mood;
+    if (upd.timePressure !== undefined) this.timePressureLevel = upd.timePressure;
+    if (upd.skepticism !== undefined) this.skepticismLevel = upd.skepticism;
+    if (upd.patience !== undefined) this.patienceScore = upd.patience;
+    if (upd.engagement !== undefined) this.engagementScore = upd.engagement;
+    if (upd.hypeCount !== undefined) this.hypeCount = upd.hypeCount;
+    if (upd.evidenceCount !== undefined) this.evidenceCount = upd.evidenceCount;
+    if (upd.monologueCount !== undefined) this.monologueCount = upd.monologueCount;
+    this.markToneSynced();
+
+    // Check for cutNow trigger (doctor wants to end call)
+    if (msg.cutNow && !this.cutNowTriggered) {
+      this.cutNowTriggered = true;
+      console.log("Doctor triggered cutNow - will auto-hangup in 2 seconds");
+
+      // Set auto-hangup timer
+      this.hangupTimer = window.setTimeout(() => {
+        this.handleAutoHangup("Call ended due to patience exhaustion");
+      }, 2000); // 2 second delay to let doctor finish speaking
     }
+
+    if (!significant && !msg.cutNow) return;
+    this.sendEvent({
+      type: "session.update",
+      tone: {
+        mood: this.mood,
+        timePressure: this.timePressureLevel,
+        skepticism: this.skepticismLevel,
+      },
+      hint: String(msg.action || "").slice(0, 200),
+      pauseReply: Boolean(msg.pauseReply),
+    });
+  }
+
+  private trackMrPatterns(content: string): void {
+    // Hype, evidence, monologue and repetition counters live on the server
+    this.sendToneEvent({ type: "rep", text: content });
   }
 
   // Public method to manually track MR patterns (for testing)
@@ -492,14 +508,6 @@ export class RealtimeClient {
     return Boolean(moodChanged || tpChanged || skChanged);
   }
 
-  private getLastRepUtterance(): string | null {
-    for (let i = this.transcript.length - 1; i >= 0; i--) {
-      const t = this.transcript[i];
-      if (t.role === "rep") return t.content;
-    }
-    return null;
-  }
-
   // ===== Mic processing, VAD, barge-in, and hotkeys =====
   private setupMicProcessing(): void {
     try {
@@ -110,6 +110,15 @@ export interface TurnFeedback {
   sentiment: "positive" | "negative" | "neutral";
   couldHaveSaid?: string[];
   justification: string;
+  source?: "heuristic" | "llm";
+}
+
+export interface ComplianceHit {
+  rule: "must_say" | "must_not_say";
+  phrase: string;
+  turn_index: number;
+  start: number; // character offsets within the turn
+  end: number;
 }
 
 export interface EvaluationOutput {
@@ -124,6 +133,7 @@ export interface EvaluationOutput {
     mustSayMissed: string[];
     mustNotSayViolations: string[];
   };
+  complianceHits?: ComplianceHit[];
   feedbackSummary: string;
   turnLevelAnalysis: TurnFeedback[];
 }